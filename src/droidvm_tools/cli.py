@@ -1,15 +1,19 @@
-"""Command-line interface for DroidVM Tools."""
+"""Command-line interface for DroidVM Tools.
+
+Collectors (and psutil) are imported inside the commands that use them, so
+start-up stays fast for cron jobs and shell prompts. With ``--remote`` the
+data comes from a running server's snapshot instead of being collected.
+"""
 
 import json
-from typing import Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 import typer
-from rich.console import Console
+from rich.console import Console, Group, RenderableType
 from rich.table import Table
-from rich import print as rprint
 
-from droidvm_tools.tools import system
-from droidvm_tools.tools import network as network_tools
+from droidvm_tools.tools.formatting import bytes_to_human_readable
 
 app = typer.Typer(
     name="droidvm-tools",
@@ -18,13 +22,96 @@ app = typer.Typer(
 )
 console = Console()
 
+# droidvm_tools.client.Client when --remote is given
+_remote: Optional[Any] = None
+
+# system.TOP_SORT_KEYS, repeated so validation doesn't import psutil
+TOP_SORT_KEYS = ("cpu", "rss", "io")
+
+WatchOption = typer.Option(
+    None, "--watch", "-w", min=0.5, metavar="INTERVAL",
+    help="Keep running and refresh every INTERVAL seconds",
+)
+
+
+@app.callback()
+def main(
+    remote: bool = typer.Option(
+        False, "--remote", envvar="DROIDVM_REMOTE",
+        help="Read data from the running server instead of collecting it",
+    ),
+    socket: Optional[str] = typer.Option(
+        None, "--socket", metavar="PATH",
+        help="Server Unix socket (default: DROIDVM_UDS or the server's default)",
+    ),
+    url: Optional[str] = typer.Option(
+        None, "--url", help="Server URL when not using the Unix socket",
+    ),
+):
+    """Tools for managing Android phone as a tiny home server via Termux."""
+    global _remote
+    _remote = None
+    if remote or socket or url:
+        from droidvm_tools.client import Client
+
+        _remote = Client(socket_path=socket, base_url=url)
+
+
+# Collector modules pull in psutil, so they're only imported when a command
+# actually collects locally
+def _system():
+    from droidvm_tools.tools import system
+
+    return system
+
+
+def _network():
+    from droidvm_tools.tools import network
+
+    return network
+
+
+def _collect(path: str, local: Callable[[], Any], **params: Any) -> Any:
+    """Fetch ``path`` from the server with --remote, otherwise call ``local``."""
+    if _remote is None:
+        return local()
+
+    from droidvm_tools.client import RemoteError
+
+    try:
+        return _remote.get(path, **params)
+    except RemoteError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+
+def _watch(render: Callable[[], RenderableType], interval: Optional[float]) -> None:
+    """Print ``render()`` once, or redraw it in place every ``interval`` seconds.
+
+    Only ``render`` runs on each tick, so just the metrics it shows are
+    resampled; the samplers' state carries over between ticks.
+    """
+    if interval is None:
+        console.print(render())
+        return
+
+    from rich.live import Live
+
+    with Live(render(), console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                time.sleep(interval)
+                live.update(render(), refresh=True)
+        except KeyboardInterrupt:
+            pass
+
 
 @app.command()
 def info():
     """Display comprehensive system information."""
     console.print("\n[bold cyan]System Information[/bold cyan]")
 
-    sys_info = system.get_system_info()
+    sys_info = _collect("/system/info", lambda: _system().get_system_info())
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Property", style="cyan")
     table.add_column("Value", style="green")
@@ -35,12 +122,9 @@ def info():
     console.print(table)
 
 
-@app.command()
-def cpu():
-    """Display CPU information and usage."""
-    console.print("\n[bold cyan]CPU Information[/bold cyan]")
-
-    cpu_info = system.get_cpu_info()
+def _cpu_view() -> RenderableType:
+    # Only blocks on the first sample; later ticks measure since the last one
+    cpu_info = _collect("/system/cpu", lambda: _system().get_cpu_info(interval=0.5))
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
@@ -49,20 +133,22 @@ def cpu():
         if key != "cpu_usage_per_core":
             table.add_row(key.replace("_", " ").title(), str(value))
 
-    console.print(table)
-
+    parts = ["\n[bold cyan]CPU Information[/bold cyan]", table]
     if "cpu_usage_per_core" in cpu_info:
-        console.print("\n[bold yellow]Per-Core Usage:[/bold yellow]")
+        parts.append("\n[bold yellow]Per-Core Usage:[/bold yellow]")
         for i, usage in enumerate(cpu_info["cpu_usage_per_core"]):
-            console.print(f"  Core {i}: {usage}%")
+            parts.append(f"  Core {i}: {usage}%")
+    return Group(*parts)
 
 
 @app.command()
-def memory():
-    """Display memory usage information."""
-    console.print("\n[bold cyan]Memory Information[/bold cyan]")
+def cpu(watch: Optional[float] = WatchOption):
+    """Display CPU information and usage."""
+    _watch(_cpu_view, watch)
+
 
-    mem_info = system.get_memory_info()
+def _memory_view() -> RenderableType:
+    mem_info = _collect("/system/memory", lambda: _system().get_memory_info())
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
@@ -70,7 +156,13 @@ def memory():
     for key, value in mem_info.items():
         table.add_row(key.replace("_", " ").title(), str(value))
 
-    console.print(table)
+    return Group("\n[bold cyan]Memory Information[/bold cyan]", table)
+
+
+@app.command()
+def memory(watch: Optional[float] = WatchOption):
+    """Display memory usage information."""
+    _watch(_memory_view, watch)
 
 
 @app.command()
@@ -78,7 +170,7 @@ def disk():
     """Display disk usage information."""
     console.print("\n[bold cyan]Disk Information[/bold cyan]")
 
-    disk_info = system.get_disk_info()
+    disk_info = _collect("/system/disk", lambda: _system().get_disk_info())
 
     for partition in disk_info["partitions"]:
         console.print(f"\n[bold yellow]{partition['mountpoint']}[/bold yellow] ({partition['device']})")
@@ -98,7 +190,7 @@ def battery():
     """Display battery information (if available)."""
     console.print("\n[bold cyan]Battery Information[/bold cyan]")
 
-    battery_info = system.get_battery_info()
+    battery_info = _collect("/system/battery", lambda: _system().get_battery_info())
 
     if battery_info is None:
         console.print("[yellow]Battery information not available on this device[/yellow]")
@@ -119,7 +211,7 @@ def network():
     """Display network information."""
     console.print("\n[bold cyan]Network Information[/bold cyan]")
 
-    net_info = network_tools.get_network_info()
+    net_info = _collect("/network/info", lambda: _network().get_network_info())
 
     for iface_name, iface_data in net_info["interfaces"].items():
         console.print(f"\n[bold yellow]{iface_name}[/bold yellow]")
@@ -132,12 +224,18 @@ def network():
                 console.print(f"    - {addr['address']} ({addr['family']})")
 
 
-@app.command()
-def netstat():
-    """Display network statistics."""
-    console.print("\n[bold cyan]Network Statistics[/bold cyan]")
+def _local_netstat(rates: bool) -> dict:
+    network = _network()
+    stats = network.get_network_stats()
+    if rates:
+        # Only blocks on the first sample; later ticks measure since the last one
+        stats = {**stats, "rates": network.get_network_rates(interval=1.0)}
+    return stats
 
-    stats = network_tools.get_network_stats()
+
+def _netstat_view(rates: bool) -> RenderableType:
+    stats = _collect("/network/stats", lambda: _local_netstat(rates), rates=rates or None)
+    net_rates = stats.pop("rates", None)
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
@@ -145,16 +243,135 @@ def netstat():
     for key, value in stats.items():
         table.add_row(key.replace("_", " ").title(), str(value))
 
-    console.print(table)
+    parts = ["\n[bold cyan]Network Statistics[/bold cyan]", table]
+
+    if net_rates is not None:
+        parts.append("\n[bold yellow]Throughput:[/bold yellow]")
+
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Interface", style="cyan")
+        table.add_column("Sent/s", style="green")
+        table.add_column("Recv/s", style="green")
+        table.add_column("Pkts Sent/s", style="yellow")
+        table.add_column("Pkts Recv/s", style="yellow")
+
+        for iface_name, iface_rates in net_rates["interfaces"].items():
+            table.add_row(
+                iface_name,
+                f"{bytes_to_human_readable(iface_rates['bytes_sent_per_sec'])}/s",
+                f"{bytes_to_human_readable(iface_rates['bytes_recv_per_sec'])}/s",
+                str(iface_rates["packets_sent_per_sec"]),
+                str(iface_rates["packets_recv_per_sec"]),
+            )
+
+        parts.append(table)
+
+    return Group(*parts)
+
+
+@app.command()
+def netstat(
+    rates: bool = typer.Option(False, "--rates", "-r", help="Show per-interface throughput"),
+    watch: Optional[float] = WatchOption,
+):
+    """Display network statistics."""
+    _watch(lambda: _netstat_view(rates), watch)
+
+
+def _top_data(count: int, sort: str) -> dict:
+    return _collect(
+        "/system/processes/top",
+        lambda: _system().get_top_processes(count, sort),
+        count=count, sort=sort, format="raw",
+    )
+
+
+def _top_view(count: int, sort: str) -> RenderableType:
+    result = _top_data(count, sort)
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("PID", style="cyan", justify="right")
+    table.add_column("Name", style="green")
+    table.add_column("User")
+    table.add_column("Status")
+    table.add_column("CPU %", justify="right", style="yellow")
+    table.add_column("RSS", justify="right", style="yellow")
+    table.add_column("IO/s", justify="right", style="yellow")
+
+    for proc in result["processes"]:
+        table.add_row(
+            str(proc["pid"]),
+            proc["name"] or "?",
+            proc["username"] or "?",
+            proc["status"] or "?",
+            "N/A" if proc["cpu_percent"] is None else f"{proc['cpu_percent']}",
+            bytes_to_human_readable(proc["memory_rss"]),
+            "N/A" if proc["io_bytes_per_sec"] is None else f"{bytes_to_human_readable(proc['io_bytes_per_sec'])}/s",
+        )
+
+    return Group(
+        f"\n[bold cyan]Top Processes by {sort.upper()}[/bold cyan] ({result['total']} total)",
+        table,
+    )
 
 
 @app.command()
-def tailscale():
+def top(
+    count: int = typer.Option(10, "--count", "-n", help="Number of processes to show"),
+    sort: str = typer.Option("cpu", "--sort", "-s", help="Sort by cpu, rss or io"),
+    watch: Optional[float] = WatchOption,
+):
+    """Display the top processes by CPU, memory or IO."""
+    if sort not in TOP_SORT_KEYS:
+        console.print(f"[red]Unknown sort key: {sort} (use cpu, rss or io)[/red]")
+        raise typer.Exit(1)
+
+    # Prime the tracker so rates cover a short window instead of process lifetimes
+    _top_data(count, sort)
+    time.sleep(1.0)
+    _watch(lambda: _top_view(count, sort), watch)
+
+
+def _peers_table(peers: List[Dict[str, Any]]) -> Table:
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Host", style="cyan")
+    table.add_column("IP")
+    table.add_column("OS")
+    table.add_column("Online")
+    table.add_column("Connection")
+    table.add_column("Last Seen")
+    table.add_column("RX", justify="right")
+    table.add_column("TX", justify="right")
+
+    for peer in peers:
+        connection = peer["connection"]
+        if connection == "direct":
+            connection = f"direct {peer['address']}"
+        elif connection == "relay":
+            connection = f"relay {peer['relay']}"
+        ips = [ip for ip in peer["tailscale_ips"] if "." in ip] or peer["tailscale_ips"]
+        table.add_row(
+            peer["hostname"],
+            ips[0] if ips else "",
+            peer["os"],
+            "[green]yes[/green]" if peer["online"] else "[dim]no[/dim]",
+            connection,
+            peer["last_seen"] or "",
+            bytes_to_human_readable(peer["rx_bytes"]),
+            bytes_to_human_readable(peer["tx_bytes"]),
+        )
+    return table
+
+
+@app.command()
+def tailscale(
+    peers: bool = typer.Option(False, "--peers", "-p", help="List peers and how they are reached"),
+    online: bool = typer.Option(False, "--online", help="With --peers, only list online peers"),
+):
     """Display Tailscale VPN status."""
     console.print("\n[bold cyan]Tailscale Status[/bold cyan]")
 
-    ts_status = network_tools.get_tailscale_status()
-    ts_ip = network_tools.get_tailscale_ip()
+    ts_status = _collect("/network/tailscale", lambda: _network().get_tailscale_status())
 
     if ts_status is None:
         console.print("[yellow]Tailscale is not installed or not running[/yellow]")
@@ -166,8 +383,8 @@ def tailscale():
 
     table.add_row("Status", "Connected" if ts_status.get("connected") else "Disconnected")
     table.add_row("Backend State", str(ts_status.get("backend_state", "Unknown")))
-    table.add_row("Peers", str(ts_status.get("peers", 0)))
-    table.add_row("Tailscale IP", ts_ip or "N/A")
+    table.add_row("Peers", f"{ts_status.get('peers_online', 0)} online / {ts_status.get('peers', 0)}")
+    table.add_row("Tailscale IP", ts_status.get("tailscale_ip") or "N/A")
 
     console.print(table)
 
@@ -176,13 +393,21 @@ def tailscale():
         for issue in ts_status["health"]:
             console.print(f"  - {issue}")
 
+    if peers:
+        peer_list = _collect(
+            "/network/tailscale/peers",
+            lambda: _network().get_tailscale_peers(online_only=online),
+            online=online,
+        )
+        console.print(_peers_table(peer_list or []))
+
 
 @app.command()
 def tmux():
     """Display running tmux sessions."""
     console.print("\n[bold cyan]Tmux Sessions[/bold cyan]")
 
-    sessions = system.get_tmux_sessions()
+    sessions = _collect("/system/tmux", lambda: _system().get_tmux_sessions())
 
     if not sessions:
         console.print("[yellow]No tmux sessions found[/yellow]")
@@ -203,40 +428,80 @@ def tmux():
     console.print(table)
 
 
-@app.command()
-def status(json_output: bool = typer.Option(False, "--json", "-j", help="Output as JSON")):
-    """Display comprehensive system status."""
-    status_data = {
-        "system": system.get_system_info(),
-        "cpu": system.get_cpu_info(),
-        "memory": system.get_memory_info(),
-        "battery": system.get_battery_info(),
+def _status_static(full: bool) -> dict:
+    """Status fields that don't change while the CLI runs."""
+    return {
+        # Only shown in JSON output
+        "system": _system().get_system_info() if full else None,
         "network": {
-            "tailscale_ip": network_tools.get_tailscale_ip(),
-            "hostname": network_tools.get_hostname(),
+            "tailscale_ip": _network().get_tailscale_ip(),
+            "hostname": _network().get_hostname(),
         },
-        "tmux_sessions": system.get_tmux_sessions(),
-        "processes": system.get_process_count(),
     }
 
-    if json_output:
-        print(json.dumps(status_data, indent=2))
-    else:
-        console.print("\n[bold cyan]Comprehensive System Status[/bold cyan]\n")
 
-        console.print("[bold yellow]Hostname:[/bold yellow]", status_data["network"]["hostname"])
-        console.print("[bold yellow]CPU Usage:[/bold yellow]", f"{status_data['cpu']['cpu_usage_percent']}%")
-        console.print("[bold yellow]Memory Usage:[/bold yellow]", f"{status_data['memory']['percentage']}%")
-        console.print("[bold yellow]Tmux Sessions:[/bold yellow]", len(status_data["tmux_sessions"]))
-        console.print("[bold yellow]Total Processes:[/bold yellow]", status_data["processes"]["total"])
+def _status_data(static: Optional[dict]) -> dict:
+    def local():
+        system = _system()
+        return {
+            "system": static["system"],
+            "cpu": system.get_cpu_info(interval=0.5),
+            "memory": system.get_memory_info(),
+            "battery": system.get_battery_info(),
+            "network": static["network"],
+            "tmux_sessions": system.get_tmux_sessions(),
+            "processes": system.get_process_count(),
+        }
+
+    return _collect("/status", local)
 
-        if status_data["battery"]:
-            console.print("[bold yellow]Battery:[/bold yellow]", f"{status_data['battery']['percentage']}%")
 
-        if status_data["network"]["tailscale_ip"]:
-            console.print("[bold yellow]Tailscale IP:[/bold yellow]", status_data["network"]["tailscale_ip"])
+def _status_view(status_data: dict) -> RenderableType:
+    parts = [
+        "\n[bold cyan]Comprehensive System Status[/bold cyan]\n",
+        f"[bold yellow]Hostname:[/bold yellow] {status_data['network']['hostname']}",
+        f"[bold yellow]CPU Usage:[/bold yellow] {status_data['cpu']['cpu_usage_percent']}%",
+        f"[bold yellow]Memory Usage:[/bold yellow] {status_data['memory']['percentage']}%",
+        f"[bold yellow]Tmux Sessions:[/bold yellow] {len(status_data['tmux_sessions'])}",
+        f"[bold yellow]Total Processes:[/bold yellow] {status_data['processes']['total']}",
+    ]
+
+    if status_data["battery"]:
+        parts.append(f"[bold yellow]Battery:[/bold yellow] {status_data['battery']['percentage']}%")
+
+    if status_data["network"]["tailscale_ip"]:
+        parts.append(f"[bold yellow]Tailscale IP:[/bold yellow] {status_data['network']['tailscale_ip']}")
+
+    parts.append("\n[dim]Use --json flag for full JSON output[/dim]")
+    return Group(*parts)
+
+
+@app.command()
+def status(
+    json_output: bool = typer.Option(False, "--json", "-j", help="Output as JSON"),
+    watch: Optional[float] = WatchOption,
+):
+    """Display comprehensive system status.
+
+    With --json and --watch, one JSON object is printed per line each tick.
+    """
+    # Looked up once, not on every tick (the server has its own snapshot)
+    static = _status_static(json_output) if _remote is None else None
+
+    if not json_output:
+        _watch(lambda: _status_view(_status_data(static)), watch)
+        return
+
+    if watch is None:
+        print(json.dumps(_status_data(static), indent=2))
+        return
 
-        console.print("\n[dim]Use --json flag for full JSON output[/dim]")
+    try:
+        while True:
+            print(json.dumps(_status_data(static)), flush=True)
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        pass
 
 
 @app.command()
@@ -0,0 +1,86 @@
+"""Thin client for a running DroidVM Tools server.
+
+Used by ``droidvm-tools --remote`` to read the server's warm collector
+snapshot instead of sampling everything again in a fresh process.
+Requests go over the server's Unix socket when it exists and fall back
+to loopback TCP otherwise.
+"""
+
+import os
+import tempfile
+from typing import Any, Optional
+
+# Where the server listens on a Unix socket unless DROIDVM_UDS says otherwise
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "droidvm-tools.sock")
+
+
+def default_socket_path() -> str:
+    return os.getenv("DROIDVM_UDS") or DEFAULT_SOCKET_PATH
+
+
+class RemoteError(Exception):
+    """The server could not be reached or reported an error."""
+
+
+class Client:
+    """Reads API data from a local DroidVM Tools server."""
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 5.0,
+        http: Optional[Any] = None,
+    ):
+        """
+        Args:
+            socket_path: Unix socket to use if it exists (default: DROIDVM_UDS
+                or ``DEFAULT_SOCKET_PATH``)
+            base_url: TCP URL used when there is no socket (default:
+                loopback on DROIDVM_PORT)
+            timeout: Request timeout in seconds
+            http: Ready-made ``httpx.Client``, replacing the above
+        """
+        # Imported here so commands that don't use --remote never load httpx
+        import httpx
+
+        self._httpx = httpx
+        if http is not None:
+            self.url = str(http.base_url)
+            self._http = http
+            return
+
+        socket_path = socket_path or default_socket_path()
+        if base_url is None and os.path.exists(socket_path):
+            self.url = f"unix:{socket_path}"
+            transport = httpx.HTTPTransport(uds=socket_path)
+            base_url = "http://droidvm"
+        else:
+            base_url = base_url or f"http://127.0.0.1:{os.getenv('DROIDVM_PORT', '8000')}"
+            self.url = base_url
+            transport = None
+
+        self._http = httpx.Client(base_url=base_url, transport=transport, timeout=timeout)
+
+    def get(self, path: str, **params: Any) -> Any:
+        """GET an endpoint and return its ``data``.
+
+        Raises:
+            RemoteError: The request failed or the server reported an error.
+        """
+        params = {key: value for key, value in params.items() if value is not None}
+        try:
+            response = self._http.get(path, params=params)
+            body = response.json()
+        except self._httpx.HTTPError as e:
+            raise RemoteError(f"Cannot reach server at {self.url}: {e}") from e
+        except ValueError as e:
+            raise RemoteError(f"Invalid response from {path}: {e}") from e
+
+        if not isinstance(body, dict) or not body.get("success"):
+            error = body.get("error") if isinstance(body, dict) else None
+            raise RemoteError(error or f"{path} failed with HTTP {response.status_code}")
+        return body["data"]
+
+    def close(self) -> None:
+        self._http.close()
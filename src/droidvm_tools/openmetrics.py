@@ -0,0 +1,331 @@
+"""OpenMetrics (Prometheus) exposition for the collector snapshot.
+
+Rendering is built for frequent scrapes on a slow phone:
+
+- Metric headers and per-series label prefixes are formatted once.
+- The snapshot section is rendered only when one of the exported families
+  has a new sample, and the encoded bytes are reused until then.
+- API latency histograms keep fixed-size bucket arrays per route.
+"""
+
+import math
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from droidvm_tools.tools.cache import ttl_cache
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Collector families the exporter reads
+EXPORTED_FAMILIES = [
+    "system",
+    "cpu",
+    "memory",
+    "disk",
+    "battery",
+    "processes",
+    "tmux",
+    "network_stats",
+    "network_rates",
+    "wifi",
+    "tailscale",
+]
+
+# Request latency histogram bucket bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Extractor = Callable[[Any], Iterable[Tuple[str, Any]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    # OpenMetrics spells these NaN/+Inf/-Inf; Python's "nan"/"inf" fail parsing
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, str)
+
+
+def _field(*path: str) -> Extractor:
+    """Extractor for a single unlabelled numeric field."""
+    def extract(data):
+        for key in path:
+            if not isinstance(data, dict):
+                return
+            data = data.get(key)
+        if _is_number(data):
+            yield "", data
+    return extract
+
+
+def _labelled(label: str, items: Callable[[Any], Iterable[Tuple[Any, Any]]]) -> Extractor:
+    """Extractor for (label value, number) pairs."""
+    def extract(data):
+        for label_value, value in items(data):
+            if _is_number(value):
+                yield f'{label}="{_escape(label_value)}"', value
+    return extract
+
+
+class _Metric:
+    """One exported metric: its header and how to pull values from a family."""
+
+    __slots__ = ("family", "sample_name", "header", "extract")
+
+    def __init__(self, name: str, kind: str, help_text: str, family: str, extract: Extractor):
+        self.family = family
+        self.sample_name = f"{name}_total" if kind == "counter" else name
+        self.header = f"# HELP {name} {help_text}\n# TYPE {name} {kind}\n"
+        self.extract = extract
+
+
+def _rates(key: str) -> Callable[[Any], Iterable[Tuple[Any, Any]]]:
+    return lambda data: ((nic, rates.get(key)) for nic, rates in data.get("interfaces", {}).items())
+
+
+def _partitions(key: str) -> Extractor:
+    return _labelled("mountpoint", lambda data: (
+        (p.get("mountpoint"), p.get(key)) for p in data.get("partitions", [])))
+
+
+METRICS: List[_Metric] = [
+    _Metric("droidvm_uptime_seconds", "gauge", "Seconds since boot.",
+            "system", _field("uptime_seconds")),
+    _Metric("droidvm_boot_time_seconds", "gauge", "Unix time the device booted.",
+            "system", _field("boot_timestamp")),
+    _Metric("droidvm_cpu_usage_percent", "gauge", "Overall CPU usage over the last sample window.",
+            "cpu", _field("cpu_usage_percent")),
+    _Metric("droidvm_cpu_core_usage_percent", "gauge", "Per-core CPU usage over the last sample window.",
+            "cpu", _labelled("core", lambda data: enumerate(data.get("cpu_usage_per_core", [])))),
+    _Metric("droidvm_cpu_cores", "gauge", "Number of CPU cores.",
+            "cpu", _labelled("kind", lambda data: [("logical", data.get("total_cores")),
+                                                   ("physical", data.get("physical_cores"))])),
+    _Metric("droidvm_memory_usage_percent", "gauge", "Share of RAM in use, in percent.",
+            "memory", _field("percentage")),
+    _Metric("droidvm_swap_usage_percent", "gauge", "Share of swap in use, in percent.",
+            "memory", _field("swap_percentage")),
+    _Metric("droidvm_memory_total_bytes", "gauge", "Total RAM.",
+            "memory", _field("total")),
+    _Metric("droidvm_memory_available_bytes", "gauge", "RAM available without swapping.",
+            "memory", _field("available")),
+    _Metric("droidvm_memory_used_bytes", "gauge", "Bytes of RAM in use (total minus available).",
+            "memory", _field("used")),
+    _Metric("droidvm_swap_total_bytes", "gauge", "Total swap.",
+            "memory", _field("swap_total")),
+    _Metric("droidvm_swap_used_bytes", "gauge", "Bytes of swap in use.",
+            "memory", _field("swap_used")),
+    _Metric("droidvm_disk_usage_percent", "gauge", "Share of disk space used per mount point, in percent.",
+            "disk", _partitions("percentage")),
+    _Metric("droidvm_disk_total_bytes", "gauge", "Disk size per mount point.",
+            "disk", _partitions("total")),
+    _Metric("droidvm_disk_used_bytes", "gauge", "Bytes of disk space used per mount point.",
+            "disk", _partitions("used")),
+    _Metric("droidvm_disk_free_bytes", "gauge", "Disk space free per mount point.",
+            "disk", _partitions("free")),
+    _Metric("droidvm_network_transmit_bytes", "counter", "Bytes sent on all interfaces.",
+            "network_stats", _field("bytes_sent")),
+    _Metric("droidvm_network_receive_bytes", "counter", "Bytes received on all interfaces.",
+            "network_stats", _field("bytes_recv")),
+    _Metric("droidvm_battery_percent", "gauge", "Battery charge level.",
+            "battery", _field("percentage")),
+    _Metric("droidvm_battery_power_plugged", "gauge", "Whether the charger is connected.",
+            "battery", _field("power_plugged")),
+    _Metric("droidvm_battery_temperature_celsius", "gauge", "Battery temperature.",
+            "battery", _field("temperature")),
+    _Metric("droidvm_battery_current", "gauge", "Battery current as reported by Termux:API.",
+            "battery", _field("current")),
+    _Metric("droidvm_processes", "gauge", "Processes by status.",
+            "processes", _labelled("status", lambda data: data.get("by_status", {}).items())),
+    _Metric("droidvm_process_count", "gauge", "Total number of processes.",
+            "processes", _field("total")),
+    _Metric("droidvm_tmux_sessions", "gauge", "Running tmux sessions.",
+            "tmux", lambda data: [("", len(data))]),
+    _Metric("droidvm_network_packets_sent", "counter", "Packets sent on all interfaces.",
+            "network_stats", _field("packets_sent")),
+    _Metric("droidvm_network_packets_received", "counter", "Packets received on all interfaces.",
+            "network_stats", _field("packets_recv")),
+    _Metric("droidvm_network_errors_in", "counter", "Receive errors on all interfaces.",
+            "network_stats", _field("errors_in")),
+    _Metric("droidvm_network_errors_out", "counter", "Transmit errors on all interfaces.",
+            "network_stats", _field("errors_out")),
+    _Metric("droidvm_network_drop_in", "counter", "Dropped incoming packets on all interfaces.",
+            "network_stats", _field("drop_in")),
+    _Metric("droidvm_network_drop_out", "counter", "Dropped outgoing packets on all interfaces.",
+            "network_stats", _field("drop_out")),
+    _Metric("droidvm_network_transmit_bytes_per_second", "gauge", "Smoothed transmit throughput.",
+            "network_rates", _labelled("interface", _rates("bytes_sent_per_sec"))),
+    _Metric("droidvm_network_receive_bytes_per_second", "gauge", "Smoothed receive throughput.",
+            "network_rates", _labelled("interface", _rates("bytes_recv_per_sec"))),
+    _Metric("droidvm_network_transmit_packets_per_second", "gauge", "Smoothed transmit packet rate.",
+            "network_rates", _labelled("interface", _rates("packets_sent_per_sec"))),
+    _Metric("droidvm_network_receive_packets_per_second", "gauge", "Smoothed receive packet rate.",
+            "network_rates", _labelled("interface", _rates("packets_recv_per_sec"))),
+    _Metric("droidvm_wifi_rssi_dbm", "gauge", "WiFi signal strength.",
+            "wifi", _field("rssi")),
+    _Metric("droidvm_wifi_link_speed_mbps", "gauge", "WiFi link speed.",
+            "wifi", _field("link_speed_mbps")),
+    _Metric("droidvm_wifi_frequency_mhz", "gauge", "WiFi frequency.",
+            "wifi", _field("frequency_mhz")),
+    _Metric("droidvm_tailscale_up", "gauge", "Whether the Tailscale backend is running.",
+            "tailscale", lambda data: [("", data.get("backend_state") == "Running")]),
+    _Metric("droidvm_tailscale_peers", "gauge", "Number of Tailscale peers.",
+            "tailscale", _field("peers")),
+]
+
+
+class LatencyHistogram:
+    """Request latency histograms per (method, route) with fixed buckets."""
+
+    NAME = "droidvm_http_request_duration_seconds"
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, str], List[Any]] = {}
+        self._header = (
+            f"# HELP {self.NAME} API request latency.\n"
+            f"# TYPE {self.NAME} histogram\n"
+        )
+
+    def observe(self, method: str, route: str, seconds: float) -> None:
+        """Record one request."""
+        series = self._series.get((method, route))
+        if series is None:
+            series = self._series[(method, route)] = self._new_series(method, route)
+        counts = series[0]
+        counts[bisect_left(self.buckets, seconds)] += 1
+        series[1] += seconds
+
+    def _new_series(self, method: str, route: str) -> List[Any]:
+        labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        # Label prefixes are formatted once per series
+        bucket_prefixes = [f'{self.NAME}_bucket{{{labels},le="{le}"}} ' for le in bounds]
+        return [
+            array("Q", [0] * (len(self.buckets) + 1)),
+            0.0,
+            bucket_prefixes,
+            f"{self.NAME}_count{{{labels}}} ",
+            f"{self.NAME}_sum{{{labels}}} ",
+        ]
+
+    def render(self, out: List[str]) -> None:
+        """Append the histogram lines to ``out``."""
+        if not self._series:
+            return
+        out.append(self._header)
+        for counts, total, bucket_prefixes, count_prefix, sum_prefix in self._series.values():
+            cumulative = 0
+            for prefix, count in zip(bucket_prefixes, counts):
+                cumulative += count
+                out.append(f"{prefix}{cumulative}\n")
+            out.append(f"{count_prefix}{cumulative}\n")
+            out.append(f"{sum_prefix}{total!r}\n")
+
+
+class LatencyMiddleware:
+    """ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app, histogram: LatencyHistogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router stores the matched route in the scope; using its
+            # template keeps label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(scope["method"], path, time.perf_counter() - start)
+
+
+class OpenMetricsRenderer:
+    """Renders the collector snapshot plus API latency as OpenMetrics text."""
+
+    def __init__(self, collector, histogram: LatencyHistogram):
+        self.collector = collector
+        self.histogram = histogram
+        self._sampled_at: Optional[Tuple[Optional[float], ...]] = None
+        self._snapshot_section = b""
+
+    def render(self) -> bytes:
+        """Return the full exposition, ending with ``# EOF``."""
+        snapshot = self.collector.snapshot()
+        # Keyed on the exported families only: other families (e.g. the 1 s
+        # history) refresh far more often than anyone scrapes
+        sampled_at = tuple(
+            snapshot[family].sampled_at if family in snapshot else None
+            for family in EXPORTED_FAMILIES
+        )
+        if sampled_at != self._sampled_at:
+            self._sampled_at = sampled_at
+            self._snapshot_section = self._render_snapshot(snapshot)
+
+        out: List[str] = []
+        self._render_cache(out)
+        self.histogram.render(out)
+        out.append("# EOF\n")
+        return self._snapshot_section + "".join(out).encode()
+
+    def _render_snapshot(self, snapshot: Dict[str, Any]) -> bytes:
+        out: List[str] = []
+
+        for metric in METRICS:
+            sample = snapshot.get(metric.family)
+            if sample is None or sample.data is None:
+                continue
+            lines = {}
+            for labels, value in metric.extract(sample.data):
+                # First value wins if a label set repeats (e.g. bind mounts)
+                if labels not in lines:
+                    lines[labels] = (
+                        f"{metric.sample_name}{{{labels}}} {_format_value(value)}\n" if labels
+                        else f"{metric.sample_name} {_format_value(value)}\n"
+                    )
+            if lines:
+                out.append(metric.header)
+                out.extend(lines.values())
+
+        out.append(
+            "# HELP droidvm_collector_last_sample_timestamp_seconds When each metric family was last sampled.\n"
+            "# TYPE droidvm_collector_last_sample_timestamp_seconds gauge\n"
+        )
+        for family in EXPORTED_FAMILIES:
+            sample = snapshot.get(family)
+            if sample is None:
+                continue
+            out.append(
+                f'droidvm_collector_last_sample_timestamp_seconds{{family="{family}"}} '
+                f"{sample.sampled_at!r}\n"
+            )
+        return "".join(out).encode()
+
+    def _render_cache(self, out: List[str]) -> None:
+        totals = ttl_cache.stats()["totals"]
+        out.append(
+            "# HELP droidvm_cache_lookups Lookups in the cache of slow-changing facts.\n"
+            "# TYPE droidvm_cache_lookups counter\n"
+        )
+        for result in ("hits", "stale_hits", "negative_hits", "misses"):
+            out.append(f'droidvm_cache_lookups_total{{result="{result}"}} {totals[result]}\n')
@@ -0,0 +1,110 @@
+"""Parsing and field projection for the ``/query`` batch endpoint.
+
+``include`` names the sections to return, either by the short names below
+(``net.rates``) or by collector family name (``network_rates``). ``fields``
+is a list of dotted paths such as ``cpu.cpu_usage_percent`` or
+``net.rates.interfaces.wlan0``; each path starts with one of the included
+names and continues into that section. Paths crossing a list apply to every
+element, and sections no path mentions are returned whole.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Short names accepted by ``include`` -> collector family
+QUERY_SECTIONS: Dict[str, str] = {
+    "system": "system",
+    "cpu": "cpu",
+    "memory": "memory",
+    "disk": "disk",
+    "battery": "battery",
+    "processes": "processes",
+    "tmux": "tmux",
+    "wifi": "wifi",
+    "device": "device",
+    "net": "network_stats",
+    "net.stats": "network_stats",
+    "net.rates": "network_rates",
+    "net.info": "network_info",
+    "net.latency": "latency",
+    "tailscale": "tailscale",
+    "tailscale.ip": "tailscale_ip",
+    "ip.public": "public_ip",
+    "hostname": "hostname",
+}
+
+# Upper bound on requested field paths
+MAX_FIELDS = 100
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_include(include: str, families: Iterable[str]) -> Dict[str, str]:
+    """Map each requested section name to its collector family.
+
+    Raises:
+        ValueError: Nothing requested, or an unknown name.
+    """
+    families = set(families)
+    sections = {}
+    for name in _split(include):
+        family = QUERY_SECTIONS.get(name, name)
+        if family not in families or family == "history":
+            valid = ", ".join(sorted(QUERY_SECTIONS))
+            raise ValueError(f"Unknown section '{name}' (valid: {valid})")
+        sections[name] = family
+    if not sections:
+        raise ValueError("'include' must name at least one section")
+    return sections
+
+
+def parse_fields(fields: str, sections: Iterable[str]) -> Dict[str, List[List[str]]]:
+    """Group dotted field paths by section.
+
+    The longest matching section name wins, so ``net.rates.wlan0`` belongs
+    to ``net.rates`` even when ``net`` is included too. A bare section name
+    selects the whole section (an empty path).
+
+    Raises:
+        ValueError: Too many paths, or one outside the included sections.
+    """
+    paths = _split(fields)
+    if len(paths) > MAX_FIELDS:
+        raise ValueError(f"At most {MAX_FIELDS} fields may be requested")
+
+    # Longest names first so the most specific section matches
+    names = sorted(sections, key=len, reverse=True)
+    grouped: Dict[str, List[List[str]]] = {}
+    for path in paths:
+        section, rest = _match(path, names)
+        grouped.setdefault(section, []).append(rest.split(".") if rest else [])
+    return grouped
+
+
+def _match(path: str, names: List[str]) -> Tuple[str, str]:
+    for name in names:
+        if path == name:
+            return name, ""
+        if path.startswith(name + "."):
+            return name, path[len(name) + 1:]
+    raise ValueError(f"Field '{path}' is not in an included section")
+
+
+def project(data: Any, paths: List[List[str]]) -> Any:
+    """Keep only ``paths`` of ``data``; missing fields come back as None."""
+    if any(not path for path in paths):
+        return data
+    if isinstance(data, list):
+        return [project(item, paths) for item in data]
+    if not isinstance(data, dict):
+        return None
+
+    result: Dict[str, Any] = {}
+    children: Dict[str, List[List[str]]] = {}
+    for head, *rest in paths:
+        children.setdefault(head, []).append(rest)
+    for key, subpaths in children.items():
+        value = data.get(key)
+        result[key] = None if value is None else project(value, subpaths)
+    return result
@@ -0,0 +1,251 @@
+"""JSON encoding, compression and conditional responses for the API.
+
+- ``FastJSONResponse`` encodes with orjson when it is installed and falls
+  back to the stdlib ``json`` module otherwise.
+- ``CompressionMiddleware`` gzip- or brotli-compresses responses above a
+  minimum size, based on the client's ``Accept-Encoding``.
+- The encoded body of each cacheable endpoint is kept together with an
+  ETag and reused until the underlying collector sample changes, so repeat
+  requests skip both sampling and JSON encoding. The ETag can be derived
+  from just the data, so a resample that returns the same data keeps it.
+  Clients sending a matching ``If-None-Match`` get an empty ``304``.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media types that are streamed and must not be buffered for compression
+_STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+@dataclass
+class ResponseSettings:
+    """Toggles for the JSON backend and response compression."""
+
+    fast_json: bool = True
+    compression: bool = True
+    compression_min_size: int = 1024
+
+    @classmethod
+    def from_env(cls) -> "ResponseSettings":
+        return cls(
+            fast_json=_env_flag("DROIDVM_FAST_JSON", "true"),
+            compression=_env_flag("DROIDVM_COMPRESSION", "true"),
+            compression_min_size=int(os.getenv("DROIDVM_COMPRESSION_MIN_SIZE", "1024")),
+        )
+
+
+# Read at import so reload workers pick the env vars up too; start()
+# re-applies them through configure()
+settings = ResponseSettings.from_env()
+
+
+def configure(new_settings: ResponseSettings) -> None:
+    """Replace the active response settings."""
+    global settings
+    settings = new_settings
+
+
+def json_backend() -> str:
+    """Name of the JSON encoder in use."""
+    return "orjson" if orjson is not None and settings.fast_json else "json"
+
+
+def json_dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON."""
+    if orjson is not None and settings.fast_json:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=str, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with ``json_dumps`` (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def supported_encodings() -> List[str]:
+    """Content codings the server can produce, preferred first."""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported coding from an ``Accept-Encoding`` header."""
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # Low quality keeps CPU cost down on the phone
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """Compress complete responses above a minimum size.
+
+    Streamed responses (SSE, NDJSON, anything sent in several chunks) are
+    passed through untouched so events aren't held back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(_STREAMING_TYPES)
+                or len(body) < settings.compression_min_size
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The compressed bytes differ, so the validator can't stay strong
+                    headers["ETag"] = f"W/{etag}"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for an encoded body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ResponseCache:
+    """Encoded response bodies and ETags, one entry per key."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Hashable, bytes, str]] = {}
+
+    def get(
+        self,
+        key: str,
+        version: Hashable,
+        build: Callable[[], Any],
+        etag_of: Optional[Callable[[], Any]] = None,
+    ) -> Tuple[bytes, str]:
+        """Return (body, etag), encoding ``build()`` only when ``version`` changed.
+
+        With ``etag_of``, the ETag is a weak one over ``etag_of()`` instead
+        of the body, so body-only changes (e.g. timestamps) keep it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+
+        body = json_dumps(build())
+        etag = make_etag(body) if etag_of is None else "W/" + make_etag(json_dumps(etag_of()))
+        self._entries[key] = (version, body, etag)
+        return body, etag
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def conditional_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    max_age: int,
+    age: Optional[float] = None,
+    last_modified: Optional[float] = None,
+) -> Response:
+    """JSON response with caching headers, or 304 if the client is current."""
+    headers = {"ETag": etag, "Cache-Control": f"max-age={max_age}"}
+    if age is not None:
+        # Lets caches count the time the sample spent in the collector
+        headers["Age"] = str(int(age))
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,25 +1,117 @@
 """FastAPI server for DroidVM management and monitoring."""
 
+import asyncio
+import ipaddress
+import json
+import logging
 import os
+import socket
+import stat
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from droidvm_tools.tools import system, network, terminal
+from droidvm_tools.openmetrics import (
+    CONTENT_TYPE as OPENMETRICS_CONTENT_TYPE,
+    EXPORTED_FAMILIES,
+    LatencyHistogram,
+    LatencyMiddleware,
+    OpenMetricsRenderer,
+)
+from droidvm_tools import responses
+from droidvm_tools.client import default_socket_path
+from droidvm_tools.query import parse_fields, parse_include, project
+from droidvm_tools.responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    ResponseCache,
+    ResponseSettings,
+    conditional_response,
+)
+from droidvm_tools.tools import network, system, terminal
+from droidvm_tools.tools.backends import get_backend
+from droidvm_tools.tools.capabilities import capabilities
+from droidvm_tools.tools.cache import ttl_cache
+from droidvm_tools.tools.jobs import JobRejected, job_executor
+from droidvm_tools.tools.latency import (
+    WINDOWS as LATENCY_WINDOWS,
+    LatencyProber,
+    LatencyTarget,
+    parse_targets,
+)
+from droidvm_tools.tools.sessions import SessionLimitReached, session_manager
+from droidvm_tools.tools.timeseries import HistoryRecorder, MetricHistory
+from droidvm_tools.tools.collector import (
+    MetricFamily,
+    MetricsCollector,
+    Sample,
+    SnapshotPublisher,
+    default_families,
+)
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Shared snapshot of all metric families, refreshed in the background
+collector = MetricsCollector(default_families())
+
+# 1 s / 1 min / 1 h metric history, sampled every second by the collector
+history = MetricHistory()
+collector.add(MetricFamily("history", HistoryRecorder(history, collector).record, interval=1))
+
+# Latency probes, each RTT also kept in the history. Targets are read from
+# DROIDVM_LATENCY_TARGETS at startup.
+latency_prober = LatencyProber(
+    [],
+    timeout=float(os.getenv("DROIDVM_LATENCY_TIMEOUT", "3")),
+    history=history,
+)
+collector.add(MetricFamily(
+    "latency",
+    latency_prober.probe_all,
+    interval=float(os.getenv("DROIDVM_LATENCY_INTERVAL", "15")),
+))
+
+
+def _latency_targets(specs: str) -> List[LatencyTarget]:
+    """Targets from DROIDVM_LATENCY_TARGETS; malformed entries are logged and skipped."""
+    return parse_targets(
+        specs, on_error=lambda e: logger.warning("Skipping latency target: %s", e)
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background metrics collector for the lifetime of the app."""
+    # A bad target only disables that probe, not the API
+    latency_prober.set_targets(_latency_targets(os.getenv("DROIDVM_LATENCY_TARGETS", "")))
+    # Probe which /proc and /sys sources and which commands are available
+    # before the first sample
+    await asyncio.to_thread(get_backend)
+    await asyncio.to_thread(capabilities.probe)
+    if os.getenv("DROIDVM_COLLECTOR", "true").lower() == "true":
+        await collector.start()
+    yield
+    await collector.stop()
+    await session_manager.close_all()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="DroidVM Tools API",
     description="API for managing and monitoring Android phone as a tiny home server",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware to handle cross-origin requests
@@ -31,6 +123,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Per-route request latency, exported on /metrics
+latency_histogram = LatencyHistogram()
+app.add_middleware(LatencyMiddleware, histogram=latency_histogram)
+metrics_renderer = OpenMetricsRenderer(collector, latency_histogram)
+
+# gzip/brotli for large responses (DROIDVM_COMPRESSION, DROIDVM_COMPRESSION_MIN_SIZE)
+app.add_middleware(CompressionMiddleware)
+
 
 # Pydantic models for request validation
 class TerminalRequest(BaseModel):
@@ -39,6 +139,87 @@ class TerminalRequest(BaseModel):
     timeout: Optional[int] = 30  # Only used in termux mode
 
 
+# Metric families that make up the /status response
+STATUS_FAMILIES = [
+    "system",
+    "cpu",
+    "memory",
+    "battery",
+    "tmux",
+    "processes",
+    "network_stats",
+    "tailscale_ip",
+    "public_ip",
+    "hostname",
+    "wifi",
+    "device",
+]
+
+
+# Families whose byte counts are formatted unless ?format=raw is given
+FORMATTERS = {
+    "memory": system.format_memory_info,
+    "disk": system.format_disk_info,
+    "network_stats": network.format_network_stats,
+}
+
+# ?format= query parameter shared by endpoints serving byte counts
+OutputFormat = Query(
+    "human",
+    alias="format",
+    pattern="^(human|raw)$",
+    description="'raw' returns byte counts as integers instead of strings",
+)
+
+
+def _formatted(name: str, data: Any, output_format: str = "human") -> Any:
+    """Apply the human-readable formatter for ``name`` unless raw is requested."""
+    formatter = FORMATTERS.get(name)
+    if formatter is None or output_format == "raw" or data is None:
+        return data
+    return formatter(data)
+
+
+# Encoded bodies and ETags of the cacheable (slow-changing) endpoints
+response_cache = ResponseCache()
+
+
+def _cached_sample_response(
+    request: Request,
+    name: str,
+    sample: Sample,
+    max_age: int,
+    build: Optional[Callable[[], Dict[str, Any]]] = None,
+    etag_exclude: Tuple[str, ...] = (),
+) -> Response:
+    """Serve a sample with ETag/Cache-Control, re-encoding only new samples.
+
+    The ETag is a weak one over the data without the ``etag_exclude``
+    fields (e.g. ``uptime_seconds``), so a refresh that samples the same
+    data keeps it and ``If-None-Match`` still gets a 304. The sample time is
+    in the body as ``sampled_at`` and in ``Last-Modified``; its age is the
+    ``Age`` header.
+    """
+    if build is None:
+        build = lambda: {"success": True, "data": sample.data, **sample.meta(include_age=False)}
+
+    def etag_of() -> Dict[str, Any]:
+        data = sample.data
+        if etag_exclude and isinstance(data, dict):
+            data = {key: value for key, value in data.items() if key not in etag_exclude}
+        return {"data": data, "error": sample.error}
+
+    body, etag = response_cache.get(name, (sample.monotonic, sample.error), build, etag_of)
+    return conditional_response(
+        request, body, etag, max_age, age=sample.age, last_modified=sample.sampled_at
+    )
+
+
+# Client-selectable update interval bounds for /stream endpoints (seconds)
+STREAM_MIN_INTERVAL = 1.0
+STREAM_MAX_INTERVAL = 300.0
+
+
 @app.get("/")
 async def root() -> Dict[str, str]:
     """Root endpoint - API information."""
@@ -60,13 +241,19 @@ async def health_check() -> Dict[str, str]:
 
 
 @app.get("/system/info")
-async def system_info() -> Dict[str, Any]:
-    """Get comprehensive system information."""
+async def system_info(request: Request) -> Response:
+    """Get comprehensive system information.
+
+    Supports ``If-None-Match``; cacheable for a minute.
+    """
     try:
-        info = system.get_system_info()
-        return {"success": True, "data": info}
+        sample = await collector.read("system")
+        # Uptime changes every sample; leaving it out keeps the ETag stable
+        return _cached_sample_response(
+            request, "system", sample, max_age=60, etag_exclude=("uptime_seconds",)
+        )
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -76,36 +263,38 @@ async def system_info() -> Dict[str, Any]:
 async def cpu_info() -> Dict[str, Any]:
     """Get CPU information and usage."""
     try:
-        info = system.get_cpu_info()
-        return {"success": True, "data": info}
+        sample = await collector.read("cpu")
+        return {"success": True, "data": sample.data, **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/system/memory")
-async def memory_info() -> Dict[str, Any]:
+async def memory_info(output_format: str = OutputFormat) -> Dict[str, Any]:
     """Get memory usage information."""
     try:
-        info = system.get_memory_info()
-        return {"success": True, "data": info}
+        sample = await collector.read("memory")
+        data = _formatted("memory", sample.data, output_format)
+        return {"success": True, "data": data, **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/system/disk")
-async def disk_info() -> Dict[str, Any]:
+async def disk_info(output_format: str = OutputFormat) -> Dict[str, Any]:
     """Get disk usage information."""
     try:
-        info = system.get_disk_info()
-        return {"success": True, "data": info}
+        sample = await collector.read("disk")
+        data = _formatted("disk", sample.data, output_format)
+        return {"success": True, "data": data, **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -115,25 +304,83 @@ async def disk_info() -> Dict[str, Any]:
 async def battery_info() -> Dict[str, Any]:
     """Get battery information (if available)."""
     try:
-        info = system.get_battery_info()
-        if info is None:
+        sample = await collector.read("battery")
+        if sample.data is None:
             return {"success": True, "data": None, "message": "Battery info not available"}
-        return {"success": True, "data": info}
+        return {"success": True, "data": sample.data, **sample.meta()}
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/system/thermal")
+async def thermal_info() -> Dict[str, Any]:
+    """Get temperatures per thermal zone (°C) and the metrics backend in use."""
+    try:
+        data = await asyncio.to_thread(system.get_thermal_info)
+        return {"success": True, "data": {**data, **get_backend().info()}}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
+@app.get("/system/capabilities")
+async def capability_info() -> Dict[str, Any]:
+    """Get which external commands are installed and healthy.
+
+    ``state`` is ``available``, ``missing``, ``open`` (disabled after
+    repeated timeouts, see ``retry_after_seconds``) or ``half_open`` (one
+    trial call allowed). ``sources`` lists the /proc and /sys files read
+    directly instead of through psutil.
+    """
+    return {
+        "success": True,
+        "data": {"commands": capabilities.states(), **get_backend().info()},
+    }
+
+
+@app.post("/system/capabilities/probe")
+async def capability_probe() -> Dict[str, Any]:
+    """Look every known command up on PATH again (e.g. after installing one)."""
+    found = await asyncio.to_thread(capabilities.probe)
+    return {"success": True, "data": {"found": {binary: path is not None for binary, path in found.items()}}}
+
+
 @app.get("/system/processes")
 async def process_info() -> Dict[str, Any]:
     """Get process count information."""
     try:
-        info = system.get_process_count()
-        return {"success": True, "data": info}
+        sample = await collector.read("processes")
+        return {"success": True, "data": sample.data, **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/system/processes/top")
+async def top_processes(
+    count: int = Query(10, ge=1, le=100),
+    sort: str = Query("cpu", pattern="^(cpu|rss|io)$"),
+    output_format: str = OutputFormat,
+) -> Dict[str, Any]:
+    """Get the top processes by CPU, resident memory (rss) or IO.
+
+    CPU percent and IO bytes/s are measured since the previous call, so
+    polling this endpoint gives live per-process usage.
+    """
+    try:
+        top = await asyncio.to_thread(system.get_top_processes, count, sort)
+        if output_format != "raw":
+            top = system.format_top_processes(top)
+        return {"success": True, "data": top}
+    except Exception as e:
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -143,49 +390,101 @@ async def process_info() -> Dict[str, Any]:
 async def tmux_sessions() -> Dict[str, Any]:
     """Get list of running tmux sessions."""
     try:
-        sessions = system.get_tmux_sessions()
-        return {"success": True, "data": sessions, "count": len(sessions)}
+        sample = await collector.read("tmux")
+        return {"success": True, "data": sample.data, "count": len(sample.data), **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/network/info")
-async def network_info() -> Dict[str, Any]:
-    """Get network interface information."""
+async def network_info(request: Request) -> Response:
+    """Get network interface information.
+
+    Supports ``If-None-Match``; cacheable for a minute.
+    """
     try:
-        info = network.get_network_info()
-        return {"success": True, "data": info}
+        sample = await collector.read("network_info")
+        return _cached_sample_response(request, "network_info", sample, max_age=60)
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/network/stats")
-async def network_stats() -> Dict[str, Any]:
-    """Get network I/O statistics."""
+async def network_stats(
+    rates: bool = False, output_format: str = OutputFormat
+) -> Dict[str, Any]:
+    """Get network I/O statistics.
+
+    With ``?rates=1``, also include per-interface bytes/s and packets/s.
+    """
     try:
-        stats = network.get_network_stats()
-        return {"success": True, "data": stats}
+        sample = await collector.read("network_stats")
+        data = _formatted("network_stats", sample.data, output_format)
+        if not rates:
+            return {"success": True, "data": data, **sample.meta()}
+
+        rates_sample = await collector.read("network_rates")
+        return {
+            "success": True,
+            "data": {**data, "rates": rates_sample.data},
+            **sample.meta(),
+        }
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/network/connections")
-async def network_connections() -> Dict[str, Any]:
-    """Get active network connections."""
+async def network_connections(
+    status: Optional[str] = None,
+    port: Optional[int] = Query(None, ge=0, le=65535),
+    pid: Optional[int] = None,
+    family: Optional[str] = None,
+    proto: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    aggregate: bool = False,
+) -> Response:
+    """Get active network connections.
+
+    Filters: ``status`` (e.g. LISTEN), ``port`` (local or remote), ``pid``,
+    ``family`` (ipv4/ipv6) and ``proto`` (tcp/udp). With ``limit``, results
+    are paged; pass the returned ``next_cursor`` as ``cursor`` for the next
+    page. ``aggregate=1`` returns counts by status and remote host instead
+    of the connections themselves.
+    """
+    filters = {"status": status, "port": port, "pid": pid, "family": family, "proto": proto}
     try:
-        connections = network.get_connections()
-        return {"success": True, "data": connections, "count": len(connections)}
+        if aggregate:
+            data = await asyncio.to_thread(network.aggregate_connections, **filters)
+            return FastJSONResponse({"success": True, "data": data})
+
+        if limit is None and cursor is None:
+            connections = await asyncio.to_thread(network.get_connections, **filters)
+            # Encoded directly, skipping FastAPI's jsonable_encoder pass over a large list
+            return FastJSONResponse({"success": True, "data": connections, "count": len(connections)})
+
+        page = await asyncio.to_thread(
+            network.get_connections_page, cursor, limit or 100, **filters
+        )
+        return FastJSONResponse({
+            "success": True,
+            "data": page["connections"],
+            "count": len(page["connections"]),
+            "next_cursor": page["next_cursor"],
+        })
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"success": False, "error": str(e)})
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -195,20 +494,64 @@ async def network_connections() -> Dict[str, Any]:
 async def tailscale_status() -> Dict[str, Any]:
     """Get Tailscale VPN status."""
     try:
-        status = network.get_tailscale_status()
-        tailscale_ip = network.get_tailscale_ip()
+        sample = await collector.read("tailscale")
+
+        if sample.data is None:
+            return {
+                "success": True,
+                "data": None,
+                "message": "Tailscale not installed or not running"
+            }
+
+        return {"success": True, "data": sample.data, **sample.meta()}
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/network/tailscale/peers")
+async def tailscale_peers(online: bool = False) -> Dict[str, Any]:
+    """Get per-peer Tailscale details (connection type, last seen, traffic)."""
+    try:
+        peers = await network.get_tailscale_peers_async(online_only=online)
 
-        if status is None:
+        if peers is None:
             return {
                 "success": True,
                 "data": None,
                 "message": "Tailscale not installed or not running"
             }
 
-        status["tailscale_ip"] = tailscale_ip
-        return {"success": True, "data": status}
+        return {"success": True, "data": peers}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/network/latency")
+async def network_latency(target: Optional[str] = None) -> Dict[str, Any]:
+    """Get probe latency per target: last result and p50/p95/p99 per window."""
+    try:
+        sample = await collector.read("latency")
+        targets = sample.data["targets"]
+        if target is not None:
+            targets = [entry for entry in targets if entry["target"] == target]
+            if not targets:
+                return FastJSONResponse(
+                    status_code=404,
+                    content={"success": False, "error": f"Unknown latency target: {target}"},
+                )
+        return {
+            "success": True,
+            "data": {"targets": targets, "windows": list(LATENCY_WINDOWS)},
+            **sample.meta(),
+        }
+    except Exception as e:
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -218,16 +561,14 @@ async def tailscale_status() -> Dict[str, Any]:
 async def ip_info() -> Dict[str, Any]:
     """Get IP address information."""
     try:
+        samples = await collector.read_many(["hostname", "tailscale_ip", "public_ip"])
         return {
             "success": True,
-            "data": {
-                "hostname": network.get_hostname(),
-                "tailscale_ip": network.get_tailscale_ip(),
-                "public_ip": network.get_public_ip(),
-            }
+            "data": {name: sample.data for name, sample in samples.items()},
+            "sampled_at": {name: sample.meta() for name, sample in samples.items()},
         }
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
@@ -237,98 +578,297 @@ async def ip_info() -> Dict[str, Any]:
 async def wifi_info() -> Dict[str, Any]:
     """Get WiFi connection information via Termux:API."""
     try:
-        info = system.get_termux_wifi_info()
-        if info is None:
+        sample = await collector.read("wifi")
+        if sample.data is None:
             return {
                 "success": True,
                 "data": None,
                 "message": "WiFi info not available (Termux:API required)"
             }
-        return {"success": True, "data": info}
+        return {"success": True, "data": sample.data, **sample.meta()}
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
 @app.get("/device/info")
-async def device_info() -> Dict[str, Any]:
-    """Get Android device information via Termux:API."""
+async def device_info(request: Request) -> Response:
+    """Get Android device information via Termux:API.
+
+    Supports ``If-None-Match``; cacheable for an hour.
+    """
     try:
-        info = system.get_termux_device_info()
-        if info is None:
-            return {
+        sample = await collector.read("device")
+        if sample.data is None:
+            return _cached_sample_response(request, "device", sample, max_age=3600, build=lambda: {
                 "success": True,
                 "data": None,
                 "message": "Device info not available (Termux:API required)"
-            }
-        return {"success": True, "data": info}
+            })
+        return _cached_sample_response(request, "device", sample, max_age=3600)
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus/OpenMetrics exposition of the collector snapshot.
+
+    Numeric values only, plus request latency histograms for the API.
+    """
+    # Refresh stale families when the background collector is off
+    await collector.read_many(EXPORTED_FAMILIES)
+    return Response(content=metrics_renderer.render(), media_type=OPENMETRICS_CONTENT_TYPE)
+
+
+@app.get("/metrics/history")
+async def metrics_history(
+    metric: Optional[str] = None,
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    step: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Query recorded metric history.
+
+    ``from``/``to`` are Unix timestamps; values <= 0 are relative to now
+    (``from=-3600`` is the last hour, the default). ``step`` is the bucket
+    width in seconds and picks the 1 s, 1 min or 1 h tier to read from.
+    """
+    available = history.metrics()
+    if metric not in available:
+        return FastJSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error": f"Unknown metric: {metric}" if metric else "Missing 'metric' parameter",
+                "available": available,
+            }
+        )
+
+    now = time.time()
+    start = -3600 if start is None else start
+    end = now if end is None else end
+    if start <= 0:
+        start += now
+    if end <= 0:
+        end += now
+
+    try:
+        return {"success": True, "data": history.query(metric, start, end, step)}
+    except ValueError as e:
+        return FastJSONResponse(
+            status_code=400,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the cache of slow-changing facts."""
+    return {"success": True, "data": ttl_cache.stats()}
+
+
+@app.post("/cache/invalidate")
+async def cache_invalidate(key: Optional[str] = None) -> Dict[str, Any]:
+    """Drop one cached fact (by key), or all of them when no key is given."""
+    removed = ttl_cache.invalidate(key)
+    return {"success": True, "data": {"removed": removed}}
+
+
+def _build_status(samples: Dict[str, Sample], output_format: str = "human") -> Dict[str, Any]:
+    """Assemble the status sections from collector samples."""
+    data = {name: _formatted(name, sample.data, output_format) for name, sample in samples.items()}
+
+    device_info = data["device"]
+    net_stats = data["network_stats"]
+
+    # Only include network stats if we have actual data (not permission denied)
+    network_data = {
+        "tailscale_ip": data["tailscale_ip"],
+        "public_ip": data["public_ip"],
+        "hostname": data["hostname"],
+        "wifi": data["wifi"],
+    }
+
+    # Add stats only if available (no error)
+    if "error" not in net_stats:
+        network_data["stats"] = net_stats
+
+    status = {
+        "system": data["system"],
+        "cpu": data["cpu"],
+        "memory": data["memory"],
+        "battery": data["battery"],
+        "network": network_data,
+        "tmux_sessions": data["tmux"],
+        "processes": data["processes"],
+    }
+
+    # Only include device info if it's actually available (not all Unknown values)
+    if device_info and not all(v == "Unknown" or v == 0 for v in device_info.values()):
+        status["device"] = device_info
+
+    return status
+
+
+def _build_stream_status(samples: Dict[str, Sample]) -> Dict[str, Any]:
+    """Status document for streaming: sample times, but no ever-changing ages."""
+    status = _build_status(samples)
+    status["sampled_at"] = {name: sample.meta()["sampled_at"] for name, sample in samples.items()}
+    return status
+
+
+# One publisher shared by every /stream subscriber
+status_publisher = SnapshotPublisher(collector, STATUS_FAMILIES, _build_stream_status)
+
+
 @app.get("/status")
-async def full_status() -> Dict[str, Any]:
-    """Get comprehensive system status."""
-    try:
-        # Get Termux:API info
-        wifi_info = system.get_termux_wifi_info()
-        device_info = system.get_termux_device_info()
-
-        # Get network info
-        public_ip = network.get_public_ip()
-        net_stats = network.get_network_stats()
-
-        # Only include network stats if we have actual data (not permission denied)
-        network_data = {
-            "tailscale_ip": network.get_tailscale_ip(),
-            "public_ip": public_ip,
-            "hostname": network.get_hostname(),
-            "wifi": wifi_info,
-        }
+async def full_status(output_format: str = OutputFormat) -> Response:
+    """Get comprehensive system status.
 
-        # Add stats only if available (no error)
-        if "error" not in net_stats:
-            network_data["stats"] = net_stats
+    Served from the collector snapshot; each section reports when it was
+    last sampled under ``sampled_at``.
+    """
+    try:
+        samples = await collector.read_many(STATUS_FAMILIES)
 
         # Build response data
         response_data = {
             "timestamp": datetime.now().isoformat(),
-            "system": system.get_system_info(),
-            "cpu": system.get_cpu_info(),
-            "memory": system.get_memory_info(),
-            "battery": system.get_battery_info(),
-            "network": network_data,
-            "tmux_sessions": system.get_tmux_sessions(),
-            "processes": system.get_process_count(),
+            **_build_status(samples, output_format),
+            "sampled_at": {name: sample.meta() for name, sample in samples.items()},
         }
 
-        # Only include device info if it's actually available (not all Unknown values)
-        if device_info and not all(v == "Unknown" or v == 0 for v in device_info.values()):
-            response_data["device"] = device_info
-
-        return {
+        # Encoded directly, skipping FastAPI's jsonable_encoder pass
+        return FastJSONResponse({
             "success": True,
             "data": response_data
-        }
+        })
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/query")
+async def query(
+    include: str = Query(..., description="Comma-separated sections, e.g. cpu,memory,net.rates"),
+    fields: Optional[str] = Query(None, description="Comma-separated dotted paths to keep"),
+    output_format: str = OutputFormat,
+) -> Response:
+    """Get several sections in one request.
+
+    Only the requested collector families are read (concurrently), and
+    ``fields`` trims each section down to the listed paths.
+    """
+    try:
+        sections = parse_include(include, collector.families)
+        paths = parse_fields(fields, sections) if fields else {}
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"success": False, "error": str(e)})
+
+    try:
+        samples = await collector.read_many(set(sections.values()))
+
+        data = {}
+        for name, family in sections.items():
+            section = _formatted(family, samples[family].data, output_format)
+            # Sections no field path mentions are returned whole
+            data[name] = project(section, paths[name]) if name in paths else section
+
+        return FastJSONResponse({
+            "success": True,
+            "data": data,
+            "sampled_at": {name: samples[family].meta() for name, family in sections.items()},
+        })
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
+def _stream_interval(interval: float) -> float:
+    return min(max(interval, STREAM_MIN_INTERVAL), STREAM_MAX_INTERVAL)
+
+
+@app.get("/stream/status")
+async def stream_status(request: Request, interval: float = 5.0) -> StreamingResponse:
+    """Stream status as Server-Sent Events.
+
+    Sends one ``snapshot`` event with the full status, then ``patch`` events
+    (JSON merge patches with only the changed fields) every ``interval``
+    seconds. All subscribers share one collector, so extra viewers don't
+    add sampling work on the phone.
+    """
+    interval = _stream_interval(interval)
+
+    async def events():
+        async for kind, version, payload in status_publisher.subscribe(lambda: interval):
+            if await request.is_disconnected():
+                break
+            if kind == "keepalive":
+                # Comment line keeps proxies (cloudflared) from idling out
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {kind}\nid: {version}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/stream/status/ws")
+async def stream_status_ws(websocket: WebSocket, interval: float = 5.0) -> None:
+    """Stream status over a WebSocket.
+
+    Messages are ``{"type": "snapshot"|"patch", "version": N, "data": {...}}``.
+    Send ``{"interval": seconds}`` at any time to change the update rate.
+    """
+    await websocket.accept()
+    rate = {"interval": _stream_interval(interval)}
+
+    async def receive_settings():
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict) and "interval" in message:
+                rate["interval"] = _stream_interval(float(message["interval"]))
+
+    async def send_updates():
+        async for kind, version, payload in status_publisher.subscribe(lambda: rate["interval"]):
+            if kind != "keepalive":
+                await websocket.send_text(
+                    f'{{"type": "{kind}", "version": {version}, "data": {payload}}}'
+                )
+
+    tasks = [asyncio.create_task(receive_settings()), asyncio.create_task(send_updates())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # Surface errors other than the client going away
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 @app.post("/terminal")
-async def execute_terminal(request: TerminalRequest) -> Dict[str, Any]:
+async def execute_terminal(request: TerminalRequest, http_request: Request) -> Dict[str, Any]:
     """Execute a terminal command in specified mode (termux or typescript).
 
     Modes:
     - typescript: Returns hardcoded responses (safe, for demo/portfolio)
-    - termux: Executes real shell commands (whitelisted, safe commands only)
+    - termux: Executes real shell commands (whitelisted, safe commands only).
+      Commands run on the shared job pool; a full queue returns 429.
 
     Example request:
     {
@@ -352,7 +892,7 @@ async def execute_terminal(request: TerminalRequest) -> Dict[str, Any]:
     try:
         # Validate mode
         if request.mode not in ["termux", "typescript"]:
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -360,12 +900,33 @@ async def execute_terminal(request: TerminalRequest) -> Dict[str, Any]:
                 }
             )
 
-        # Execute command
-        result = terminal.execute_command(
-            command=request.command,
-            mode=request.mode,
-            timeout=request.timeout
-        )
+        job = None
+        if request.mode == "termux":
+            # Run on the job pool so long commands can't starve other requests
+            try:
+                job = job_executor.submit(
+                    request.command, request.timeout or 30, _client_id(http_request)
+                )
+            except ValueError:
+                # Rejected by the whitelist; execute_command reports why
+                pass
+            except JobRejected as e:
+                return _job_rejected(e)
+
+        if job is not None:
+            try:
+                await job_executor.wait(job)
+            except asyncio.CancelledError:
+                # Client went away; don't leave the command running
+                job_executor.cancel(job.id)
+                raise
+            result = {**job.result(), "mode": request.mode, "command": request.command}
+        else:
+            result = terminal.execute_command(
+                command=request.command,
+                mode=request.mode,
+                timeout=request.timeout
+            )
 
         # Check if execution had an error
         if "error" in result and result["exit_code"] != 0:
@@ -380,29 +941,422 @@ async def execute_terminal(request: TerminalRequest) -> Dict[str, Any]:
             "data": result
         }
     except Exception as e:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
+class JobRequest(BaseModel):
+    command: str
+    timeout: int = 30
+
+
+def _trusted_networks(value: str) -> List[Any]:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+# Proxies (e.g. cloudflared on loopback) whose forwarding headers are believed
+TRUSTED_PROXIES = _trusted_networks(os.getenv("DROIDVM_TRUSTED_PROXIES", "127.0.0.1,::1"))
+
+
+def _is_trusted_proxy(host: Optional[str]) -> bool:
+    if not host:
+        # Unix socket peers: only local users allowed by the socket mode
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def _client_id(request: Request) -> str:
+    """The real client behind cloudflared or another trusted proxy.
+
+    Forwarding headers are only used when the peer is in
+    ``TRUSTED_PROXIES``; anyone else could send a fresh value per request.
+    """
+    peer = request.client.host if request.client else None
+    if _is_trusted_proxy(peer):
+        if request.headers.get("cf-connecting-ip"):
+            return request.headers["cf-connecting-ip"].strip()
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # The proxy appends the address it saw; earlier entries are client-supplied
+            return forwarded.split(",")[-1].strip()
+    return peer or "unknown"
+
+
+def _job_rejected(error: JobRejected) -> FastJSONResponse:
+    return FastJSONResponse(
+        status_code=429,
+        content={"success": False, "error": str(error), "retry_after": error.retry_after},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _job_not_found(job_id: str) -> FastJSONResponse:
+    return FastJSONResponse(
+        status_code=404,
+        content={"success": False, "error": f"Unknown job: {job_id}"}
+    )
+
+
+def _job_info(job) -> Dict[str, Any]:
+    info = job.to_dict()
+    position = job_executor.position(job)
+    if position is not None:
+        info["queue_position"] = position
+    return info
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest, http_request: Request) -> Dict[str, Any]:
+    """Queue a termux-mode command and return its job ID straight away.
+
+    Poll ``GET /jobs/{id}`` for status and ``GET /jobs/{id}/output`` for
+    output. Returns 429 with a ``Retry-After`` header when the queue is full
+    or this client already has too many jobs.
+    """
+    try:
+        job = job_executor.submit(request.command, request.timeout, _client_id(http_request))
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except JobRejected as e:
+        return _job_rejected(e)
+    return {"success": True, "data": _job_info(job)}
+
+
+@app.get("/jobs")
+async def list_jobs() -> Dict[str, Any]:
+    """List queued, running and recently finished jobs."""
+    return {
+        "success": True,
+        "data": [_job_info(job) for job in job_executor.jobs()],
+        "executor": job_executor.stats(),
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict[str, Any]:
+    """Get the status of a job."""
+    try:
+        job = job_executor.get(job_id)
+    except KeyError:
+        return _job_not_found(job_id)
+    return {"success": True, "data": _job_info(job)}
+
+
+@app.get("/jobs/{job_id}/output")
+async def job_output(job_id: str, since: int = Query(0, ge=0)) -> Dict[str, Any]:
+    """Get job output events from index ``since`` onwards.
+
+    Pass the returned ``next`` as ``since`` to fetch only new output.
+    """
+    try:
+        job = job_executor.get(job_id)
+    except KeyError:
+        return _job_not_found(job_id)
+    events = job.events[since:]
+    return {
+        "success": True,
+        "data": {
+            "status": job.status,
+            "events": events,
+            "next": since + len(events),
+        },
+    }
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running job."""
+    try:
+        job = job_executor.cancel(job_id)
+    except KeyError:
+        return _job_not_found(job_id)
+    return {"success": True, "data": _job_info(job)}
+
+
+class SessionInput(BaseModel):
+    command: str
+
+
+def _session_not_found(session_id: str) -> FastJSONResponse:
+    return FastJSONResponse(
+        status_code=404,
+        content={"success": False, "error": f"Unknown session: {session_id}"}
+    )
+
+
+@app.post("/sessions", status_code=201)
+async def open_session() -> Dict[str, Any]:
+    """Open a persistent shell session backed by tmux.
+
+    Unlike ``/terminal``, the shell stays alive between commands, so the
+    working directory and environment carry over.
+    """
+    try:
+        session = await session_manager.open()
+        return {"success": True, "data": session.to_dict()}
+    except SessionLimitReached as e:
+        return FastJSONResponse(status_code=429, content={"success": False, "error": str(e)})
+    except FileNotFoundError:
+        return FastJSONResponse(
+            status_code=503,
+            content={"success": False, "error": "tmux is not installed"}
+        )
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/sessions")
+async def list_sessions() -> Dict[str, Any]:
+    """List open shell sessions."""
+    return {"success": True, "data": [s.to_dict() for s in session_manager.sessions()]}
+
+
+@app.post("/sessions/{session_id}/input")
+async def session_input(session_id: str, request: SessionInput) -> Dict[str, Any]:
+    """Run a command in a session.
+
+    Returns immediately with ``offset``, the output position the command's
+    output starts at; poll ``/sessions/{id}/output?since=<offset>``.
+    """
+    try:
+        offset = await session_manager.send(session_id, request.command)
+        return {"success": True, "data": {"offset": offset}}
+    except KeyError:
+        return _session_not_found(session_id)
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.post("/sessions/{session_id}/interrupt")
+async def session_interrupt(session_id: str) -> Dict[str, Any]:
+    """Send Ctrl-C to the command running in a session."""
+    try:
+        await session_manager.interrupt(session_id)
+        return {"success": True}
+    except KeyError:
+        return _session_not_found(session_id)
+    except Exception as e:
+        return FastJSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+
+
+@app.get("/sessions/{session_id}/output")
+async def session_output(
+    session_id: str, since: int = Query(0, ge=0), raw: bool = False
+) -> Dict[str, Any]:
+    """Read session output written since byte offset ``since``.
+
+    Pass the returned ``next`` as ``since`` to read only new output.
+    Terminal escape sequences are stripped unless ``raw=1``.
+    """
+    try:
+        data = session_manager.read(session_id, since, strip_ansi=not raw)
+        return {"success": True, "data": data}
+    except KeyError:
+        return _session_not_found(session_id)
+
+
+@app.delete("/sessions/{session_id}")
+async def close_session(session_id: str) -> Dict[str, Any]:
+    """Close a session and kill its shell."""
+    try:
+        await session_manager.close(session_id)
+        return {"success": True}
+    except KeyError:
+        return _session_not_found(session_id)
+
+
+@app.get("/terminal/policy")
+async def terminal_policy(command: Optional[str] = None) -> Dict[str, Any]:
+    """Show the active termux-mode command policy.
+
+    With ``?command=...``, also report whether that command would be
+    allowed and, if not, which rule denies it.
+    """
+    data = terminal.policy_engine.info()
+    if command is not None:
+        data["decision"] = terminal.policy_engine.check(command).to_dict()
+    return {"success": True, "data": data}
+
+
+@app.post("/terminal/stream")
+async def stream_terminal(request: TerminalRequest, http_request: Request) -> StreamingResponse:
+    """Execute a terminal command and stream its output as it is produced.
+
+    The response is newline-delimited JSON, one event per line:
+
+        {"type": "stdout", "line": "64 bytes from 1.1.1.1: ..."}
+        {"type": "stderr", "line": "..."}
+        {"type": "message", "line": "... (output truncated ...)"}
+        {"type": "exit", "exit_code": 0, "execution_time_ms": 1203}
+
+    In termux mode the command runs on the shared job pool like
+    ``/terminal`` (a full queue returns 429) and is killed as soon as it
+    exceeds the line, byte or time limit, or when the client disconnects.
+    """
+    if request.mode not in ["termux", "typescript"]:
+        return FastJSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error": f"Invalid mode: {request.mode}. Must be 'termux' or 'typescript'."
+            }
+        )
+
+    job = None
+    if request.mode == "termux":
+        try:
+            job = job_executor.submit(request.command, request.timeout or 30, _client_id(http_request))
+        except ValueError:
+            # Rejected by the whitelist; the stream reports why
+            pass
+        except JobRejected as e:
+            return _job_rejected(e)
+
+    async def events():
+        if job is not None:
+            try:
+                async for event in job_executor.follow(job):
+                    yield json.dumps(event) + "\n"
+            finally:
+                # Client went away; don't leave the command running
+                if job.active:
+                    job_executor.cancel(job.id)
+            return
+        if request.mode == "termux":
+            async for event in terminal.stream_termux_command(request.command, request.timeout or 30):
+                yield json.dumps(event) + "\n"
+            return
+
+        result = terminal.execute_typescript_command(request.command)
+        for line in result["output"]:
+            yield json.dumps({"type": "stdout", "line": line}) + "\n"
+        yield json.dumps({"type": "exit", "exit_code": result["exit_code"], "execution_time_ms": 0}) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# DROIDVM_LISTEN values: TCP only, Unix socket only, or both
+LISTEN_MODES = ("tcp", "uds", "both")
+
+
+def _bind_unix_socket(path: str, mode: int) -> socket.socket:
+    """Bind a Unix stream socket at ``path`` with permissions ``mode``.
+
+    A stale socket left behind by a previous run is removed. Anything else at
+    ``path``, or a socket another server is still listening on, is an error.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(st.st_mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+        else:
+            raise OSError(f"Another server is already listening on {path}")
+        finally:
+            probe.close()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The umask keeps the socket from ever being wider than mode
+    old_umask = os.umask(0o777 & ~mode)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, mode)
+    return sock
+
+
 def start():
-    """Start the FastAPI server using uvicorn."""
+    """Start the FastAPI server using uvicorn.
+
+    ``DROIDVM_LISTEN`` picks the listeners: ``tcp`` (default) on
+    ``DROIDVM_HOST:DROIDVM_PORT``, ``uds`` on the Unix socket ``DROIDVM_UDS``
+    (permissions ``DROIDVM_UDS_MODE``, octal, default ``600``), or ``both``.
+    """
     import uvicorn
 
     host = os.getenv("DROIDVM_HOST", "0.0.0.0")
     port = int(os.getenv("DROIDVM_PORT", "8000"))
     reload = os.getenv("DROIDVM_RELOAD", "false").lower() == "true"
+    listen = os.getenv("DROIDVM_LISTEN", "tcp").lower()
+    uds = default_socket_path()
+    uds_mode = int(os.getenv("DROIDVM_UDS_MODE", "600"), 8)
+    if listen not in LISTEN_MODES:
+        raise SystemExit(f"DROIDVM_LISTEN must be one of {', '.join(LISTEN_MODES)}, not {listen!r}")
+
+    # DROIDVM_FAST_JSON, DROIDVM_COMPRESSION, DROIDVM_COMPRESSION_MIN_SIZE
+    response_settings = ResponseSettings.from_env()
+    responses.configure(response_settings)
+
+    if reload and listen != "tcp":
+        # The reloader binds its own single TCP listener
+        print("DROIDVM_RELOAD only supports TCP; ignoring DROIDVM_LISTEN")
+        listen = "tcp"
+
+    if listen != "uds":
+        print(f"Starting DroidVM Tools API on {host}:{port}")
+        print(f"Docs available at http://{host}:{port}/docs")
+    if listen != "tcp":
+        print(f"Listening on Unix socket {uds} (mode {uds_mode:o})")
+    print(
+        f"JSON encoder: {responses.json_backend()}, compression: "
+        + (", ".join(responses.supported_encodings()) if response_settings.compression else "off")
+    )
 
-    print(f"Starting DroidVM Tools API on {host}:{port}")
-    print(f"Docs available at http://{host}:{port}/docs")
+    if reload:
+        uvicorn.run(
+            "droidvm_tools.server:app",
+            host=host,
+            port=port,
+            reload=reload,
+        )
+        return
 
-    uvicorn.run(
-        "droidvm_tools.server:app",
-        host=host,
-        port=port,
-        reload=reload,
-    )
+    config = uvicorn.Config("droidvm_tools.server:app", host=host, port=port)
+    sockets = []
+    try:
+        if listen != "uds":
+            sockets.append(config.bind_socket())
+        if listen != "tcp":
+            sockets.append(_bind_unix_socket(uds, uds_mode))
+        uvicorn.Server(config).run(sockets=sockets)
+    finally:
+        for sock in sockets:
+            if sock.family == socket.AF_UNIX:
+                try:
+                    os.unlink(uds)
+                except OSError:
+                    pass
+            sock.close()
 
 
 if __name__ == "__main__":
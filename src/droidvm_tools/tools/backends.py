@@ -0,0 +1,402 @@
+"""Metric sources: psutil, or /proc and /sys read directly.
+
+On Android/Termux psutil often can't read what it needs for boot time,
+partitions, network counters or the battery, so every call pays for an
+exception and the API returns stubs. The files underneath (``/proc/stat``,
+``/proc/meminfo``, ``/proc/net/dev``, ``/proc/self/mounts``,
+``/sys/class/power_supply``, ``/sys/class/thermal``) are frequently still
+readable.
+
+``ProcfsBackend`` probes once which of those sources can be read, keeps one
+handle open per source and rewinds it with ``seek(0)`` on every sample.
+Anything that couldn't be probed is served by ``PsutilBackend`` instead, so
+non-Linux hosts behave as before. ``DROIDVM_BACKEND=psutil`` turns the
+direct readers off.
+"""
+
+import glob
+import os
+import re
+import threading
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+# Field names match psutil's so either backend's results can be used alike
+CpuTimes = namedtuple(
+    "CpuTimes",
+    ["user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal", "guest", "guest_nice"],
+)
+NetIOCounters = namedtuple(
+    "NetIOCounters",
+    ["bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+     "errin", "errout", "dropin", "dropout"],
+)
+DiskPartition = namedtuple("DiskPartition", ["device", "mountpoint", "fstype", "opts"])
+
+# Single files read on every sample, relative to the backend root
+PROC_SOURCES = {
+    "stat": "proc/stat",
+    "meminfo": "proc/meminfo",
+    "net_dev": "proc/net/dev",
+    "mounts": "proc/self/mounts",
+}
+
+# power_supply types that mean external power when "online"
+_EXTERNAL_SUPPLIES = ("Mains", "USB", "AC", "Wireless")
+
+# Octal escapes (\040 for space) in /proc/self/mounts
+_MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ProcFile:
+    """A /proc or /sys file kept open and re-read from the start."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def read(self) -> str:
+        with self._lock:
+            if self._file is None:
+                # Unbuffered so every read goes back to the kernel
+                self._file = open(self.path, "rb", buffering=0)
+            self._file.seek(0)
+            return self._file.readall().decode(errors="replace")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class PsutilBackend:
+    """Metrics from psutil. Methods raise PermissionError/OSError when denied."""
+
+    name = "psutil"
+
+    def cpu_times(self) -> Tuple[Any, List[Any]]:
+        """(overall, per-core) cumulative CPU times in seconds."""
+        return psutil.cpu_times(), psutil.cpu_times(percpu=True)
+
+    def boot_time(self) -> float:
+        return psutil.boot_time()
+
+    def memory(self) -> Dict[str, Any]:
+        """Memory and swap in bytes (swap fields None if unavailable)."""
+        svmem = psutil.virtual_memory()
+        try:
+            swap = psutil.swap_memory()
+        except (PermissionError, OSError):
+            swap = None
+
+        return {
+            "total": svmem.total,
+            "available": svmem.available,
+            "used": svmem.used,
+            "percentage": svmem.percent,
+            "swap_total": swap.total if swap else None,
+            "swap_used": swap.used if swap else None,
+            "swap_percentage": swap.percent if swap else 0,
+        }
+
+    def net_io_counters(self, pernic: bool = False) -> Any:
+        return psutil.net_io_counters(pernic=pernic)
+
+    def disk_partitions(self) -> List[Any]:
+        return psutil.disk_partitions(all=True)
+
+    def battery(self) -> Optional[Dict[str, Any]]:
+        try:
+            battery = psutil.sensors_battery()
+        except NotImplementedError:
+            return None
+        if battery is None:
+            return None
+
+        return {
+            "percentage": battery.percent,
+            "power_plugged": battery.power_plugged,
+            "time_left": str(battery.secsleft) if battery.secsleft != psutil.POWER_TIME_UNLIMITED else "Unlimited",
+        }
+
+    def temperatures(self) -> Dict[str, float]:
+        """Temperature in °C per sensor."""
+        try:
+            sensors = psutil.sensors_temperatures()
+        except (AttributeError, NotImplementedError):
+            return {}
+        return {
+            name if len(entries) == 1 else f"{name}.{entry.label or i}": entry.current
+            for name, entries in sensors.items()
+            for i, entry in enumerate(entries)
+        }
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "sources": {}}
+
+
+class ProcfsBackend(PsutilBackend):
+    """Reads /proc and /sys directly, falling back to psutil per source."""
+
+    name = "procfs"
+
+    def __init__(self, root: str = "/"):
+        self.root = root
+        self.sources: Dict[str, bool] = {}
+        self._files: Dict[str, ProcFile] = {}
+        # power_supply and thermal_zone directories found by probe()
+        self._batteries: List[str] = []
+        self._external_supplies: List[str] = []
+        self._thermal_zones: Dict[str, str] = {}
+        self._boot_time: Optional[float] = None
+
+    def probe(self) -> Dict[str, bool]:
+        """Find out once which sources are readable."""
+        for name, path in PROC_SOURCES.items():
+            self.sources[name] = self._readable(self._path(path))
+
+        for supply in sorted(glob.glob(self._path("sys/class/power_supply/*"))):
+            supply_type = self._read_once(os.path.join(supply, "type"))
+            if supply_type == "Battery" and self._readable(os.path.join(supply, "capacity")):
+                self._batteries.append(supply)
+            elif supply_type in _EXTERNAL_SUPPLIES and self._readable(os.path.join(supply, "online")):
+                self._external_supplies.append(supply)
+        self.sources["power_supply"] = bool(self._batteries)
+
+        for zone in sorted(glob.glob(self._path("sys/class/thermal/thermal_zone*"))):
+            temp = os.path.join(zone, "temp")
+            if self._readable(temp):
+                zone_type = self._read_once(os.path.join(zone, "type")) or os.path.basename(zone)
+                # Several zones can share a type
+                key = zone_type if zone_type not in self._thermal_zones else os.path.basename(zone)
+                self._thermal_zones[key] = temp
+        self.sources["thermal"] = bool(self._thermal_zones)
+        return dict(self.sources)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "sources": dict(self.sources)}
+
+    def close(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+
+    def cpu_times(self) -> Tuple[Any, List[Any]]:
+        if not self.sources.get("stat"):
+            return super().cpu_times()
+
+        total = None
+        per_core = []
+        for line in self._read("proc/stat").splitlines():
+            if not line.startswith("cpu"):
+                # cpu lines come first
+                break
+            fields = line.split()
+            values = [int(value) / _CLOCK_TICKS for value in fields[1:11]]
+            values += [0.0] * (len(CpuTimes._fields) - len(values))
+            if fields[0] == "cpu":
+                total = CpuTimes(*values)
+            else:
+                per_core.append(CpuTimes(*values))
+        if total is None:
+            raise OSError("No cpu line in /proc/stat")
+        return total, per_core
+
+    def boot_time(self) -> float:
+        if not self.sources.get("stat"):
+            return super().boot_time()
+        # Fixed for the life of the process
+        if self._boot_time is None:
+            for line in self._read("proc/stat").splitlines():
+                if line.startswith("btime "):
+                    self._boot_time = float(line.split()[1])
+                    break
+            else:
+                raise OSError("No btime line in /proc/stat")
+        return self._boot_time
+
+    def memory(self) -> Dict[str, Any]:
+        if not self.sources.get("meminfo"):
+            return super().memory()
+
+        meminfo = {}
+        for line in self._read("proc/meminfo").splitlines():
+            key, _, value = line.partition(":")
+            fields = value.split()
+            if fields:
+                # Values are in kB
+                meminfo[key] = int(fields[0]) * 1024
+
+        # Same arithmetic as psutil.virtual_memory() on Linux
+        total = meminfo["MemTotal"]
+        free = meminfo.get("MemFree", 0)
+        cached = meminfo.get("Buffers", 0) + meminfo.get("Cached", 0) + meminfo.get("SReclaimable", 0)
+        available = meminfo.get("MemAvailable", free + cached)
+        used = total - available
+
+        swap_total = meminfo.get("SwapTotal", 0)
+        swap_used = swap_total - meminfo.get("SwapFree", 0)
+        return {
+            "total": total,
+            "available": available,
+            "used": used,
+            "percentage": _percent(total - available, total),
+            "swap_total": swap_total,
+            "swap_used": swap_used,
+            "swap_percentage": _percent(swap_used, swap_total),
+        }
+
+    def net_io_counters(self, pernic: bool = False) -> Any:
+        if not self.sources.get("net_dev"):
+            return super().net_io_counters(pernic)
+
+        counters = {}
+        # Two header lines, then "iface: rx fields... tx fields..."
+        for line in self._read("proc/net/dev").splitlines()[2:]:
+            nic, _, values = line.partition(":")
+            fields = [int(value) for value in values.split()]
+            if len(fields) < 16:
+                continue
+            counters[nic.strip()] = NetIOCounters(
+                bytes_sent=fields[8],
+                bytes_recv=fields[0],
+                packets_sent=fields[9],
+                packets_recv=fields[1],
+                errin=fields[2],
+                errout=fields[10],
+                dropin=fields[3],
+                dropout=fields[11],
+            )
+
+        if pernic:
+            return counters
+        totals = [0] * len(NetIOCounters._fields)
+        for nic_counters in counters.values():
+            totals = [total + value for total, value in zip(totals, nic_counters)]
+        return NetIOCounters(*totals)
+
+    def disk_partitions(self) -> List[Any]:
+        if not self.sources.get("mounts"):
+            return super().disk_partitions()
+
+        partitions = []
+        for line in self._read("proc/self/mounts").splitlines():
+            fields = line.split()
+            if len(fields) < 4:
+                continue
+            device, mountpoint, fstype, opts = (_unescape_mount(field) for field in fields[:4])
+            partitions.append(DiskPartition(device, mountpoint, fstype, opts))
+        return partitions
+
+    def battery(self) -> Optional[Dict[str, Any]]:
+        if not self._batteries:
+            return super().battery()
+
+        supply = self._batteries[0]
+        status = self._read_optional(os.path.join(supply, "status")) or "Unknown"
+        plugged = status in ("Charging", "Full") or any(
+            self._read_optional(os.path.join(external, "online")) == "1"
+            for external in self._external_supplies
+        )
+        battery = {
+            "percentage": int(self._read(os.path.join(supply, "capacity"))),
+            "power_plugged": plugged,
+            "status": status.upper().replace(" ", "_"),
+        }
+
+        health = self._read_optional(os.path.join(supply, "health"))
+        if health:
+            battery["health"] = health.upper().replace(" ", "_")
+        temp = self._read_optional(os.path.join(supply, "temp"))
+        if temp:
+            # Tenths of a degree
+            battery["temperature"] = int(temp) / 10
+        current = self._read_optional(os.path.join(supply, "current_now"))
+        if current:
+            battery["current"] = int(current)
+        return battery
+
+    def temperatures(self) -> Dict[str, float]:
+        if not self._thermal_zones:
+            return super().temperatures()
+
+        temperatures = {}
+        for zone, path in self._thermal_zones.items():
+            try:
+                # Millidegrees
+                temperatures[zone] = int(self._read(path)) / 1000
+            except (OSError, ValueError):
+                continue
+        return temperatures
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    def _read(self, path: str) -> str:
+        """Contents of a file under the root, through its persistent handle."""
+        path = self._path(path)
+        handle = self._files.get(path)
+        if handle is None:
+            handle = self._files.setdefault(path, ProcFile(path))
+        return handle.read().strip()
+
+    def _read_optional(self, path: str) -> Optional[str]:
+        try:
+            return self._read(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _readable(path: str) -> bool:
+        try:
+            with open(path, "rb", buffering=0) as f:
+                f.read(1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _read_once(path: str) -> Optional[str]:
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+
+def _percent(part: float, total: float) -> float:
+    return round(part / total * 100, 1) if total > 0 else 0.0
+
+
+def _unescape_mount(field: str) -> str:
+    return _MOUNT_ESCAPE.sub(lambda match: chr(int(match.group(1), 8)), field)
+
+
+_backend: Optional[PsutilBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> PsutilBackend:
+    """The shared backend, probed on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.getenv("DROIDVM_BACKEND", "auto"))
+    return _backend
+
+
+def create_backend(kind: str = "auto", root: str = "/") -> PsutilBackend:
+    """Build and probe a backend: ``auto``/``procfs`` or ``psutil``."""
+    if kind == "psutil":
+        return PsutilBackend()
+    if kind not in ("auto", "procfs"):
+        raise ValueError(f"Unknown backend: {kind} (use auto, procfs or psutil)")
+    backend = ProcfsBackend(root)
+    backend.probe()
+    return backend
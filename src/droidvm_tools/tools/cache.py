@@ -0,0 +1,219 @@
+"""TTL cache for slow-changing facts (hostname, public IP, device info).
+
+Entries expire per key. Once expired, an entry can still be served for a
+further ``stale_ttl`` seconds while it is reloaded in the background
+(stale-while-revalidate). A loader raising ``FileNotFoundError`` means the
+underlying tool is not installed; that result is cached for ``negative_ttl``
+seconds so the missing binary is not forked again on every call. A command
+disabled by the capability registry's circuit breaker is only remembered
+until the breaker lets a trial call through.
+
+A single shared instance, ``ttl_cache``, is used by both the server and the
+CLI.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+# How long a "not installed" result is remembered by default
+DEFAULT_NEGATIVE_TTL = 600.0
+
+
+def _negative_ttl(error: FileNotFoundError, negative_ttl: float) -> float:
+    # CapabilityUnavailable from an open breaker says when to try again
+    retry_after = getattr(error, "retry_after", None)
+    return negative_ttl if retry_after is None else min(negative_ttl, retry_after)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    stale_until: float
+    negative: bool = False
+
+
+@dataclass
+class _KeyStats:
+    hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class TTLCache:
+    """Per-key TTL cache with stale-while-revalidate and negative caching."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._stats: Dict[str, _KeyStats] = {}
+        self._refreshing: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float = 0,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    ) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        Returns None while a negative ("not installed") entry is cached.
+        Other loader exceptions propagate and are not cached.
+        """
+        entry, fresh = self._lookup(key)
+        if entry is not None:
+            if not fresh and self._claim_refresh(key):
+                threading.Thread(
+                    target=self._revalidate,
+                    args=(key, loader, ttl, stale_ttl, negative_ttl),
+                    daemon=True,
+                ).start()
+            return entry.value
+
+        return self._load(key, loader, ttl, stale_ttl, negative_ttl)
+
+    async def get_or_load_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    ) -> Any:
+        """Async variant of ``get_or_load`` for coroutine loaders."""
+        entry, fresh = self._lookup(key)
+        if entry is not None:
+            if not fresh and self._claim_refresh(key):
+                task = asyncio.get_running_loop().create_task(
+                    self._revalidate_async(key, loader, ttl, stale_ttl, negative_ttl)
+                )
+                # Hold a reference so the refresh isn't garbage collected
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return entry.value
+
+        return await self._load_async(key, loader, ttl, stale_ttl, negative_ttl)
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """Drop one key (or every key when None). Returns entries removed."""
+        with self._lock:
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                removed = 1 if self._entries.pop(key, None) is not None else 0
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per key and in total."""
+        with self._lock:
+            per_key = {key: stats.to_dict() for key, stats in self._stats.items()}
+
+        totals = _KeyStats().to_dict()
+        for counters in per_key.values():
+            for name, count in counters.items():
+                totals[name] += count
+
+        return {"keys": per_key, "totals": totals, "entries": len(self._entries)}
+
+    def _lookup(self, key: str) -> tuple[Optional[_Entry], bool]:
+        """Return (entry, is_fresh); entry is None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.setdefault(key, _KeyStats())
+            entry = self._entries.get(key)
+
+            if entry is None or now >= entry.stale_until:
+                stats.misses += 1
+                return None, False
+
+            if entry.negative:
+                stats.negative_hits += 1
+            elif now < entry.expires_at:
+                stats.hits += 1
+            else:
+                stats.stale_hits += 1
+            return entry, now < entry.expires_at
+
+    def _claim_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _revalidate(self, key, *args) -> None:
+        # Background refresh: a failure keeps serving the stale value
+        try:
+            self._load(key, *args)
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(key)
+
+    async def _revalidate_async(self, key, *args) -> None:
+        try:
+            await self._load_async(key, *args)
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(key)
+
+    def _release_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _load(self, key, loader, ttl, stale_ttl, negative_ttl) -> Any:
+        try:
+            value = loader()
+        except FileNotFoundError as e:
+            return self._store_negative(key, _negative_ttl(e, negative_ttl))
+        except Exception:
+            self._record_error(key)
+            raise
+        return self._store(key, value, ttl, stale_ttl)
+
+    async def _load_async(self, key, loader, ttl, stale_ttl, negative_ttl) -> Any:
+        try:
+            value = await loader()
+        except FileNotFoundError as e:
+            return self._store_negative(key, _negative_ttl(e, negative_ttl))
+        except Exception:
+            self._record_error(key)
+            raise
+        return self._store(key, value, ttl, stale_ttl)
+
+    def _store(self, key: str, value: Any, ttl: float, stale_ttl: float) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + stale_ttl)
+            self._stats.setdefault(key, _KeyStats()).loads += 1
+        return value
+
+    def _store_negative(self, key: str, negative_ttl: float) -> None:
+        now = time.monotonic()
+        expires_at = now + negative_ttl
+        with self._lock:
+            self._entries[key] = _Entry(None, expires_at, expires_at, negative=True)
+            self._stats.setdefault(key, _KeyStats()).loads += 1
+        return None
+
+    def _record_error(self, key: str) -> None:
+        with self._lock:
+            self._stats.setdefault(key, _KeyStats()).errors += 1
+
+
+# Shared by the server and the CLI
+ttl_cache = TTLCache()
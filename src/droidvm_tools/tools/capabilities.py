@@ -0,0 +1,207 @@
+"""Registry of the external commands the tools depend on.
+
+Termux:API, tailscale, tmux and getprop are optional. Each binary is looked
+up on ``PATH`` once; a missing one fails immediately with
+``CapabilityUnavailable`` (a ``FileNotFoundError``, so existing handlers
+treat it like an uninstalled command) instead of spawning a process on every
+request. Missing binaries are looked up again every ``reprobe_interval``
+seconds so installing one later is noticed.
+
+Commands that keep timing out (e.g. the Termux:API app hanging) trip a
+circuit breaker: after ``failure_threshold`` consecutive timeouts calls are
+rejected for a backoff period that doubles with every further timeout, up to
+``max_backoff``. When the period ends a single trial call is let through;
+success closes the breaker, another timeout reopens it.
+"""
+
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+# Binaries probed at startup
+KNOWN_BINARIES = (
+    "termux-battery-status",
+    "termux-wifi-connectioninfo",
+    "termux-telephony-deviceinfo",
+    "tailscale",
+    "tmux",
+    "getprop",
+)
+
+AVAILABLE = "available"
+MISSING = "missing"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CapabilityUnavailable(FileNotFoundError):
+    """The binary is not installed or its circuit breaker is open."""
+
+    def __init__(self, binary: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"{binary}: {reason}")
+        self.binary = binary
+        self.retry_after = retry_after
+
+
+@dataclass
+class Capability:
+    """What is known about one binary."""
+
+    binary: str
+    path: Optional[str] = None
+    probed_at: float = 0.0
+    # Consecutive timeouts
+    timeouts: int = 0
+    open_until: float = 0.0
+    trial_running: bool = False
+    calls: int = 0
+    rejected: int = 0
+    last_success: Optional[float] = None
+    last_timeout: Optional[float] = None
+
+    def state(self, now: float) -> str:
+        if self.path is None:
+            return MISSING
+        if self.trial_running or (self.open_until and now >= self.open_until):
+            return HALF_OPEN
+        if now < self.open_until:
+            return OPEN
+        return AVAILABLE
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        info = {
+            "state": self.state(now),
+            "path": self.path,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "consecutive_timeouts": self.timeouts,
+            "last_success": _wall_clock(self.last_success, now),
+            "last_timeout": _wall_clock(self.last_timeout, now),
+        }
+        if now < self.open_until:
+            info["retry_after_seconds"] = round(self.open_until - now, 1)
+        return info
+
+
+def _wall_clock(monotonic: Optional[float], now: float) -> Optional[str]:
+    if monotonic is None:
+        return None
+    return datetime.fromtimestamp(time.time() - (now - monotonic)).isoformat()
+
+
+class CapabilityRegistry:
+    """Tracks which binaries exist and which are healthy."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 2,
+        base_backoff: float = 30.0,
+        max_backoff: float = 900.0,
+        reprobe_interval: float = 300.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.reprobe_interval = reprobe_interval
+        self._capabilities: Dict[str, Capability] = {}
+        self._lock = threading.Lock()
+
+    def probe(self, binaries: Iterable[str] = KNOWN_BINARIES) -> Dict[str, Optional[str]]:
+        """Look binaries up on PATH, replacing what was known about them."""
+        now = time.monotonic()
+        found = {binary: _which(binary) for binary in binaries}
+        with self._lock:
+            for binary, path in found.items():
+                self._capabilities[binary] = Capability(binary, path, probed_at=now)
+        return found
+
+    def acquire(self, binary: str) -> None:
+        """Check that ``binary`` may run now; call ``release`` afterwards.
+
+        Raises:
+            CapabilityUnavailable: Not installed, or the breaker is open.
+        """
+        now = time.monotonic()
+        with self._lock:
+            capability = self._capabilities.get(binary)
+            if capability is None or (
+                capability.path is None and now - capability.probed_at > self.reprobe_interval
+            ):
+                capability = self._capabilities[binary] = Capability(
+                    binary, _which(binary), probed_at=now
+                )
+
+            state = capability.state(now)
+            if state == MISSING:
+                capability.rejected += 1
+                raise CapabilityUnavailable(binary, "not installed")
+            if state == OPEN or (state == HALF_OPEN and capability.trial_running):
+                capability.rejected += 1
+                raise CapabilityUnavailable(
+                    binary, "disabled after repeated timeouts",
+                    retry_after=max(capability.open_until - now, 0),
+                )
+            if state == HALF_OPEN:
+                capability.trial_running = True
+            capability.calls += 1
+
+    def release(
+        self,
+        binary: str,
+        timed_out: bool = False,
+        missing: bool = False,
+        cancelled: bool = False,
+    ) -> None:
+        """Record the outcome of a call allowed by ``acquire``.
+
+        A ``cancelled`` call says nothing about the command, so it leaves the
+        breaker as it was (only a half-open trial slot is freed).
+        """
+        now = time.monotonic()
+        with self._lock:
+            capability = self._capabilities.get(binary)
+            if capability is None:
+                return
+            capability.trial_running = False
+            if cancelled:
+                return
+            if missing:
+                # Uninstalled since it was probed
+                capability.path = None
+                capability.probed_at = now
+            elif timed_out:
+                capability.timeouts += 1
+                capability.last_timeout = now
+                if capability.timeouts >= self.failure_threshold:
+                    exponent = capability.timeouts - self.failure_threshold
+                    backoff = min(self.base_backoff * 2 ** exponent, self.max_backoff)
+                    capability.open_until = now + backoff
+            else:
+                # Any exit status means the command responded
+                capability.timeouts = 0
+                capability.open_until = 0.0
+                capability.last_success = now
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """State of every binary seen so far, for the API."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                binary: capability.to_dict(now)
+                for binary, capability in sorted(self._capabilities.items())
+            }
+
+
+def _which(binary: str) -> Optional[str]:
+    # Paths are checked directly; bare names are searched on PATH
+    if os.sep in binary:
+        return binary if os.access(binary, os.X_OK) else None
+    return shutil.which(binary)
+
+
+# Shared by the command runner and the /system/capabilities endpoint
+capabilities = CapabilityRegistry()
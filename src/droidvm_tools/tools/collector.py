@@ -0,0 +1,305 @@
+"""Background metrics collector backed by a shared in-memory snapshot.
+
+Each metric family (cpu, memory, battery, ...) is refreshed on its own
+schedule by a background task. API handlers read the latest sample from the
+snapshot instead of re-running psutil, Termux:API and tailscale on every
+request. When the background tasks are not running (CLI, tests), reads fall
+back to sampling on demand and reuse the result until it goes stale.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from droidvm_tools.tools import system, network
+
+
+@dataclass
+class MetricFamily:
+    """A group of metrics sampled together on a fixed interval.
+
+    ``sampler`` may be a plain function (run in a worker thread) or a
+    coroutine function (awaited on the event loop).
+    """
+
+    name: str
+    sampler: Callable[[], Any]
+    interval: float
+    # Samples older than this are refreshed on read (default: 2x interval)
+    max_age: Optional[float] = None
+
+    def __post_init__(self):
+        if self.max_age is None:
+            self.max_age = self.interval * 2
+
+
+@dataclass
+class Sample:
+    """The latest value of a metric family."""
+
+    data: Any
+    sampled_at: float = field(default_factory=time.time)
+    monotonic: float = field(default_factory=time.monotonic)
+    error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        """Seconds since this sample was taken."""
+        return time.monotonic() - self.monotonic
+
+    def meta(self, include_age: bool = True) -> Dict[str, Any]:
+        """Sample timing metadata for API responses.
+
+        ``include_age=False`` leaves out ``age_seconds`` so the metadata
+        stays the same for the lifetime of the sample.
+        """
+        meta = {"sampled_at": datetime.fromtimestamp(self.sampled_at).isoformat()}
+        if include_age:
+            meta["age_seconds"] = round(self.age, 3)
+        if self.error:
+            meta["error"] = self.error
+        return meta
+
+
+class MetricsCollector:
+    """Refreshes metric families in the background into a shared snapshot."""
+
+    def __init__(self, families: Iterable[MetricFamily]):
+        self.families: Dict[str, MetricFamily] = {f.name: f for f in families}
+        self._samples: Dict[str, Sample] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+        # Bumped on every new sample so readers can tell when data changed
+        self.generation = 0
+
+    def add(self, family: MetricFamily) -> None:
+        """Register an extra metric family (before ``start``)."""
+        self.families[family.name] = family
+
+    @property
+    def running(self) -> bool:
+        """Whether the background refresh tasks are active."""
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self) -> None:
+        """Start one refresh loop per metric family."""
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run(family), name=f"collector:{family.name}")
+            for family in self.families.values()
+        ]
+
+    async def stop(self) -> None:
+        """Cancel all refresh loops."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, family: MetricFamily) -> None:
+        while True:
+            try:
+                await self.refresh(family.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Error is recorded on the sample; keep the loop alive
+                pass
+            await asyncio.sleep(family.interval)
+
+    async def refresh(self, name: str) -> Sample:
+        """Sample a family now, joining an in-flight refresh if there is one."""
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(name)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._sample(name))
+            self._inflight[name] = task
+        return await asyncio.shield(task)
+
+    async def _sample(self, name: str) -> Sample:
+        family = self.families[name]
+        try:
+            if asyncio.iscoroutinefunction(family.sampler):
+                data = await family.sampler()
+            else:
+                data = await asyncio.to_thread(family.sampler)
+        except Exception as e:
+            previous = self._samples.get(name)
+            if previous is None:
+                raise
+            # Serve the last good value, flagged with the failure
+            previous.error = str(e)
+            return previous
+
+        sample = Sample(data=data)
+        self._samples[name] = sample
+        self.generation += 1
+        return sample
+
+    async def read(self, name: str) -> Sample:
+        """Return the latest sample, refreshing it if missing or stale."""
+        if name not in self.families:
+            raise KeyError(f"Unknown metric family: {name}")
+
+        sample = self._samples.get(name)
+        if sample is None or sample.age > self.families[name].max_age:
+            sample = await self.refresh(name)
+        return sample
+
+    async def read_many(self, names: Iterable[str]) -> Dict[str, Sample]:
+        """Read several families concurrently."""
+        names = list(names)
+        samples = await asyncio.gather(*(self.read(name) for name in names))
+        return dict(zip(names, samples))
+
+    def snapshot(self) -> Dict[str, Sample]:
+        """Return the current samples without refreshing anything."""
+        return dict(self._samples)
+
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """Return a JSON merge patch (RFC 7396) turning ``old`` into ``new``.
+
+    Only changed fields are included; removed keys are sent as null.
+    Returns an empty dict when nothing changed.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                patch[key] = merge_patch(old[key], value)
+            else:
+                patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+class SnapshotPublisher:
+    """Fans one collector-built document out to any number of subscribers.
+
+    The document is rebuilt at most once per collector generation, and each
+    snapshot/patch is JSON-encoded once and shared, so per-subscriber cost
+    is a dictionary lookup no matter how many clients are connected.
+    """
+
+    # Recent versions kept for computing patches for slower subscribers
+    HISTORY = 16
+
+    def __init__(
+        self,
+        collector: MetricsCollector,
+        families: Iterable[str],
+        build: Callable[[Dict[str, Sample]], Dict[str, Any]],
+    ):
+        self.collector = collector
+        self.families = list(families)
+        self.build = build
+        self._generation = -1
+        self._version = -1
+        self._documents: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._encoded: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+
+    async def current(self) -> Tuple[int, Dict[str, Any]]:
+        """Return (version, document) for the latest snapshot."""
+        samples = await self.collector.read_many(self.families)
+        generation = self.collector.generation
+        if generation != self._generation:
+            self._generation = generation
+            document = self.build(samples)
+            # Unchanged when only families outside this document were sampled
+            if document != self._documents.get(self._version):
+                self._version = generation
+                self._documents[generation] = document
+                while len(self._documents) > self.HISTORY:
+                    self._documents.popitem(last=False)
+        return self._version, self._documents[self._version]
+
+    def encoded_snapshot(self, version: int) -> str:
+        """JSON for the full document at ``version``."""
+        return self._encode((version, version), lambda: self._documents[version])
+
+    def encoded_patch(self, since: int, version: int) -> Optional[str]:
+        """JSON merge patch from ``since`` to ``version``.
+
+        Returns None if ``since`` is too old to diff against.
+        """
+        if since not in self._documents:
+            return None
+        return self._encode(
+            (since, version),
+            lambda: merge_patch(self._documents[since], self._documents[version]),
+        )
+
+    def _encode(self, key: Tuple[int, int], build: Callable[[], Any]) -> str:
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            encoded = json.dumps(build(), default=str)
+            self._encoded[key] = encoded
+            while len(self._encoded) > self.HISTORY * 4:
+                self._encoded.popitem(last=False)
+        return encoded
+
+    async def subscribe(
+        self, interval: Callable[[], float]
+    ) -> AsyncIterator[Tuple[str, int, Optional[str]]]:
+        """Yield ("snapshot"|"patch"|"keepalive", version, json) periodically.
+
+        ``interval`` returns the current delay in seconds, so a subscriber
+        can change its rate mid-stream. Starts with a full snapshot, then
+        sends only changed fields.
+        """
+        version, _ = await self.current()
+        yield "snapshot", version, self.encoded_snapshot(version)
+
+        while True:
+            await asyncio.sleep(interval())
+            latest, _ = await self.current()
+            if latest == version:
+                yield "keepalive", version, None
+                continue
+
+            patch = self.encoded_patch(version, latest)
+            version = latest
+            if patch is None:
+                yield "snapshot", version, self.encoded_snapshot(version)
+            elif patch != "{}":
+                yield "patch", version, patch
+
+
+def default_families() -> List[MetricFamily]:
+    """Metric families served by the API, with their refresh intervals.
+
+    Byte counts are sampled raw; the API formats them when responding.
+    """
+    return [
+        MetricFamily("cpu", system.get_cpu_info, interval=2),
+        MetricFamily("memory", partial(system.get_memory_info, raw=True), interval=5),
+        MetricFamily("network_stats", partial(network.get_network_stats, raw=True), interval=5),
+        MetricFamily("network_rates", network.get_network_rates, interval=2),
+        MetricFamily("processes", system.get_process_count, interval=10),
+        MetricFamily("tmux", system.get_tmux_sessions_async, interval=10),
+        MetricFamily("battery", system.get_battery_info_async, interval=30),
+        MetricFamily("wifi", system.get_termux_wifi_info_async, interval=30),
+        # Same interval so both are served by one `tailscale status` call
+        MetricFamily("tailscale", network.get_tailscale_status_async, interval=30),
+        MetricFamily("tailscale_ip", network.get_tailscale_ip_async, interval=30),
+        MetricFamily("disk", partial(system.get_disk_info, raw=True), interval=60),
+        MetricFamily("network_info", network.get_network_info, interval=60),
+        MetricFamily("system", system.get_system_info_async, interval=60),
+        MetricFamily("public_ip", network.get_public_ip_async, interval=300),
+        MetricFamily("hostname", network.get_hostname_async, interval=3600),
+        MetricFamily("device", system.get_termux_device_info_async, interval=3600),
+    ]
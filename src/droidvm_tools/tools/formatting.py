@@ -0,0 +1,27 @@
+"""Human-readable formatting for raw metric values.
+
+Getters collect raw numbers; formatting happens at the edge (API response,
+CLI output) so consumers that want numbers don't have to parse strings.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+def bytes_to_human_readable(bytes_value: Optional[float]) -> str:
+    """Convert bytes to human readable format ("N/A" for None)."""
+    if bytes_value is None:
+        return "N/A"
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if bytes_value < 1024.0:
+            return f"{bytes_value:.2f}{unit}"
+        bytes_value /= 1024.0
+    return f"{bytes_value:.2f}PB"
+
+
+def humanize_bytes(data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Return a copy of ``data`` with the given byte-count fields formatted."""
+    formatted = dict(data)
+    for field in fields:
+        if field in formatted:
+            formatted[field] = bytes_to_human_readable(formatted[field])
+    return formatted
@@ -0,0 +1,280 @@
+"""Terminal job executor with a bounded worker pool.
+
+Termux-mode commands run as jobs instead of inside the request handler. At
+most ``workers`` jobs run at once; the rest wait in a FIFO queue of at most
+``max_queue`` entries, and each client may only have ``per_client`` jobs
+queued or running. A full queue raises ``JobRejected`` with a retry hint so
+the API can answer 429 instead of piling up processes on the phone.
+
+Jobs have IDs, so clients can submit, poll status, page through output and
+cancel. Finished jobs are kept for ``retention`` seconds.
+"""
+
+import asyncio
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from droidvm_tools.tools import terminal
+
+MAX_WORKERS = int(os.getenv("DROIDVM_JOB_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("DROIDVM_JOB_QUEUE", "16"))
+MAX_PER_CLIENT = int(os.getenv("DROIDVM_JOBS_PER_CLIENT", "2"))
+
+# How long finished jobs (and their output) are kept, and how many at most
+JOB_RETENTION = 600.0
+MAX_FINISHED_JOBS = 100
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobRejected(Exception):
+    """The job was not accepted; try again after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+@dataclass
+class Job:
+    """One terminal command and its output."""
+
+    command: str
+    timeout: int
+    client: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # stdout/stderr/message events from stream_termux_command
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    exit: Optional[Dict[str, Any]] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    # Set (and replaced) whenever an event is added or the job ends
+    updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def result(self) -> Dict[str, Any]:
+        """Output in the ``execute_termux_command`` result shape."""
+        events = self.events + ([self.exit] if self.exit else [])
+        result = terminal.build_result(events)
+        if self.status == CANCELLED:
+            result.setdefault("exit_code", 130)
+            result["error"] = "Cancelled"
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {
+            "id": self.id,
+            "command": self.command,
+            "status": self.status,
+            "created_at": _isoformat(self.created_at),
+            "started_at": _isoformat(self.started_at),
+            "finished_at": _isoformat(self.finished_at),
+            "output_lines": len(self.events),
+        }
+        if self.exit:
+            info["exit_code"] = self.exit.get("exit_code")
+            info["execution_time_ms"] = self.exit.get("execution_time_ms")
+            for key in ("error", "truncated"):
+                if key in self.exit:
+                    info[key] = self.exit[key]
+        return info
+
+
+class JobExecutor:
+    """Runs terminal jobs on a bounded pool with a FIFO queue."""
+
+    def __init__(
+        self,
+        workers: int = MAX_WORKERS,
+        max_queue: int = MAX_QUEUE,
+        per_client: int = MAX_PER_CLIENT,
+        retention: float = JOB_RETENTION,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.per_client = per_client
+        self.retention = retention
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Deque[Job] = deque()
+        self._running: Dict[str, Job] = {}
+
+    def submit(self, command: str, timeout: int = 30, client: str = "anonymous") -> Job:
+        """Queue a command; it starts as soon as a worker is free.
+
+        Must be called from the event loop.
+
+        Raises:
+            ValueError: The command is not allowed in termux mode.
+            JobRejected: The queue is full or the client has too many jobs.
+        """
+        rejected = terminal.validate_termux_command(command)
+        if rejected:
+            raise ValueError(rejected["error"])
+
+        self._prune()
+        active = sum(1 for job in self._jobs.values() if job.client == client and job.active)
+        if active >= self.per_client:
+            raise JobRejected(
+                f"Too many active jobs for this client (max {self.per_client})",
+                self._retry_after(),
+            )
+        if len(self._running) >= self.workers and len(self._queue) >= self.max_queue:
+            raise JobRejected(f"Job queue is full (max {self.max_queue})", self._retry_after())
+
+        job = Job(command=command, timeout=min(timeout, 60), client=client)
+        self._jobs[job.id] = job
+        self._queue.append(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Look up a job. Raises KeyError for unknown or expired IDs."""
+        return self._jobs[job_id]
+
+    def jobs(self) -> List[Job]:
+        """All known jobs, oldest first."""
+        self._prune()
+        return list(self._jobs.values())
+
+    def position(self, job: Job) -> Optional[int]:
+        """1-based place in the queue, None if not queued."""
+        try:
+            return self._queue.index(job) + 1
+        except ValueError:
+            return None
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancel a queued or running job. Raises KeyError if unknown."""
+        job = self._jobs[job_id]
+        if job.status == QUEUED:
+            self._queue.remove(job)
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING and job.task is not None:
+            # The stream's cleanup kills the process group
+            job.task.cancel()
+        return job
+
+    async def wait(self, job: Job) -> Job:
+        """Wait until the job has finished, failed or been cancelled."""
+        await job.done.wait()
+        return job
+
+    async def follow(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's events as they arrive, then its exit event.
+
+        Cancelled jobs end with an exit event too, carrying
+        ``"error": "Cancelled"``.
+        """
+        sent = 0
+        while True:
+            updated = job.updated
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.done.is_set():
+                break
+            await updated.wait()
+
+        exit_event = dict(job.exit) if job.exit else {"type": "exit", "execution_time_ms": 0}
+        if job.status == CANCELLED:
+            exit_event.setdefault("exit_code", 130)
+            exit_event["error"] = "Cancelled"
+        yield exit_event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "per_client": self.per_client,
+        }
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._queue and len(self._running) < self.workers:
+            job = self._queue.popleft()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running[job.id] = job
+            job.task = loop.create_task(self._run(job), name=f"job:{job.id}")
+            # A done callback also fires for tasks cancelled before they start
+            job.task.add_done_callback(lambda task, job=job: self._on_done(job, task))
+
+    async def _run(self, job: Job) -> None:
+        async for event in terminal.stream_termux_command(job.command, job.timeout):
+            if event["type"] == "exit":
+                job.exit = event
+            else:
+                job.events.append(event)
+                self._notify(job)
+
+    def _on_done(self, job: Job, task: asyncio.Task) -> None:
+        self._running.pop(job.id, None)
+        if task.cancelled():
+            status = CANCELLED
+        elif task.exception() is not None:
+            job.exit = {"type": "exit", "exit_code": 1, "error": str(task.exception())}
+            status = FAILED
+        elif not job.exit or job.exit.get("error"):
+            status = FAILED
+        else:
+            status = FINISHED
+        self._finish(job, status)
+        self._dispatch()
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.done.set()
+        self._notify(job)
+
+    @staticmethod
+    def _notify(job: Job) -> None:
+        # Wake everyone following the job; later waits use the fresh event
+        updated, job.updated = job.updated, asyncio.Event()
+        updated.set()
+
+    def _retry_after(self) -> int:
+        """Seconds until a worker is guaranteed to be free (running jobs' timeouts)."""
+        now = time.time()
+        deadlines = [job.started_at + job.timeout - now for job in self._running.values()]
+        if not deadlines:
+            return 1
+        return max(1, min(60, math.ceil(min(deadlines))))
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        finished = [job for job in self._jobs.values() if not job.active]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for job in finished:
+            if excess > 0 or job.finished_at < cutoff:
+                del self._jobs[job.id]
+                excess -= 1
+
+
+# Shared by the /terminal and /jobs endpoints
+job_executor = JobExecutor()
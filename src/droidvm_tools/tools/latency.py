@@ -0,0 +1,360 @@
+"""Scheduled latency probes with rolling percentiles.
+
+Targets are configured as ``tcp:HOST:PORT`` (time to complete a TCP
+handshake) or ``tailscale:PEER`` (``tailscale ping``, which also reports
+whether the path is direct or through a DERP relay).
+
+Each target keeps one minute of results per slot for the last hour. A slot
+is a log-bucketed histogram (buckets ~19% wide from 0.1 ms to 60 s, as
+16-bit counts), so a target costs under 10 KB however often it is probed.
+Percentiles over a window merge the slots it covers and report the upper
+bound of the bucket holding the rank, clamped to the observed min/max.
+"""
+
+import asyncio
+import math
+import re
+import socket
+import subprocess
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from droidvm_tools.tools import runner
+
+# Rolling windows reported per target (name -> seconds)
+WINDOWS = {"5m": 300, "15m": 900, "1h": 3600}
+
+SLOT_SECONDS = 60
+SLOTS = 60
+
+# Histogram buckets: MIN_MS * GROWTH ** i, i = 0 .. BUCKETS - 1
+MIN_MS = 0.1
+MAX_MS = 60_000.0
+GROWTH = 2 ** 0.25
+BUCKETS = math.ceil(math.log(MAX_MS / MIN_MS, GROWTH)) + 1
+
+PERCENTILES = (50, 95, 99)
+
+# "pong from laptop (100.64.0.2) via 192.168.1.20:41641 in 23ms"
+_PONG = re.compile(r"pong from \S+ \(([^)]*)\) via (.+?) in ([\d.]+)\s*ms")
+
+
+def bucket_index(ms: float) -> int:
+    """Histogram bucket holding a ``ms`` measurement."""
+    if ms <= MIN_MS:
+        return 0
+    return min(math.ceil(math.log(ms / MIN_MS, GROWTH)), BUCKETS - 1)
+
+
+def bucket_upper(index: int) -> float:
+    """Upper bound (ms) of a histogram bucket."""
+    return MIN_MS * GROWTH ** index
+
+
+class RollingHistogram:
+    """Latency histograms per time slot over a fixed ring of slots."""
+
+    def __init__(self, slot_seconds: int = SLOT_SECONDS, slots: int = SLOTS):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        # Absolute slot number held at each ring position (-1: empty)
+        self._slot_ids = array("q", [-1]) * slots
+        # Bucket counts, allocated the first time a ring position is used
+        self._counts: List[Optional[array]] = [None] * slots
+        self._failures = array("H", [0]) * slots
+        self._sums = array("d", [0.0]) * slots
+        self._mins = array("d", [math.inf]) * slots
+        self._maxes = array("d", [0.0]) * slots
+
+    def _position(self, now: float) -> int:
+        slot = int(now // self.slot_seconds)
+        position = slot % self.slots
+        if self._slot_ids[position] != slot:
+            # Reuse the position for the new slot
+            self._slot_ids[position] = slot
+            counts = self._counts[position]
+            if counts is None:
+                self._counts[position] = array("H", [0]) * BUCKETS
+            else:
+                for i in range(BUCKETS):
+                    counts[i] = 0
+            self._failures[position] = 0
+            self._sums[position] = 0.0
+            self._mins[position] = math.inf
+            self._maxes[position] = 0.0
+        return position
+
+    def observe(self, ms: Optional[float], now: Optional[float] = None) -> None:
+        """Record one probe; ``None`` counts as a failure."""
+        position = self._position(time.time() if now is None else now)
+        if ms is None:
+            self._failures[position] = min(self._failures[position] + 1, 0xFFFF)
+            return
+
+        counts = self._counts[position]
+        index = bucket_index(ms)
+        counts[index] = min(counts[index] + 1, 0xFFFF)
+        self._sums[position] += ms
+        self._mins[position] = min(self._mins[position], ms)
+        self._maxes[position] = max(self._maxes[position], ms)
+
+    def summary(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """Count, loss and percentiles over the last ``seconds``.
+
+        The window covers whole slots, including the current partial one.
+        """
+        now = time.time() if now is None else now
+        current = int(now // self.slot_seconds)
+        first = current - min(math.ceil(seconds / self.slot_seconds), self.slots) + 1
+
+        merged = [0] * BUCKETS
+        failures = 0
+        total = 0.0
+        low, high = math.inf, 0.0
+        for position in range(self.slots):
+            slot = self._slot_ids[position]
+            if slot < first or slot > current:
+                continue
+            counts = self._counts[position]
+            for i, count in enumerate(counts):
+                if count:
+                    merged[i] += count
+            failures += self._failures[position]
+            total += self._sums[position]
+            low = min(low, self._mins[position])
+            high = max(high, self._maxes[position])
+
+        count = sum(merged)
+        attempts = count + failures
+        summary: Dict[str, Any] = {
+            "count": count,
+            "failures": failures,
+            "loss_percent": round(100 * failures / attempts, 1) if attempts else None,
+        }
+        if not count:
+            summary.update({"min_ms": None, "mean_ms": None, "max_ms": None})
+            summary.update({f"p{p}_ms": None for p in PERCENTILES})
+            return summary
+
+        summary["min_ms"] = round(low, 2)
+        summary["mean_ms"] = round(total / count, 2)
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(_percentile(merged, count, p, low, high), 2)
+        summary["max_ms"] = round(high, 2)
+        return summary
+
+
+def _percentile(counts: List[int], total: int, percentile: float, low: float, high: float) -> float:
+    rank = max(1, math.ceil(total * percentile / 100))
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return min(max(bucket_upper(i), low), high)
+    return high
+
+
+@dataclass
+class LatencyTarget:
+    """Something to probe: ``tcp`` host/port or ``tailscale`` peer."""
+
+    kind: str
+    host: str
+    port: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        if self.kind == "tcp":
+            host = f"[{self.host}]" if ":" in self.host else self.host
+            return f"tcp:{host}:{self.port}"
+        return f"{self.kind}:{self.host}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyTarget":
+        """Parse ``tcp:HOST:PORT`` or ``tailscale:PEER``.
+
+        Raises:
+            ValueError: Unknown kind or malformed target.
+        """
+        kind, _, rest = spec.strip().partition(":")
+        if kind == "tailscale" and rest:
+            return cls("tailscale", rest)
+        if kind == "tcp":
+            host, _, port = rest.rpartition(":")
+            host = host.strip("[]")
+            if host and port.isdigit() and 0 < int(port) < 65536:
+                return cls("tcp", host, int(port))
+        raise ValueError(
+            f"Invalid latency target '{spec}' (expected tcp:HOST:PORT or tailscale:PEER)"
+        )
+
+
+def parse_targets(
+    specs: str, on_error: Optional[Callable[[ValueError], None]] = None
+) -> List[LatencyTarget]:
+    """Parse a comma-separated list of targets (DROIDVM_LATENCY_TARGETS).
+
+    Malformed entries raise ValueError, or with ``on_error`` are passed to
+    it and skipped.
+    """
+    targets = []
+    for spec in specs.split(","):
+        if not spec.strip():
+            continue
+        try:
+            targets.append(LatencyTarget.parse(spec))
+        except ValueError as e:
+            if on_error is None:
+                raise
+            on_error(e)
+    return targets
+
+
+class ProbeFailed(Exception):
+    """A probe got no answer."""
+
+
+async def probe_tcp(host: str, port: int, timeout: float) -> Dict[str, Any]:
+    """Time a TCP handshake; DNS resolution is not included."""
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout
+        )
+    except (OSError, asyncio.TimeoutError) as e:
+        raise ProbeFailed(f"Cannot resolve {host}: {e or 'timed out'}") from e
+    address = infos[0][4][0]
+
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except asyncio.TimeoutError as e:
+        raise ProbeFailed(f"Connect timed out after {timeout}s") from e
+    except OSError as e:
+        raise ProbeFailed(str(e)) from e
+    ms = (time.perf_counter() - start) * 1000
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return {"ms": ms, "address": address}
+
+
+async def probe_tailscale(peer: str, timeout: float) -> Dict[str, Any]:
+    """One ``tailscale ping``; ``path`` is the endpoint or ``DERP(region)``."""
+    seconds = max(1, math.ceil(timeout))
+    try:
+        result = await runner.run_async(
+            ["tailscale", "ping", "-c", "1", "--timeout", f"{seconds}s", peer],
+            # Headroom so a slow reply isn't counted as tailscale hanging
+            timeout=seconds + 5,
+        )
+        output = result.stdout
+    except subprocess.CalledProcessError as e:
+        # Exits non-zero when the peer doesn't answer in time
+        output = e.stdout or ""
+        if not _PONG.search(output):
+            lines = (output or e.stderr or "").strip().splitlines()
+            raise ProbeFailed(lines[-1] if lines else "no reply") from e
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        raise ProbeFailed(str(e)) from e
+
+    match = _PONG.search(output)
+    if not match:
+        raise ProbeFailed(f"Unexpected tailscale ping output: {output.strip()[:200]}")
+    path = match.group(2)
+    return {
+        "ms": float(match.group(3)),
+        "address": match.group(1),
+        "path": path,
+        "relayed": path.startswith("DERP"),
+    }
+
+
+class LatencyProber:
+    """Probes every target and keeps a rolling histogram per target."""
+
+    def __init__(
+        self,
+        targets: List[LatencyTarget],
+        timeout: float = 3.0,
+        history: Optional[Any] = None,
+    ):
+        """
+        Args:
+            targets: What to probe
+            timeout: Seconds before a probe counts as lost
+            history: ``MetricHistory`` to also record each RTT into, as
+                ``latency.<target>``
+        """
+        self.timeout = timeout
+        self.history = history
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self.set_targets(targets)
+
+    def set_targets(self, targets: List[LatencyTarget]) -> None:
+        """Replace the targets, keeping the history of ones still listed."""
+        self.targets = targets
+        self._histograms = {
+            target.name: self._histograms.get(target.name) or RollingHistogram()
+            for target in targets
+        }
+        self._last = {name: last for name, last in self._last.items() if name in self._histograms}
+
+    async def _probe(self, target: LatencyTarget) -> Dict[str, Any]:
+        if target.kind == "tcp":
+            return await probe_tcp(target.host, target.port, self.timeout)
+        return await probe_tailscale(target.host, self.timeout)
+
+    async def _probe_and_record(self, target: LatencyTarget) -> None:
+        now = time.time()
+        try:
+            result = await self._probe(target)
+        except ProbeFailed as e:
+            result = {"ms": None, "error": str(e)}
+
+        ms = result["ms"]
+        self._histograms[target.name].observe(ms, now)
+        if ms is not None:
+            result["ms"] = round(ms, 2)
+            if self.history is not None:
+                self.history.record(f"latency.{target.name}", ms, now)
+        result["at"] = datetime.fromtimestamp(now).isoformat()
+        self._last[target.name] = result
+
+    async def probe_all(self) -> Dict[str, Any]:
+        """Probe every target once and return the report."""
+        tcp = [t for t in self.targets if t.kind == "tcp"]
+        others = [t for t in self.targets if t.kind != "tcp"]
+
+        async def tailscale_pings():
+            # One at a time so pings don't take every subprocess slot
+            for target in others:
+                await self._probe_and_record(target)
+
+        await asyncio.gather(tailscale_pings(), *(self._probe_and_record(t) for t in tcp))
+        return self.report()
+
+    def report(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Last result and rolling percentiles for every target."""
+        now = time.time() if now is None else now
+        return {
+            "targets": [
+                {
+                    "target": target.name,
+                    "kind": target.kind,
+                    "last": self._last.get(target.name),
+                    "windows": {
+                        window: self._histograms[target.name].summary(seconds, now)
+                        for window, seconds in WINDOWS.items()
+                    },
+                }
+                for target in self.targets
+            ],
+        }
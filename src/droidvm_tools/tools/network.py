@@ -1,12 +1,21 @@
 """Network monitoring and Tailscale utilities."""
 
-import json
+import heapq
+import math
+import os
 import socket
 import subprocess
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Iterator, Optional, List
 
 import psutil
 
+from droidvm_tools.tools import runner
+from droidvm_tools.tools.backends import PsutilBackend, get_backend
+from droidvm_tools.tools.cache import ttl_cache
+from droidvm_tools.tools.formatting import humanize_bytes
+from droidvm_tools.tools.tailscale import TailscaleStatus, sort_peers, tailscale_collector
+
 
 def get_network_info() -> Dict[str, Any]:
     """Get network interface information."""
@@ -46,14 +55,22 @@ def get_network_info() -> Dict[str, Any]:
     return {"interfaces": interfaces}
 
 
-def get_network_stats() -> Dict[str, Any]:
-    """Get network I/O statistics."""
+# Byte-count fields formatted for human-readable output
+NETWORK_BYTE_FIELDS = ("bytes_sent", "bytes_recv")
+
+
+def get_network_stats(raw: bool = False) -> Dict[str, Any]:
+    """Get network I/O statistics.
+
+    Args:
+        raw: Return byte counts as integers instead of formatted strings.
+    """
     try:
-        net_io = psutil.net_io_counters()
+        net_io = get_backend().net_io_counters()
     except (PermissionError, OSError):
-        return {
-            "bytes_sent": "N/A",
-            "bytes_recv": "N/A",
+        stats = {
+            "bytes_sent": None,
+            "bytes_recv": None,
             "packets_sent": 0,
             "packets_recv": 0,
             "errors_in": 0,
@@ -62,10 +79,11 @@ def get_network_stats() -> Dict[str, Any]:
             "drop_out": 0,
             "error": "Permission denied"
         }
+        return stats if raw else format_network_stats(stats)
 
-    return {
-        "bytes_sent": _bytes_to_human_readable(net_io.bytes_sent),
-        "bytes_recv": _bytes_to_human_readable(net_io.bytes_recv),
+    stats = {
+        "bytes_sent": net_io.bytes_sent,
+        "bytes_recv": net_io.bytes_recv,
         "packets_sent": net_io.packets_sent,
         "packets_recv": net_io.packets_recv,
         "errors_in": net_io.errin,
@@ -73,83 +91,376 @@ def get_network_stats() -> Dict[str, Any]:
         "drop_in": net_io.dropin,
         "drop_out": net_io.dropout,
     }
+    return stats if raw else format_network_stats(stats)
 
 
-def get_connections() -> List[Dict[str, Any]]:
-    """Get active network connections."""
-    connections = []
+def format_network_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Format raw ``get_network_stats`` output for humans."""
+    return humanize_bytes(stats, NETWORK_BYTE_FIELDS)
+
+
+class NetRateTracker:
+    """Per-interface throughput from successive per-NIC IO counters.
+
+    Rates are EWMA-smoothed with a time constant of ``smoothing`` seconds
+    (irregular sampling intervals are weighted accordingly). A counter that
+    goes down is taken as reset (interface down/up), not as a huge burst.
+    """
+
+    COUNTERS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv")
+
+    def __init__(
+        self,
+        smoothing: float = 5.0,
+        min_window: float = 0.1,
+        backend: Optional[PsutilBackend] = None,
+    ):
+        self.smoothing = smoothing
+        # None means the shared backend
+        self.backend = backend
+        # Calls closer together than this reuse the last result
+        self.min_window = min_window
+        self._last_time: Optional[float] = None
+        self._last_counters: Dict[str, Any] = {}
+        self._rates: Dict[str, Dict[str, float]] = {}
+        self._last_result: Optional[Dict[str, Any]] = None
+
+    def sample(self, interval: Optional[float] = None) -> Dict[str, Any]:
+        """Return per-interface and total rates since the previous sample.
+
+        Args:
+            interval: Block until at least this many seconds of data are
+                available. Only for callers that are allowed to block (CLI).
+        """
+        now = time.monotonic()
+        if interval and (self._last_time is None or now - self._last_time < interval):
+            if self._last_time is None:
+                self._take(now)
+                time.sleep(interval)
+            else:
+                time.sleep(interval - (now - self._last_time))
+            now = time.monotonic()
+        elif (self._last_result is not None
+              and now - self._last_time < self.min_window):
+            return self._last_result
+
+        return self._take(now)
+
+    def _take(self, now: float) -> Dict[str, Any]:
+        counters = (self.backend or get_backend()).net_io_counters(pernic=True)
+        window = None if self._last_time is None else now - self._last_time
+
+        rates = {}
+        for nic, current in counters.items():
+            previous = self._last_counters.get(nic)
+            if previous is None or not window:
+                rates[nic] = self._rates.get(nic) or dict.fromkeys(self._rate_keys(), 0.0)
+                continue
+
+            # Weight of the new observation for this window length
+            alpha = 1 - math.exp(-window / self.smoothing) if self.smoothing > 0 else 1.0
+            smoothed = self._rates.get(nic, {})
+            nic_rates = {}
+            for counter in self.COUNTERS:
+                delta = _counter_delta(getattr(previous, counter), getattr(current, counter))
+                instant = delta / window
+                key = f"{counter}_per_sec"
+                if key in smoothed:
+                    instant = smoothed[key] + alpha * (instant - smoothed[key])
+                nic_rates[key] = round(instant, 2)
+            rates[nic] = nic_rates
+
+        total = dict.fromkeys(self._rate_keys(), 0.0)
+        for nic_rates in rates.values():
+            for key, value in nic_rates.items():
+                total[key] = round(total[key] + value, 2)
+
+        result = {
+            "interfaces": rates,
+            "total": total,
+            "sample_window_seconds": round(window, 3) if window is not None else None,
+        }
+
+        self._last_time = now
+        self._last_counters = counters
+        self._rates = rates
+        self._last_result = result
+        return result
 
+    def _rate_keys(self) -> List[str]:
+        return [f"{counter}_per_sec" for counter in self.COUNTERS]
+
+
+def _counter_delta(previous: int, current: int) -> int:
+    """Increase of a monotonic counter, tolerating resets.
+
+    Linux interface counters are 64-bit and don't wrap in practice, so a
+    decrease means the counter was reset (interface down/up, modem
+    reconnect) and the new value is the increase since then.
+    """
+    if current >= previous:
+        return current - previous
+    return current
+
+
+# Shared tracker so the server and CLI keep per-NIC baselines between calls
+_net_rate_tracker = NetRateTracker()
+
+
+def get_network_rates(interval: Optional[float] = None) -> Dict[str, Any]:
+    """Get per-interface throughput (bytes/s, packets/s).
+
+    Rates are computed against the previous call, so the first call
+    reports zeros unless ``interval`` is given.
+
+    Args:
+        interval: Minimum sampling window to block for. Leave unset in the
+            server so the event loop is never blocked.
+    """
     try:
-        for conn in psutil.net_connections(kind='inet'):
-            conn_info = {
-                "family": str(conn.family),
-                "type": str(conn.type),
-                "local_address": f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
-                "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
-                "status": conn.status,
-                "pid": conn.pid,
-            }
-            connections.append(conn_info)
+        return _net_rate_tracker.sample(interval)
+    except (PermissionError, OSError):
+        return {
+            "interfaces": {},
+            "total": {},
+            "sample_window_seconds": None,
+            "error": "Permission denied"
+        }
+
+
+# Address family filter values accepted by the connection queries
+CONNECTION_FAMILIES = {"inet": "", "ipv4": "4", "inet4": "4", "ipv6": "6", "inet6": "6"}
+CONNECTION_PROTOCOLS = ("tcp", "udp")
+
+# Remote hosts listed by aggregate_connections
+MAX_AGGREGATE_HOSTS = 50
+
+
+def _connection_kind(family: Optional[str], proto: Optional[str]) -> str:
+    """psutil ``kind`` for a family/protocol filter, e.g. ("ipv4", "tcp") -> "tcp4"."""
+    if family is not None and family.lower() not in CONNECTION_FAMILIES:
+        raise ValueError(f"Unknown family: {family} (use one of {', '.join(CONNECTION_FAMILIES)})")
+    if proto is not None and proto.lower() not in CONNECTION_PROTOCOLS:
+        raise ValueError(f"Unknown protocol: {proto} (use tcp or udp)")
+
+    base = proto.lower() if proto else "inet"
+    return base + CONNECTION_FAMILIES[family.lower() if family else "inet"]
+
+
+def _iter_connections(
+    status: Optional[str] = None,
+    port: Optional[int] = None,
+    pid: Optional[int] = None,
+    family: Optional[str] = None,
+    proto: Optional[str] = None,
+) -> Iterator[Any]:
+    """Yield raw psutil connections that pass the filters.
+
+    Family/protocol are pushed into psutil's ``kind`` and ``pid`` into a
+    per-process lookup, so sockets that can't match are never read; the
+    remaining filters run on the raw tuples before anything is formatted.
+    """
+    kind = _connection_kind(family, proto)
+    status = status.upper() if status else None
+
+    try:
+        if pid is not None:
+            proc = psutil.Process(pid)
+            # psutil < 6 calls it connections()
+            lookup = getattr(proc, "net_connections", None) or proc.connections
+            conns = lookup(kind=kind)
+        else:
+            conns = psutil.net_connections(kind=kind)
+    except psutil.NoSuchProcess:
+        return
     except psutil.AccessDenied:
         # Some systems require elevated permissions
-        pass
+        return
 
-    return connections
+    for conn in conns:
+        if status is not None and conn.status != status:
+            continue
+        if port is not None and not (
+            (conn.laddr and conn.laddr.port == port) or (conn.raddr and conn.raddr.port == port)
+        ):
+            continue
+        yield conn
 
 
-def get_tailscale_status() -> Optional[Dict[str, Any]]:
-    """Get Tailscale VPN status and information."""
+def _format_connection(conn: Any) -> Dict[str, Any]:
+    return {
+        "family": str(conn.family),
+        "type": str(conn.type),
+        "local_address": f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
+        "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
+        "status": conn.status,
+        "pid": conn.pid,
+    }
+
+
+def get_connections(**filters: Any) -> List[Dict[str, Any]]:
+    """Get active network connections.
+
+    Accepts the filters of ``get_connections_page`` (status, port, pid,
+    family, proto).
+    """
+    return [_format_connection(conn) for conn in _iter_connections(**filters)]
+
+
+def get_connections_page(
+    cursor: Optional[str] = None, limit: int = 100, **filters: Any
+) -> Dict[str, Any]:
+    """Get one page of connections matching the filters.
+
+    Args:
+        cursor: ``next_cursor`` from the previous page (None for the first)
+        limit: Maximum connections to return
+        **filters: status (e.g. "LISTEN"), port (local or remote), pid,
+            family ("ipv4"/"ipv6") and proto ("tcp"/"udp")
+
+    Returns:
+        {"connections": [...], "next_cursor": str or None}
+
+    Raises:
+        ValueError: Invalid cursor or filter value.
+    """
     try:
-        # Check if tailscale is running
-        result = subprocess.run(
-            ["tailscale", "status", "--json"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
-        )
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    page = []
+    next_cursor = None
+    for index, conn in enumerate(_iter_connections(**filters)):
+        if index < offset:
+            # Skipped rows are only counted, never formatted
+            continue
+        if len(page) == limit:
+            next_cursor = str(offset + limit)
+            break
+        page.append(_format_connection(conn))
+
+    return {"connections": page, "next_cursor": next_cursor}
+
+
+def aggregate_connections(**filters: Any) -> Dict[str, Any]:
+    """Count connections matching the filters by status and remote host."""
+    by_status: Dict[str, int] = {}
+    by_remote_host: Dict[str, int] = {}
+    total = 0
+
+    for conn in _iter_connections(**filters):
+        total += 1
+        by_status[conn.status] = by_status.get(conn.status, 0) + 1
+        if conn.raddr:
+            by_remote_host[conn.raddr.ip] = by_remote_host.get(conn.raddr.ip, 0) + 1
+
+    top_hosts = heapq.nlargest(MAX_AGGREGATE_HOSTS, by_remote_host.items(), key=lambda item: item[1])
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_remote_host": dict(top_hosts),
+        "remote_hosts": len(by_remote_host),
+    }
 
-        status_data = json.loads(result.stdout)
 
-        # Extract relevant information
-        return {
-            "connected": True,
-            "backend_state": status_data.get("BackendState", "Unknown"),
-            "self": status_data.get("Self", {}),
-            "peers": len(status_data.get("Peer", {})),
-            "health": status_data.get("Health", []),
-        }
+# Errors meaning the binary is missing, hung or failed
+_COMMAND_ERRORS = (
+    subprocess.CalledProcessError,
+    FileNotFoundError,
+    subprocess.TimeoutExpired,
+)
 
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired, json.JSONDecodeError):
-        # Tailscale not installed or not running
-        return None
+
+def get_tailscale_status() -> Optional[Dict[str, Any]]:
+    """Get Tailscale VPN status and information."""
+    status = tailscale_collector.status()
+    # None when tailscale is not installed or not running
+    return status.summary() if status else None
+
+
+async def get_tailscale_status_async() -> Optional[Dict[str, Any]]:
+    """Async variant of ``get_tailscale_status``."""
+    status = await tailscale_collector.status_async()
+    return status.summary() if status else None
 
 
 def get_tailscale_ip() -> Optional[str]:
     """Get the Tailscale IP address."""
+    # Taken from the status JSON rather than a separate `tailscale ip` call
+    status = tailscale_collector.status()
+    return status.tailscale_ip if status else None
+
+
+async def get_tailscale_ip_async() -> Optional[str]:
+    """Async variant of ``get_tailscale_ip``."""
+    status = await tailscale_collector.status_async()
+    return status.tailscale_ip if status else None
+
+
+def get_tailscale_peers(online_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """Get per-peer Tailscale details, online peers first."""
+    status = tailscale_collector.status()
+    return _peer_list(status, online_only) if status else None
+
+
+async def get_tailscale_peers_async(online_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """Async variant of ``get_tailscale_peers``."""
+    status = await tailscale_collector.status_async()
+    return _peer_list(status, online_only) if status else None
+
+
+def _peer_list(status: TailscaleStatus, online_only: bool) -> List[Dict[str, Any]]:
+    peers = [peer for peer in status.peers if peer.online or not online_only]
+    return [peer.to_dict() for peer in sort_peers(peers)]
+
+
+PUBLIC_IP_URL = "https://api.ipify.org"
+
+# Cache lifetimes (seconds) for slow-changing facts
+PUBLIC_IP_TTL = 300
+PUBLIC_IP_STALE_TTL = 3600
+DEVICE_MODEL_TTL = 3600
+DEVICE_MODEL_STALE_TTL = 86400
+
+
+def get_public_ip() -> Optional[str]:
+    """Get the public IP address (best effort, cached)."""
     try:
-        result = subprocess.run(
-            ["tailscale", "ip", "-4"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
+        return ttl_cache.get_or_load(
+            "public_ip", _fetch_public_ip,
+            ttl=PUBLIC_IP_TTL, stale_ttl=PUBLIC_IP_STALE_TTL,
         )
-        return result.stdout.strip()
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+    except Exception:
         return None
 
 
-def get_public_ip() -> Optional[str]:
-    """Get the public IP address (best effort)."""
+async def get_public_ip_async() -> Optional[str]:
+    """Async variant of ``get_public_ip``."""
     try:
-        import httpx
-        response = httpx.get("https://api.ipify.org", timeout=5.0)
-        if response.status_code == 200:
-            return response.text
+        return await ttl_cache.get_or_load_async(
+            "public_ip", _fetch_public_ip_async,
+            ttl=PUBLIC_IP_TTL, stale_ttl=PUBLIC_IP_STALE_TTL,
+        )
     except Exception:
-        pass
-    return None
+        return None
+
+
+def _fetch_public_ip() -> str:
+    import httpx
+    response = httpx.get(PUBLIC_IP_URL, timeout=5.0)
+    response.raise_for_status()
+    return response.text
+
+
+async def _fetch_public_ip_async() -> str:
+    import httpx
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        response = await client.get(PUBLIC_IP_URL)
+    response.raise_for_status()
+    return response.text
 
 
 def get_hostname() -> str:
@@ -160,8 +471,6 @@ def get_hostname() -> str:
     2. Termux device name (termux-telephony-deviceinfo)
     3. System hostname from socket.gethostname()
     """
-    import os
-
     # 1. Check for custom hostname from environment
     custom_hostname = os.getenv("DROIDVM_HOSTNAME")
     if custom_hostname:
@@ -169,27 +478,42 @@ def get_hostname() -> str:
 
     # 2. Try to get device name from Termux:API
     try:
-        result = subprocess.run(
-            ["getprop", "ro.product.model"],
-            capture_output=True,
-            text=True,
-            timeout=2,
-            check=True
+        model = ttl_cache.get_or_load(
+            "getprop:ro.product.model", _fetch_device_model,
+            ttl=DEVICE_MODEL_TTL, stale_ttl=DEVICE_MODEL_STALE_TTL,
         )
-        model = result.stdout.strip()
         if model and model != "localhost":
             return model
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+    except _COMMAND_ERRORS:
         pass
 
     # 3. Fall back to system hostname
     return socket.gethostname()
 
 
-def _bytes_to_human_readable(bytes_value: int) -> str:
-    """Convert bytes to human readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_value < 1024.0:
-            return f"{bytes_value:.2f}{unit}"
-        bytes_value /= 1024.0
-    return f"{bytes_value:.2f}PB"
+async def get_hostname_async() -> str:
+    """Async variant of ``get_hostname``."""
+    custom_hostname = os.getenv("DROIDVM_HOSTNAME")
+    if custom_hostname:
+        return custom_hostname
+
+    try:
+        model = await ttl_cache.get_or_load_async(
+            "getprop:ro.product.model", _fetch_device_model_async,
+            ttl=DEVICE_MODEL_TTL, stale_ttl=DEVICE_MODEL_STALE_TTL,
+        )
+        if model and model != "localhost":
+            return model
+    except _COMMAND_ERRORS:
+        pass
+
+    return socket.gethostname()
+
+
+def _fetch_device_model() -> str:
+    return runner.run(["getprop", "ro.product.model"]).stdout.strip()
+
+
+async def _fetch_device_model_async() -> str:
+    result = await runner.run_async(["getprop", "ro.product.model"])
+    return result.stdout.strip()
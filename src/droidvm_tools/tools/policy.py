@@ -0,0 +1,361 @@
+"""Command policy for termux-mode terminal commands.
+
+A command is split into tokens the way ``sh`` would (quotes, pipelines,
+``;``/``&&``/``||`` lists, subshells and redirections) and every command in
+it is checked, not just the first word:
+
+- its binary must be in ``allow`` and not in ``deny``;
+- its arguments must not match any argument rule for that binary, and
+  must include one matching its ``require_args`` rule if it has one;
+- for binaries with a ``subcommands`` rule (tmux), the subcommand must be
+  one of those listed;
+- it may only redirect output to a file if ``allow_redirects`` is set.
+
+Command and process substitution (``$(...)``, backticks, ``<(...)``,
+``>(...)``) are rejected outright, and so is ``${...}`` parameter expansion,
+which can assign variables (``${PROMPT_COMMAND:=...}``).
+
+Argument rules for a binary are compiled into one regular expression, so
+each argument is checked in a single pass no matter how many rules exist.
+
+The policy can be overridden with a JSON file (``DROIDVM_POLICY_FILE``)::
+
+    {
+        "allow": ["ls", "cat", "ping"],
+        "deny": ["rm", "sudo"],
+        "allow_redirects": false,
+        "rules": [
+            {"binary": "ping", "deny_args": ["^-f$"], "reason": "Flood ping"},
+            {"binary": "tmux", "subcommands": ["list-sessions", "ls"],
+             "options_with_values": ["-L", "-S"]}
+        ]
+    }
+
+Keys left out keep their defaults. The file is re-read when its
+modification time changes; if it fails to load, the previous policy stays
+in force and the error is reported by ``PolicyEngine.info()``.
+"""
+
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Argument rules applied on top of the allow/deny lists
+DEFAULT_ARGUMENT_RULES: List[Dict[str, Any]] = [
+    {"binary": "find", "deny_args": ["^-delete$", "^-exec(dir)?$", "^-ok(dir)?$"],
+     "reason": "find may not delete files or run commands"},
+    # Most tmux subcommands (new-session, run-shell, send-keys, split-window,
+    # ...) run arbitrary shell commands, so only read-only ones are allowed.
+    # Formats can run commands too ("#(cmd)").
+    {"binary": "tmux",
+     "subcommands": [
+         "list-sessions", "ls", "list-windows", "lsw", "list-panes", "lsp",
+         "list-clients", "lsc", "has-session", "has",
+     ],
+     "options_with_values": ["-L", "-S"],
+     "deny_args": ["#\\("],
+     "reason": "tmux may only list sessions, windows, panes and clients"},
+    # Short options may be bundled ("-sSo FILE"); "%output{FILE}" in
+    # --write-out also writes a file
+    {"binary": "curl",
+     "deny_args": [
+         "^-[a-zA-Z]*[oOTDcK]",
+         "^--(output|remote-name|upload-file|dump-header|cookie-jar|trace|stderr"
+         "|config|libcurl|etag-save|hsts|alt-svc)",
+         "%output\\{",
+     ],
+     "reason": "curl may not write or upload files"},
+    # wget saves into the working directory by default, so it must be told to
+    # write to stdout ("-O-" / "--output-document=-"); -i reads URLs from a
+    # file, -e/--execute and --config set wgetrc commands
+    {"binary": "wget",
+     "deny_args": [
+         "^-[a-zA-Z]*O(?!-$)", "^--output-document(?!=-$)",
+         "^-[a-zA-Z]*[oaPie]",
+         "^--(output-file|append-output|directory-prefix|input-file|execute|config)",
+     ],
+     "require_args": ["^-[a-zA-Z]*O-$", "^--output-document=-$"],
+     "reason": "wget may only write to stdout"},
+    {"binary": "ping", "deny_args": ["^-[a-zA-Z]*f"],
+     "reason": "Flood ping is not allowed"},
+]
+
+# Tokens that end one command and start the next
+_SEPARATORS = {";", ";;", "|", "||", "|&", "&", "&&", "(", ")"}
+_PUNCTUATION = set("();<>|&")
+
+# Redirection operators; any containing ">" (or "<>") can write a file
+_REDIRECTS = {"<", "<<", "<<<", "<&", ">", ">>", ">|", ">&", "&>", "&>>", "<>"}
+_INPUT_REDIRECTS = {"<", "<<", "<<<", "<&"}
+
+
+@dataclass
+class PolicyDecision:
+    """Outcome of checking a command against the policy."""
+
+    allowed: bool
+    reason: Optional[str] = None
+    # Which check denied the command: "empty", "parse", "syntax", "allow",
+    # "deny", "redirect", "subcommand" or "argument"
+    rule: Optional[str] = None
+    binary: Optional[str] = None
+    token: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def split_commands(command: str) -> List[Tuple[List[str], List[Tuple[str, str]]]]:
+    """Split a shell command line into (words, redirects) per command.
+
+    Each redirect is an (operator, target) pair, e.g. ``(">>", "log")``.
+
+    Raises:
+        ValueError: The command can't be tokenized (e.g. unclosed quote),
+            or a redirection is malformed.
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+
+    commands: List[Tuple[List[str], List[Tuple[str, str]]]] = []
+    words: List[str] = []
+    redirects: List[Tuple[str, str]] = []
+    operator: Optional[str] = None
+
+    for token in lexer:
+        is_operator = bool(token) and set(token) <= _PUNCTUATION
+        if operator is not None:
+            if is_operator:
+                # e.g. "<(" or "> |": never read a command as a file name
+                raise ValueError(f"Missing target after '{operator}'")
+            redirects.append((operator, token))
+            operator = None
+        elif is_operator and ("<" in token or ">" in token):
+            if token not in _REDIRECTS:
+                raise ValueError(f"Unsupported redirection '{token}'")
+            # File descriptor numbers ("2>&1") stay with the operator
+            if words and words[-1].isdigit():
+                words.pop()
+            operator = token
+        elif is_operator and token in _SEPARATORS:
+            if words:
+                commands.append((words, redirects))
+            words, redirects = [], []
+        else:
+            words.append(token)
+
+    if operator is not None:
+        raise ValueError(f"Missing target after '{operator}'")
+    if words:
+        commands.append((words, redirects))
+    return commands
+
+
+def _writes_file(operator: str, target: str) -> bool:
+    if operator in _INPUT_REDIRECTS:
+        return False
+    # Duplicating or closing a descriptor ("2>&1", ">&-") opens no file
+    return not (operator == ">&" and (target.isdigit() or target == "-"))
+
+
+class Policy:
+    """A compiled, immutable command policy."""
+
+    def __init__(
+        self,
+        allow: Iterable[str],
+        deny: Iterable[str] = (),
+        rules: Iterable[Dict[str, Any]] = (),
+        allow_redirects: bool = False,
+    ):
+        """
+        Args:
+            allow: Binaries that may run
+            deny: Binaries that never run, even if allowed
+            rules: Argument (``deny_args``/``require_args``) and subcommand
+                rules per binary
+            allow_redirects: Whether output may be redirected to files
+                (reading files with ``<`` is always allowed)
+        """
+        self.allow = frozenset(allow)
+        self.deny = frozenset(deny)
+        self.rules = list(rules)
+        self.allow_redirects = allow_redirects
+        self._argument_rules = self._compile(self.rules)
+        self._required_args = {
+            rule["binary"]: (re.compile("|".join(rule["require_args"])), rule.get("reason"))
+            for rule in self.rules if rule.get("require_args")
+        }
+        self._subcommand_rules = {
+            rule["binary"]: rule for rule in self.rules if "subcommands" in rule
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], defaults: "Policy") -> "Policy":
+        """Build a policy from a config dict; missing keys use ``defaults``."""
+        return cls(
+            allow=config.get("allow", defaults.allow),
+            deny=config.get("deny", defaults.deny),
+            rules=config.get("rules", defaults.rules),
+            allow_redirects=config.get("allow_redirects", defaults.allow_redirects),
+        )
+
+    @staticmethod
+    def _compile(rules: List[Dict[str, Any]]) -> Dict[str, Tuple[Pattern, List[str]]]:
+        """One alternation per binary; the matching group names the rule."""
+        patterns: Dict[str, List[str]] = {}
+        reasons: Dict[str, List[str]] = {}
+        for rule in rules:
+            binary = rule["binary"]
+            for pattern in rule.get("deny_args", []):
+                index = len(reasons.setdefault(binary, []))
+                patterns.setdefault(binary, []).append(f"(?P<r{index}>{pattern})")
+                reasons[binary].append(rule.get("reason") or f"Argument not allowed for {binary}")
+        return {
+            binary: (re.compile("|".join(alternatives)), reasons[binary])
+            for binary, alternatives in patterns.items()
+        }
+
+    def check(self, command: str, extra_allowed: Iterable[str] = ()) -> PolicyDecision:
+        """Decide whether ``command`` may run.
+
+        Args:
+            command: The shell command line
+            extra_allowed: Binaries allowed on top of ``allow`` for this check
+        """
+        if not command.strip():
+            return PolicyDecision(False, "Empty command", "empty")
+        if "\n" in command or "\r" in command:
+            return PolicyDecision(False, "Multi-line commands are not allowed", "syntax")
+        if "`" in command or "$(" in command:
+            return PolicyDecision(False, "Command substitution is not allowed", "syntax")
+        if "<(" in command or ">(" in command:
+            return PolicyDecision(False, "Process substitution is not allowed", "syntax")
+        if "${" in command:
+            # "${VAR:=value}" / "${VAR=value}" assign without export
+            return PolicyDecision(False, "Parameter expansion is not allowed", "syntax")
+
+        try:
+            commands = split_commands(command)
+        except ValueError as e:
+            return PolicyDecision(False, f"Could not parse command: {e}", "parse")
+
+        extra_allowed = frozenset(extra_allowed)
+        for words, redirects in commands:
+            binary = words[0]
+            if os.path.basename(binary) in self.deny:
+                return PolicyDecision(False, f"Blocked command: {binary}", "deny", binary)
+            if binary not in self.allow and binary not in extra_allowed:
+                return PolicyDecision(False, f"Command not whitelisted: {binary}", "allow", binary)
+            if not self.allow_redirects:
+                for operator, target in redirects:
+                    if _writes_file(operator, target):
+                        return PolicyDecision(
+                            False, "Output redirection is not allowed", "redirect", binary, target
+                        )
+
+            decision = self._check_subcommand(binary, words[1:])
+            if decision is not None:
+                return decision
+
+            compiled = self._argument_rules.get(binary)
+            if compiled is not None:
+                pattern, reasons = compiled
+                for arg in words[1:]:
+                    match = pattern.search(arg)
+                    if match:
+                        reason = reasons[int(match.lastgroup[1:])]
+                        return PolicyDecision(False, reason, "argument", binary, arg)
+
+            required = self._required_args.get(binary)
+            if required is not None and not any(required[0].search(arg) for arg in words[1:]):
+                reason = required[1] or f"Required argument missing for {binary}"
+                return PolicyDecision(False, reason, "argument", binary)
+
+        return PolicyDecision(True)
+
+    def _check_subcommand(self, binary: str, args: List[str]) -> Optional[PolicyDecision]:
+        """Deny unless the first non-option argument is an allowed subcommand."""
+        rule = self._subcommand_rules.get(binary)
+        if rule is None:
+            return None
+
+        reason = rule.get("reason") or f"Subcommand not allowed for {binary}"
+        takes_value = set(rule.get("options_with_values", []))
+        args = iter(args)
+        for arg in args:
+            if arg in takes_value:
+                next(args, None)
+            elif arg.startswith("-"):
+                # Other global options (e.g. tmux -c/-f) may run commands
+                return PolicyDecision(False, reason, "subcommand", binary, arg)
+            elif arg in rule["subcommands"]:
+                return None
+            else:
+                return PolicyDecision(False, reason, "subcommand", binary, arg)
+        # No subcommand means the binary's default action (tmux: new-session)
+        return PolicyDecision(False, reason, "subcommand", binary)
+
+
+class PolicyEngine:
+    """Serves the current policy, reloading the config file when it changes."""
+
+    def __init__(self, default: Policy, path: Optional[str] = None):
+        self.default = default
+        self.path = path if path is not None else os.getenv("DROIDVM_POLICY_FILE")
+        self.load_error: Optional[str] = None
+        self._policy = default
+        self._mtime: Optional[float] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def policy(self) -> Policy:
+        """The current policy (reloaded first if the file changed)."""
+        if self.path:
+            self._reload_if_changed()
+        return self._policy
+
+    def check(self, command: str, extra_allowed: Iterable[str] = ()) -> PolicyDecision:
+        return self.policy.check(command, extra_allowed)
+
+    def info(self) -> Dict[str, Any]:
+        """Summary of the active policy for the API."""
+        policy = self.policy
+        return {
+            "source": self.path if self._loaded_at else "default",
+            "loaded_at": datetime.fromtimestamp(self._loaded_at).isoformat() if self._loaded_at else None,
+            "load_error": self.load_error,
+            "allow": sorted(policy.allow),
+            "deny": sorted(policy.deny),
+            "allow_redirects": policy.allow_redirects,
+            "rules": policy.rules,
+        }
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            self.load_error = f"Policy file unavailable: {e}"
+            return
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                with open(self.path) as f:
+                    self._policy = Policy.from_config(json.load(f), self.default)
+                self._loaded_at = time.time()
+                self.load_error = None
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                # Keep enforcing the last good policy
+                self.load_error = f"Invalid policy file: {e}"
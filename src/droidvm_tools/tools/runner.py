@@ -0,0 +1,138 @@
+"""Command runner for Termux:API, tmux, tailscale and getprop calls.
+
+Provides a blocking ``run`` for the CLI and an asyncio ``run_async`` for the
+server, both with per-command timeouts and a cap on how many commands run at
+once. Errors mirror ``subprocess.run(..., check=True)`` so callers handle
+``FileNotFoundError``, ``subprocess.TimeoutExpired`` and
+``subprocess.CalledProcessError`` the same way for both variants.
+
+Every call goes through the capability registry first, so binaries that
+aren't installed, or that keep timing out, fail fast without spawning a
+process (``CapabilityUnavailable``, a ``FileNotFoundError``).
+"""
+
+import asyncio
+import os
+import subprocess
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from droidvm_tools.tools.capabilities import capabilities
+
+# Default timeout (seconds) per binary; anything not listed uses DEFAULT_TIMEOUT
+COMMAND_TIMEOUTS: Dict[str, float] = {
+    "termux-battery-status": 5,
+    "termux-wifi-connectioninfo": 5,
+    "termux-telephony-deviceinfo": 5,
+    "tailscale": 5,
+    "tmux": 5,
+    "getprop": 2,
+}
+DEFAULT_TIMEOUT = 5.0
+
+# Maximum number of commands running at the same time
+MAX_CONCURRENT = int(os.getenv("DROIDVM_MAX_SUBPROCESSES", "4"))
+
+_sync_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+# asyncio primitives are bound to one event loop, so keep one per loop
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _timeout_for(args: List[str], timeout: Optional[float]) -> float:
+    if timeout is not None:
+        return timeout
+    return COMMAND_TIMEOUTS.get(os.path.basename(args[0]), DEFAULT_TIMEOUT)
+
+
+def _slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT)
+    return slots
+
+
+@contextmanager
+def _tracked(binary: str, timeout: float) -> Iterator[None]:
+    """Check the binary's capability and record how the call went."""
+    capabilities.acquire(binary)
+    outcome = {}
+    start = time.monotonic()
+    try:
+        yield
+    except subprocess.TimeoutExpired:
+        outcome["timed_out"] = True
+        raise
+    except FileNotFoundError:
+        outcome["missing"] = True
+        raise
+    except asyncio.CancelledError:
+        # Cancelled by the caller (e.g. a request timeout): past the
+        # command's own deadline that is a hang, before it tells us nothing
+        if time.monotonic() - start >= timeout:
+            outcome["timed_out"] = True
+        else:
+            outcome["cancelled"] = True
+        raise
+    finally:
+        capabilities.release(binary, **outcome)
+
+
+def run(args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run a command to completion, blocking the calling thread.
+
+    Raises:
+        FileNotFoundError: The binary is not installed (or is disabled).
+        subprocess.TimeoutExpired: The command exceeded its timeout.
+        subprocess.CalledProcessError: The command exited non-zero.
+    """
+    timeout = _timeout_for(args, timeout)
+    with _tracked(args[0], timeout), _sync_slots:
+        return subprocess.run(
+            args,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            check=True,
+        )
+
+
+async def run_async(args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Run a command without blocking the event loop.
+
+    Raises the same exceptions as ``run``.
+    """
+    timeout = _timeout_for(args, timeout)
+    with _tracked(args[0], timeout):
+        return await _run_async(args, timeout)
+
+
+async def _run_async(args: List[str], timeout: float) -> subprocess.CompletedProcess:
+    async with _slots():
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(args, timeout)
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+    stdout = stdout.decode(errors="replace")
+    stderr = stderr.decode(errors="replace")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
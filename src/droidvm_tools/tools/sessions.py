@@ -0,0 +1,275 @@
+"""Persistent shell sessions backed by tmux.
+
+Each session is a detached tmux session running the user's shell, so the
+working directory, environment and shell start-up survive between
+commands. Commands are typed in with ``send-keys`` and everything the pane
+prints is appended to a log file by ``pipe-pane``; clients read that log
+incrementally by byte offset.
+"""
+
+import asyncio
+import os
+import re
+import shlex
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from droidvm_tools.tools import runner, terminal
+from droidvm_tools.tools.policy import split_commands
+
+SESSION_PREFIX = "droidvm-"
+SESSION_DIR = os.getenv(
+    "DROIDVM_SESSION_DIR", os.path.join(tempfile.gettempdir(), "droidvm-sessions")
+)
+MAX_SESSIONS = int(os.getenv("DROIDVM_MAX_SESSIONS", "4"))
+
+# Sessions unused for this long are closed
+IDLE_TIMEOUT = 1800.0
+
+# Logs are emptied once they grow past this size
+MAX_LOG_BYTES = 4 * 1024 * 1024
+
+# Most output returned by one read
+MAX_READ_BYTES = 64 * 1024
+
+# Shell builtins that only make sense in a persistent session
+SESSION_COMMANDS = ["cd", "export", "unset", "clear"]
+
+# Variables the shell or the dynamic linker act on; setting them would run
+# arbitrary code (PROMPT_COMMAND, BASH_ENV, LD_PRELOAD, ...), change which
+# binaries the allow list refers to (PATH) or write files (HISTFILE)
+PROTECTED_VARIABLES = re.compile(
+    r"^(PROMPT_COMMAND|BASH_ENV|ENV|PATH|SHELLOPTS|BASHOPTS|IFS|HISTFILE|PS[0-4]"
+    r"|LD_\w*|BASH_FUNC_.*)$"
+)
+_VARIABLE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Terminal escape sequences (colours, cursor movement, title changes)
+_ANSI_ESCAPE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+
+class SessionLimitReached(Exception):
+    """Too many sessions are already open."""
+
+
+class Session:
+    """One tmux-backed shell session."""
+
+    def __init__(self, session_id: str, log_path: str):
+        self.id = session_id
+        self.log_path = log_path
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        # Bytes dropped from the front of the log when it was emptied
+        self.log_base = 0
+        self.commands = 0
+
+    @property
+    def target(self) -> str:
+        return f"{SESSION_PREFIX}{self.id}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "tmux_session": self.target,
+            "created": datetime.fromtimestamp(self.created_at).isoformat(),
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "commands": self.commands,
+            "output_offset": self.log_base + _file_size(self.log_path),
+        }
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def validate_session_command(command: str) -> Optional[Dict[str, Any]]:
+    """Like ``terminal.validate_termux_command``, also allowing cd/export.
+
+    ``export``/``unset`` may not touch ``PROTECTED_VARIABLES``.
+    """
+    error = terminal.validate_termux_command(command, extra_commands=SESSION_COMMANDS)
+    if error is not None:
+        return error
+
+    for words, _ in split_commands(command):
+        if words[0] not in ("export", "unset"):
+            continue
+        for arg in words[1:]:
+            # "NAME=value", "NAME+=value" or "NAME"
+            name = arg.partition("=")[0].rstrip("+")
+            if arg.startswith("-") and arg not in ("-p", "-n", "-v"):
+                reason = f"{words[0]} option not allowed: {arg}"
+            elif not arg.startswith("-") and not _VARIABLE_NAME.match(name):
+                reason = f"Invalid variable name: {name}"
+            elif PROTECTED_VARIABLES.match(name):
+                reason = f"{name} may not be changed in a session"
+            else:
+                continue
+            return {
+                "output": [reason],
+                "exit_code": 1,
+                "error": reason,
+                "policy": {"allowed": False, "reason": reason, "rule": "argument",
+                           "binary": words[0], "token": arg},
+            }
+    return None
+
+
+class SessionManager:
+    """Opens, drives and closes tmux-backed shell sessions."""
+
+    def __init__(
+        self,
+        log_dir: str = SESSION_DIR,
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ):
+        self.log_dir = log_dir
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, Session] = {}
+
+    async def open(self) -> Session:
+        """Start a new shell session.
+
+        Raises:
+            SessionLimitReached: ``max_sessions`` are already open.
+            FileNotFoundError: tmux is not installed.
+            subprocess.CalledProcessError: tmux failed to start the session.
+        """
+        await self._close_idle()
+        if len(self._sessions) >= self.max_sessions:
+            raise SessionLimitReached(f"Too many open sessions (max {self.max_sessions})")
+
+        os.makedirs(self.log_dir, mode=0o700, exist_ok=True)
+        session_id = uuid.uuid4().hex[:8]
+        session = Session(session_id, os.path.join(self.log_dir, f"{session_id}.log"))
+        open(session.log_path, "wb").close()
+
+        await runner.run_async([
+            "tmux", "new-session", "-d", "-s", session.target, "-x", "200", "-y", "50",
+        ])
+        try:
+            await runner.run_async([
+                "tmux", "pipe-pane", "-o", "-t", session.target,
+                f"cat >> {shlex.quote(session.log_path)}",
+            ])
+        except Exception:
+            await self._kill(session)
+            raise
+
+        self._sessions[session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        """Look up an open session. Raises KeyError if unknown."""
+        return self._sessions[session_id]
+
+    def sessions(self) -> List[Session]:
+        return list(self._sessions.values())
+
+    async def send(self, session_id: str, command: str) -> int:
+        """Type a command into the session's shell and press Enter.
+
+        Returns the output offset the command's output starts at.
+
+        Raises:
+            KeyError: Unknown session.
+            ValueError: The command is not allowed.
+        """
+        session = self._sessions[session_id]
+        rejected = validate_session_command(command)
+        if rejected:
+            raise ValueError(rejected["error"])
+
+        self._rotate_log(session)
+        offset = session.log_base + _file_size(session.log_path)
+        # -l sends the text literally instead of as key names
+        await runner.run_async(["tmux", "send-keys", "-t", session.target, "-l", "--", command])
+        await runner.run_async(["tmux", "send-keys", "-t", session.target, "Enter"])
+        session.last_used = time.monotonic()
+        session.commands += 1
+        return offset
+
+    async def interrupt(self, session_id: str) -> None:
+        """Send Ctrl-C to the session's foreground command."""
+        session = self._sessions[session_id]
+        await runner.run_async(["tmux", "send-keys", "-t", session.target, "C-c"])
+        session.last_used = time.monotonic()
+
+    def read(
+        self,
+        session_id: str,
+        since: int = 0,
+        max_bytes: int = MAX_READ_BYTES,
+        strip_ansi: bool = True,
+    ) -> Dict[str, Any]:
+        """Return output written since byte offset ``since``.
+
+        Pass the returned ``next`` back as ``since`` to read only new
+        output. ``truncated`` is set when part of the requested range was
+        already dropped from the log.
+        """
+        session = self._sessions[session_id]
+        session.last_used = time.monotonic()
+
+        truncated = since < session.log_base
+        start = max(since, session.log_base) - session.log_base
+        try:
+            with open(session.log_path, "rb") as f:
+                f.seek(start)
+                data = f.read(max_bytes)
+        except OSError:
+            data = b""
+
+        output = data.decode(errors="replace")
+        if strip_ansi:
+            output = _ANSI_ESCAPE.sub("", output).replace("\r", "")
+        return {
+            "output": output,
+            "next": session.log_base + start + len(data),
+            "truncated": truncated,
+        }
+
+    async def close(self, session_id: str) -> None:
+        """Kill the tmux session and delete its log. Raises KeyError if unknown."""
+        session = self._sessions.pop(session_id)
+        await self._kill(session)
+
+    async def close_all(self) -> None:
+        for session_id in list(self._sessions):
+            await self.close(session_id)
+
+    async def _kill(self, session: Session) -> None:
+        try:
+            await runner.run_async(["tmux", "kill-session", "-t", session.target])
+        except Exception:
+            # Already gone (shell exited, tmux server restarted)
+            pass
+        try:
+            os.remove(session.log_path)
+        except OSError:
+            pass
+
+    async def _close_idle(self) -> None:
+        now = time.monotonic()
+        idle = [s.id for s in self._sessions.values() if now - s.last_used > self.idle_timeout]
+        await asyncio.gather(*(self.close(session_id) for session_id in idle))
+
+    def _rotate_log(self, session: Session) -> None:
+        # pipe-pane appends with O_APPEND, so truncating in place is safe
+        size = _file_size(session.log_path)
+        if size > MAX_LOG_BYTES:
+            os.truncate(session.log_path, 0)
+            session.log_base += size
+
+
+# Shared by the /sessions endpoints
+session_manager = SessionManager()
@@ -1,37 +1,51 @@
 """System monitoring and information utilities."""
 
+import heapq
 import json
 import os
 import platform
 import subprocess
+import threading
+import time
 import warnings
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 import psutil
 
+from droidvm_tools.tools import runner
+from droidvm_tools.tools.backends import PsutilBackend, get_backend
+from droidvm_tools.tools.cache import ttl_cache
+from droidvm_tools.tools.formatting import humanize_bytes
+
 # Suppress psutil warnings for restricted Android/Termux environment
 warnings.filterwarnings('ignore', category=RuntimeWarning, module='psutil')
 
 
 def get_system_info() -> Dict[str, Any]:
     """Get comprehensive system information."""
-    try:
-        boot_time = datetime.fromtimestamp(psutil.boot_time()).isoformat()
-    except (PermissionError, OSError):
-        boot_time = "N/A"
+    # Get hostname with fallback logic
+    from droidvm_tools.tools.network import get_hostname
+    return _build_system_info(get_hostname())
 
-    # Calculate uptime
+
+async def get_system_info_async() -> Dict[str, Any]:
+    """Async variant of ``get_system_info``."""
+    from droidvm_tools.tools.network import get_hostname_async
+    return _build_system_info(await get_hostname_async())
+
+
+def _build_system_info(hostname: str) -> Dict[str, Any]:
+    boot_time = "N/A"
+    boot_timestamp = None
     uptime_seconds = None
     try:
-        uptime_seconds = int(datetime.now().timestamp() - psutil.boot_time())
+        boot_timestamp = int(get_backend().boot_time())
+        boot_time = datetime.fromtimestamp(boot_timestamp).isoformat()
+        uptime_seconds = int(datetime.now().timestamp() - boot_timestamp)
     except (PermissionError, OSError):
         pass
 
-    # Get hostname with fallback logic
-    from droidvm_tools.tools.network import get_hostname
-    hostname = get_hostname()
-
     return {
         "hostname": hostname,
         "platform": platform.system(),
@@ -41,32 +55,135 @@ def get_system_info() -> Dict[str, Any]:
         "processor": platform.processor(),
         "python_version": platform.python_version(),
         "boot_time": boot_time,
+        "boot_timestamp": boot_timestamp,
         "uptime_seconds": uptime_seconds,
     }
 
 
-def get_cpu_info() -> Dict[str, Any]:
-    """Get CPU usage and information."""
+class CpuUsageTracker:
+    """Delta-based CPU usage that never sleeps.
+
+    Keeps the previous CPU times (overall and per core) and computes usage
+    against them, so each call reports the usage over the window since the
+    last sample. The first sample is measured against boot.
+    """
+
+    def __init__(self, min_window: float = 0.1, backend: Optional[PsutilBackend] = None):
+        # Calls closer together than this reuse the last result, so several
+        # readers polling at once don't shrink the window to nothing
+        self.min_window = min_window
+        # None means the shared backend
+        self.backend = backend
+        self._last_time: Optional[float] = None
+        self._last_total = None
+        self._last_per_core: list = []
+        self._last_result: Optional[Dict[str, Any]] = None
+
+    def sample(self, interval: Optional[float] = None) -> Dict[str, Any]:
+        """Return usage since the previous sample.
+
+        Args:
+            interval: Block until at least this many seconds of data are
+                available. Only for callers that are allowed to block (CLI).
+        """
+        now = time.monotonic()
+        if interval and (self._last_time is None or now - self._last_time < interval):
+            if self._last_time is None:
+                self._take(now)
+                time.sleep(interval)
+            else:
+                time.sleep(interval - (now - self._last_time))
+            now = time.monotonic()
+        elif (self._last_result is not None
+              and now - self._last_time < self.min_window):
+            return self._last_result
+
+        return self._take(now)
+
+    def _take(self, now: float) -> Dict[str, Any]:
+        backend = self.backend or get_backend()
+        total, per_core = backend.cpu_times()
+
+        if self._last_time is None:
+            window = _seconds_since_boot(backend)
+        else:
+            window = now - self._last_time
+
+        result = {
+            "cpu_usage_percent": _cpu_percent(self._last_total, total),
+            "cpu_usage_per_core": [
+                _cpu_percent(
+                    self._last_per_core[i] if i < len(self._last_per_core) else None,
+                    times,
+                )
+                for i, times in enumerate(per_core)
+            ],
+            "sample_window_seconds": round(window, 3) if window is not None else None,
+        }
+
+        self._last_time = now
+        self._last_total = total
+        self._last_per_core = per_core
+        self._last_result = result
+        return result
+
+
+def _cpu_busy_total(times) -> tuple[float, float]:
+    """Return (busy, total) seconds for a cpu_times tuple, like psutil does."""
+    total = sum(times)
+    # guest time is already accounted for in user/nice on Linux
+    total -= getattr(times, "guest", 0) + getattr(times, "guest_nice", 0)
+    busy = total - times.idle - getattr(times, "iowait", 0)
+    return busy, total
+
+
+def _cpu_percent(previous, current) -> float:
+    """CPU usage between two cpu_times samples (previous=None means boot)."""
+    busy, total = _cpu_busy_total(current)
+    if previous is not None:
+        prev_busy, prev_total = _cpu_busy_total(previous)
+        busy -= prev_busy
+        total -= prev_total
+
+    if total <= 0:
+        return 0.0
+    return round(min(max(busy / total * 100, 0.0), 100.0), 1)
+
+
+def _seconds_since_boot(backend: PsutilBackend) -> Optional[float]:
+    try:
+        return time.time() - backend.boot_time()
+    except (PermissionError, OSError):
+        return None
+
+
+# Shared tracker so the server and CLI keep CPU baselines between calls
+_cpu_tracker = CpuUsageTracker()
+
+
+def get_cpu_info(interval: Optional[float] = None) -> Dict[str, Any]:
+    """Get CPU usage and information.
+
+    Usage is computed against the previous call without sleeping; the
+    window it covers is reported as ``sample_window_seconds``.
+
+    Args:
+        interval: Minimum sampling window to block for. Leave unset in the
+            server so the event loop is never blocked.
+    """
     try:
         cpu_freq = psutil.cpu_freq()
     except (PermissionError, OSError):
         cpu_freq = None
 
     try:
-        # First call initializes, second call gets actual usage
-        # This is more reliable than using interval parameter
-        psutil.cpu_percent(interval=None, percpu=False)
-        psutil.cpu_percent(interval=None, percpu=True)
-
-        # Small sleep then get actual values
-        import time
-        time.sleep(0.5)
-
-        cpu_usage = psutil.cpu_percent(interval=None, percpu=False)
-        cpu_usage_per_core = psutil.cpu_percent(interval=None, percpu=True)
+        usage = _cpu_tracker.sample(interval)
     except (PermissionError, OSError):
-        cpu_usage = 0
-        cpu_usage_per_core = []
+        usage = {
+            "cpu_usage_percent": 0,
+            "cpu_usage_per_core": [],
+            "sample_window_seconds": None,
+        }
 
     return {
         "physical_cores": psutil.cpu_count(logical=False),
@@ -74,66 +191,71 @@ def get_cpu_info() -> Dict[str, Any]:
         "max_frequency": f"{cpu_freq.max:.2f}Mhz" if cpu_freq else "N/A",
         "min_frequency": f"{cpu_freq.min:.2f}Mhz" if cpu_freq else "N/A",
         "current_frequency": f"{cpu_freq.current:.2f}Mhz" if cpu_freq else "N/A",
-        "cpu_usage_percent": cpu_usage,
-        "cpu_usage_per_core": cpu_usage_per_core,
+        **usage,
     }
 
 
-def get_memory_info() -> Dict[str, Any]:
-    """Get memory usage information."""
+# Byte-count fields formatted for human-readable output
+MEMORY_BYTE_FIELDS = ("total", "available", "used", "swap_total", "swap_used")
+DISK_BYTE_FIELDS = ("total", "used", "free")
+
+
+def get_memory_info(raw: bool = False) -> Dict[str, Any]:
+    """Get memory usage information.
+
+    Args:
+        raw: Return byte counts as integers instead of formatted strings.
+    """
     try:
-        svmem = psutil.virtual_memory()
+        info = get_backend().memory()
     except (PermissionError, OSError):
-        return {
-            "total": "N/A",
-            "available": "N/A",
-            "used": "N/A",
+        info = {
+            "total": None,
+            "available": None,
+            "used": None,
             "percentage": 0,
-            "swap_total": "N/A",
-            "swap_used": "N/A",
+            "swap_total": None,
+            "swap_used": None,
             "swap_percentage": 0,
             "error": "Permission denied"
         }
 
-    try:
-        swap = psutil.swap_memory()
-    except (PermissionError, OSError):
-        swap = None
+    return info if raw else format_memory_info(info)
 
-    return {
-        "total": _bytes_to_human_readable(svmem.total),
-        "available": _bytes_to_human_readable(svmem.available),
-        "used": _bytes_to_human_readable(svmem.used),
-        "percentage": svmem.percent,
-        "swap_total": _bytes_to_human_readable(swap.total) if swap else "N/A",
-        "swap_used": _bytes_to_human_readable(swap.used) if swap else "N/A",
-        "swap_percentage": swap.percent if swap else 0,
-    }
+
+def format_memory_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Format raw ``get_memory_info`` output for humans."""
+    return humanize_bytes(info, MEMORY_BYTE_FIELDS)
 
 
-def get_disk_info() -> Dict[str, Any]:
-    """Get disk usage information."""
+def get_disk_info(raw: bool = False) -> Dict[str, Any]:
+    """Get disk usage information.
+
+    Args:
+        raw: Return byte counts as integers instead of formatted strings.
+    """
     partitions = []
 
     try:
-        disk_partitions = psutil.disk_partitions(all=True)
+        disk_partitions = get_backend().disk_partitions()
     except (PermissionError, OSError) as e:
         # Termux/Android may restrict access to /proc/filesystems
         # Try to get at least the root partition
         try:
             root_usage = psutil.disk_usage('/')
-            return {
+            info = {
                 "partitions": [{
                     "device": "rootfs",
                     "mountpoint": "/",
                     "filesystem": "unknown",
-                    "total": _bytes_to_human_readable(root_usage.total),
-                    "used": _bytes_to_human_readable(root_usage.used),
-                    "free": _bytes_to_human_readable(root_usage.free),
+                    "total": root_usage.total,
+                    "used": root_usage.used,
+                    "free": root_usage.free,
                     "percentage": root_usage.percent,
                 }],
                 "note": "Limited access due to system permissions"
             }
+            return info if raw else format_disk_info(info)
         except Exception:
             return {
                 "partitions": [],
@@ -147,177 +269,252 @@ def get_disk_info() -> Dict[str, Any]:
                 "device": partition.device,
                 "mountpoint": partition.mountpoint,
                 "filesystem": partition.fstype,
-                "total": _bytes_to_human_readable(partition_usage.total),
-                "used": _bytes_to_human_readable(partition_usage.used),
-                "free": _bytes_to_human_readable(partition_usage.free),
+                "total": partition_usage.total,
+                "used": partition_usage.used,
+                "free": partition_usage.free,
                 "percentage": partition_usage.percent,
             })
         except (PermissionError, OSError):
             # Skip partitions that can't be accessed
             continue
 
-    return {"partitions": partitions}
+    info = {"partitions": partitions}
+    return info if raw else format_disk_info(info)
+
+
+def format_disk_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Format raw ``get_disk_info`` output for humans."""
+    return {
+        **info,
+        "partitions": [humanize_bytes(p, DISK_BYTE_FIELDS) for p in info["partitions"]],
+    }
 
 
 def get_battery_info() -> Optional[Dict[str, Any]]:
     """Get battery information (if available).
 
-    Tries Termux:API first (termux-battery-status), falls back to psutil.
+    Tries Termux:API first (termux-battery-status), then
+    /sys/class/power_supply or psutil.
     """
     # Try Termux:API first (works on Android/Termux)
     termux_battery = _get_termux_battery_status()
     if termux_battery:
         return termux_battery
 
-    # Fallback to psutil (usually fails on Termux due to permissions)
+    return _get_backend_battery()
+
+
+async def get_battery_info_async() -> Optional[Dict[str, Any]]:
+    """Async variant of ``get_battery_info``."""
+    termux_battery = await _get_termux_battery_status_async()
+    if termux_battery:
+        return termux_battery
+
+    return _get_backend_battery()
+
+
+def _get_backend_battery() -> Optional[Dict[str, Any]]:
     try:
-        battery = psutil.sensors_battery()
-    except (PermissionError, OSError, NotImplementedError):
+        return get_backend().battery()
+    except (PermissionError, OSError, ValueError):
         # Termux/Android may restrict access to /sys/class/power_supply
         # or battery info may not be available via standard Linux APIs
         return None
 
-    if battery is None:
-        return None
+
+def get_thermal_info() -> Dict[str, Any]:
+    """Get temperatures in °C per thermal zone or sensor."""
+    try:
+        temperatures = get_backend().temperatures()
+    except (PermissionError, OSError):
+        temperatures = {}
 
     return {
-        "percentage": battery.percent,
-        "power_plugged": battery.power_plugged,
-        "time_left": str(battery.secsleft) if battery.secsleft != psutil.POWER_TIME_UNLIMITED else "Unlimited",
+        "temperatures": temperatures,
+        "max_temperature": max(temperatures.values()) if temperatures else None,
     }
 
 
+# Errors meaning Termux:API is not installed or not available
+_TERMUX_ERRORS = (
+    subprocess.CalledProcessError,
+    subprocess.TimeoutExpired,
+    FileNotFoundError,
+    json.JSONDecodeError,
+    KeyError,
+)
+
+
 def _get_termux_battery_status() -> Optional[Dict[str, Any]]:
     """Get battery status using Termux:API.
 
     Requires: pkg install termux-api && install Termux:API app from F-Droid
     """
     try:
-        result = subprocess.run(
-            ["termux-battery-status"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-            check=True
-        )
+        return _parse_battery_status(runner.run(["termux-battery-status"]).stdout)
+    except _TERMUX_ERRORS:
+        return None
 
-        data = json.loads(result.stdout)
 
-        return {
-            "percentage": data.get("percentage", 0),
-            "power_plugged": data.get("plugged") != "UNPLUGGED",
-            "status": data.get("status", "UNKNOWN"),
-            "health": data.get("health", "UNKNOWN"),
-            "temperature": data.get("temperature", 0),
-            "current": data.get("current", 0),
-        }
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
-            FileNotFoundError, json.JSONDecodeError, KeyError):
-        # Termux:API not installed or not available
+async def _get_termux_battery_status_async() -> Optional[Dict[str, Any]]:
+    """Async variant of ``_get_termux_battery_status``."""
+    try:
+        result = await runner.run_async(["termux-battery-status"])
+        return _parse_battery_status(result.stdout)
+    except _TERMUX_ERRORS:
         return None
 
 
+def _parse_battery_status(output: str) -> Dict[str, Any]:
+    data = json.loads(output)
+
+    return {
+        "percentage": data.get("percentage", 0),
+        "power_plugged": data.get("plugged") != "UNPLUGGED",
+        "status": data.get("status", "UNKNOWN"),
+        "health": data.get("health", "UNKNOWN"),
+        "temperature": data.get("temperature", 0),
+        "current": data.get("current", 0),
+    }
+
+
 def get_termux_wifi_info() -> Optional[Dict[str, Any]]:
     """Get WiFi connection info using Termux:API.
 
     Requires: pkg install termux-api && install Termux:API app from F-Droid
     """
     try:
-        result = subprocess.run(
-            ["termux-wifi-connectioninfo"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-            check=True
-        )
+        return _parse_wifi_info(runner.run(["termux-wifi-connectioninfo"]).stdout)
+    except _TERMUX_ERRORS:
+        return None
 
-        data = json.loads(result.stdout)
 
-        return {
-            "ssid": data.get("ssid", "Unknown"),
-            "bssid": data.get("bssid", "Unknown"),
-            "ip": data.get("ip", "Unknown"),
-            "link_speed_mbps": data.get("link_speed_mbps", 0),
-            "rssi": data.get("rssi", 0),
-            "frequency_mhz": data.get("frequency_mhz", 0),
-            "network_id": data.get("network_id", -1),
-        }
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
-            FileNotFoundError, json.JSONDecodeError, KeyError):
-        # Termux:API not installed or not available
+async def get_termux_wifi_info_async() -> Optional[Dict[str, Any]]:
+    """Async variant of ``get_termux_wifi_info``."""
+    try:
+        result = await runner.run_async(["termux-wifi-connectioninfo"])
+        return _parse_wifi_info(result.stdout)
+    except _TERMUX_ERRORS:
         return None
 
 
+def _parse_wifi_info(output: str) -> Dict[str, Any]:
+    data = json.loads(output)
+
+    return {
+        "ssid": data.get("ssid", "Unknown"),
+        "bssid": data.get("bssid", "Unknown"),
+        "ip": data.get("ip", "Unknown"),
+        "link_speed_mbps": data.get("link_speed_mbps", 0),
+        "rssi": data.get("rssi", 0),
+        "frequency_mhz": data.get("frequency_mhz", 0),
+        "network_id": data.get("network_id", -1),
+    }
+
+
+# Telephony device info almost never changes; cache it (seconds)
+DEVICE_INFO_TTL = 3600
+DEVICE_INFO_STALE_TTL = 86400
+
+
 def get_termux_device_info() -> Optional[Dict[str, Any]]:
-    """Get device telephony info using Termux:API.
+    """Get device telephony info using Termux:API (cached).
 
     Requires: pkg install termux-api && install Termux:API app from F-Droid
     """
     try:
-        result = subprocess.run(
-            ["termux-telephony-deviceinfo"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-            check=True
+        return ttl_cache.get_or_load(
+            "termux:telephony-deviceinfo", _fetch_device_info,
+            ttl=DEVICE_INFO_TTL, stale_ttl=DEVICE_INFO_STALE_TTL,
         )
+    except _TERMUX_ERRORS:
+        return None
 
-        data = json.loads(result.stdout)
 
-        return {
-            "device_id": data.get("device_id", "Unknown"),
-            "device_software_version": data.get("device_software_version", "Unknown"),
-            "phone_count": data.get("phone_count", 0),
-            "phone_type": data.get("phone_type", "Unknown"),
-            "network_operator": data.get("network_operator", "Unknown"),
-            "network_operator_name": data.get("network_operator_name", "Unknown"),
-            "network_country_iso": data.get("network_country_iso", "Unknown"),
-            "network_type": data.get("network_type", "Unknown"),
-            "sim_state": data.get("sim_state", "Unknown"),
-        }
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
-            FileNotFoundError, json.JSONDecodeError, KeyError):
-        # Termux:API not installed or not available
+async def get_termux_device_info_async() -> Optional[Dict[str, Any]]:
+    """Async variant of ``get_termux_device_info``."""
+    try:
+        return await ttl_cache.get_or_load_async(
+            "termux:telephony-deviceinfo", _fetch_device_info_async,
+            ttl=DEVICE_INFO_TTL, stale_ttl=DEVICE_INFO_STALE_TTL,
+        )
+    except _TERMUX_ERRORS:
         return None
 
 
+def _fetch_device_info() -> Dict[str, Any]:
+    return _parse_device_info(runner.run(["termux-telephony-deviceinfo"]).stdout)
+
+
+async def _fetch_device_info_async() -> Dict[str, Any]:
+    result = await runner.run_async(["termux-telephony-deviceinfo"])
+    return _parse_device_info(result.stdout)
+
+
+def _parse_device_info(output: str) -> Dict[str, Any]:
+    data = json.loads(output)
+
+    return {
+        "device_id": data.get("device_id", "Unknown"),
+        "device_software_version": data.get("device_software_version", "Unknown"),
+        "phone_count": data.get("phone_count", 0),
+        "phone_type": data.get("phone_type", "Unknown"),
+        "network_operator": data.get("network_operator", "Unknown"),
+        "network_operator_name": data.get("network_operator_name", "Unknown"),
+        "network_country_iso": data.get("network_country_iso", "Unknown"),
+        "network_type": data.get("network_type", "Unknown"),
+        "sim_state": data.get("sim_state", "Unknown"),
+    }
+
+
+_TMUX_LIST_SESSIONS = [
+    "tmux", "list-sessions", "-F", "#{session_name}:#{session_created}:#{session_attached}",
+]
+
+
 def get_tmux_sessions() -> list[Dict[str, str]]:
     """Get list of running tmux sessions."""
     try:
-        result = subprocess.run(
-            ["tmux", "list-sessions", "-F", "#{session_name}:#{session_created}:#{session_attached}"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        return _parse_tmux_sessions(runner.run(_TMUX_LIST_SESSIONS).stdout)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        return []
+
 
-        sessions = []
-        for line in result.stdout.strip().split("\n"):
-            if line:
-                name, created, attached = line.split(":")
-                sessions.append({
-                    "name": name,
-                    "created": datetime.fromtimestamp(int(created)).isoformat(),
-                    "attached": attached == "1",
-                })
-        return sessions
-    except (subprocess.CalledProcessError, FileNotFoundError):
+async def get_tmux_sessions_async() -> list[Dict[str, str]]:
+    """Async variant of ``get_tmux_sessions``."""
+    try:
+        result = await runner.run_async(_TMUX_LIST_SESSIONS)
+        return _parse_tmux_sessions(result.stdout)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
         return []
 
 
+def _parse_tmux_sessions(output: str) -> list[Dict[str, str]]:
+    sessions = []
+    for line in output.strip().split("\n"):
+        if line:
+            name, created, attached = line.split(":")
+            sessions.append({
+                "name": name,
+                "created": datetime.fromtimestamp(int(created)).isoformat(),
+                "attached": attached == "1",
+            })
+    return sessions
+
+
 def get_process_count() -> Dict[str, int]:
     """Get count of running processes by status."""
     statuses = {}
+    total = 0
 
     try:
         for proc in psutil.process_iter(['status']):
+            total += 1
             try:
                 status = proc.info['status']
                 statuses[status] = statuses.get(status, 0) + 1
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
-
-        total = len(psutil.pids())
     except (PermissionError, OSError):
         return {
             "total": 0,
@@ -331,10 +528,132 @@ def get_process_count() -> Dict[str, int]:
     }
 
 
-def _bytes_to_human_readable(bytes_value: int) -> str:
-    """Convert bytes to human readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_value < 1024.0:
-            return f"{bytes_value:.2f}{unit}"
-        bytes_value /= 1024.0
-    return f"{bytes_value:.2f}PB"
+# Attributes read for every process in the single process_iter pass
+_TOP_ATTRS = ["pid", "name", "username", "status", "create_time", "cpu_times", "memory_info", "io_counters"]
+
+# Sort keys accepted by get_top_processes
+TOP_SORT_KEYS = ("cpu", "rss", "io")
+
+
+class ProcessTracker:
+    """Per-process CPU and IO rates from the change between samples.
+
+    Previous CPU times and IO counters are kept per (pid, create_time), so
+    a process's usage is measured since the last call without sleeping.
+    Processes seen for the first time are measured over their lifetime.
+    Calls closer together than ``min_window`` seconds reuse the previous
+    sample rather than measuring over a uselessly short window.
+    """
+
+    def __init__(self, min_window: float = 0.5):
+        self.min_window = min_window
+        self._previous: Dict[int, tuple] = {}
+        self._last_time: Optional[float] = None
+        self._last_result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def sample(self) -> Dict[str, Any]:
+        """Walk the process table once.
+
+        Returns:
+            {"rows": [(cpu_percent, rss, io_bytes_per_sec, info), ...],
+             "total": int, "sample_window_seconds": float}
+        """
+        with self._lock:
+            now = time.time()
+            window = now - self._last_time if self._last_time else None
+            if window is not None and window < self.min_window and self._last_result:
+                return self._last_result
+            previous = self._previous
+            current: Dict[int, tuple] = {}
+            rows = []
+
+            for proc in psutil.process_iter(_TOP_ATTRS, ad_value=None):
+                info = proc.info
+                pid = info["pid"]
+                cpu_times = info["cpu_times"]
+                cpu_total = cpu_times.user + cpu_times.system if cpu_times else None
+                io = info["io_counters"]
+                io_total = io.read_bytes + io.write_bytes if io else None
+                created = info["create_time"]
+                current[pid] = (created, cpu_total, io_total)
+
+                cpu_percent = io_rate = None
+                prev = previous.get(pid)
+                if prev is not None and prev[0] == created and window:
+                    if cpu_total is not None and prev[1] is not None:
+                        cpu_percent = max(0.0, (cpu_total - prev[1]) / window * 100)
+                    if io_total is not None and prev[2] is not None:
+                        io_rate = max(0.0, (io_total - prev[2]) / window)
+                elif created and cpu_total is not None:
+                    # First sighting: average over the process's lifetime
+                    lifetime = now - created
+                    if lifetime > 0:
+                        cpu_percent = cpu_total / lifetime * 100
+
+                memory = info["memory_info"]
+                rows.append((cpu_percent, memory.rss if memory else None, io_rate, info))
+
+            self._previous = current
+            self._last_time = now
+            self._last_result = {
+                "rows": rows,
+                "total": len(rows),
+                "sample_window_seconds": round(window, 3) if window else None,
+            }
+            return self._last_result
+
+
+# Shared so successive calls measure against each other
+_process_tracker = ProcessTracker()
+
+
+def get_top_processes(count: int = 10, sort: str = "cpu") -> Dict[str, Any]:
+    """Get the top ``count`` processes by CPU, resident memory or IO.
+
+    CPU and IO are rates since the previous call (CPU percent of one core,
+    IO in bytes/s). Only the winners are formatted; the rest are ranked
+    with a heap without building their result dicts.
+
+    Raises:
+        ValueError: Unknown sort key.
+    """
+    if sort not in TOP_SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort} (use one of {', '.join(TOP_SORT_KEYS)})")
+
+    try:
+        sample = _process_tracker.sample()
+    except (PermissionError, OSError):
+        return {"processes": [], "total": 0, "sort": sort, "error": "Permission denied"}
+
+    index = TOP_SORT_KEYS.index(sort)
+    top = heapq.nlargest(count, sample["rows"], key=lambda row: row[index] or 0)
+
+    processes = []
+    for cpu_percent, rss, io_rate, info in top:
+        processes.append({
+            "pid": info["pid"],
+            "name": info["name"],
+            "username": info["username"],
+            "status": info["status"],
+            "cpu_percent": round(cpu_percent, 1) if cpu_percent is not None else None,
+            "memory_rss": rss,
+            "io_bytes_per_sec": round(io_rate, 1) if io_rate is not None else None,
+        })
+
+    return {
+        "processes": processes,
+        "total": sample["total"],
+        "sort": sort,
+        "sample_window_seconds": sample["sample_window_seconds"],
+    }
+
+
+def format_top_processes(top: Dict[str, Any]) -> Dict[str, Any]:
+    """Format raw ``get_top_processes`` output for humans."""
+    return {
+        **top,
+        "processes": [humanize_bytes(p, ("memory_rss",)) for p in top["processes"]],
+    }
+
+
@@ -0,0 +1,213 @@
+"""Tailscale status from a single ``tailscale status --json`` call.
+
+The status JSON already carries this node's addresses (``Self.TailscaleIPs``)
+and per-peer details, so one fork serves the VPN status, the Tailscale IP
+and the peer list. ``TailscaleCollector`` parses it once into
+``TailscaleStatus`` and reuses it for ``ttl`` seconds; concurrent callers
+share a single in-flight call.
+"""
+
+import asyncio
+import json
+import subprocess
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from droidvm_tools.tools import runner
+
+# How long one `tailscale status --json` result is reused
+TAILSCALE_TTL = 5.0
+
+# Go's zero time, sent for peers that have never been seen
+_ZERO_TIME = "0001-01-01T00:00:00Z"
+
+# Errors meaning tailscale is missing, hung, stopped or printed garbage
+_TAILSCALE_ERRORS = (
+    subprocess.CalledProcessError,
+    subprocess.TimeoutExpired,
+    FileNotFoundError,
+    json.JSONDecodeError,
+)
+
+
+def _timestamp(value: Optional[str]) -> Optional[str]:
+    return None if not value or value == _ZERO_TIME else value
+
+
+@dataclass
+class TailscalePeer:
+    """One node of the tailnet as seen from this device."""
+
+    id: str
+    hostname: str
+    dns_name: str
+    os: str
+    tailscale_ips: List[str]
+    online: bool
+    active: bool
+    # "direct" (peer-to-peer UDP), "relay" (through a DERP server) or "idle"
+    connection: str
+    # DERP region used when relayed
+    relay: Optional[str]
+    # Peer's endpoint for direct connections
+    address: Optional[str]
+    rx_bytes: int
+    tx_bytes: int
+    last_seen: Optional[str]
+    last_handshake: Optional[str]
+    exit_node: bool
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "TailscalePeer":
+        address = data.get("CurAddr") or None
+        relay = data.get("Relay") or None
+        if address:
+            connection = "direct"
+        elif relay and data.get("Active"):
+            connection = "relay"
+        else:
+            connection = "idle"
+
+        return cls(
+            id=str(data.get("ID", "")),
+            hostname=data.get("HostName", ""),
+            dns_name=data.get("DNSName", "").rstrip("."),
+            os=data.get("OS", ""),
+            tailscale_ips=list(data.get("TailscaleIPs") or []),
+            online=bool(data.get("Online")),
+            active=bool(data.get("Active")),
+            connection=connection,
+            relay=relay,
+            address=address,
+            rx_bytes=int(data.get("RxBytes", 0)),
+            tx_bytes=int(data.get("TxBytes", 0)),
+            last_seen=_timestamp(data.get("LastSeen")),
+            last_handshake=_timestamp(data.get("LastHandshake")),
+            exit_node=bool(data.get("ExitNode")),
+        )
+
+    @property
+    def ipv4(self) -> Optional[str]:
+        return next((ip for ip in self.tailscale_ips if "." in ip), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class TailscaleStatus:
+    """Parsed ``tailscale status --json``."""
+
+    backend_state: str
+    version: Optional[str] = None
+    tailnet: Optional[str] = None
+    self: Optional[TailscalePeer] = None
+    peers: List[TailscalePeer] = field(default_factory=list)
+    health: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "TailscaleStatus":
+        self_data = data.get("Self")
+        tailnet = data.get("CurrentTailnet") or {}
+        return cls(
+            backend_state=data.get("BackendState", "Unknown"),
+            version=data.get("Version"),
+            tailnet=tailnet.get("Name"),
+            self=TailscalePeer.from_json(self_data) if self_data else None,
+            peers=[TailscalePeer.from_json(peer) for peer in (data.get("Peer") or {}).values()],
+            health=list(data.get("Health") or []),
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self.backend_state == "Running"
+
+    @property
+    def tailscale_ip(self) -> Optional[str]:
+        """This node's Tailscale IPv4 address."""
+        return self.self.ipv4 if self.self else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Overview served by ``/network/tailscale``."""
+        return {
+            "connected": self.connected,
+            "backend_state": self.backend_state,
+            "version": self.version,
+            "tailnet": self.tailnet,
+            "tailscale_ip": self.tailscale_ip,
+            "self": self.self.to_dict() if self.self else None,
+            "peers": len(self.peers),
+            "peers_online": sum(1 for peer in self.peers if peer.online),
+            "health": self.health,
+        }
+
+
+class TailscaleCollector:
+    """Runs ``tailscale status --json`` at most once per ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = TAILSCALE_TTL):
+        self.ttl = ttl
+        self._status: Optional[TailscaleStatus] = None
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # One in-flight call per event loop
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def status(self) -> Optional[TailscaleStatus]:
+        """Current status, or None if tailscale is not installed or running."""
+        with self._lock:
+            if not self._fresh():
+                try:
+                    result = runner.run(["tailscale", "status", "--json"])
+                    self._store(_parse(result.stdout))
+                except _TAILSCALE_ERRORS:
+                    self._store(None)
+            return self._status
+
+    async def status_async(self) -> Optional[TailscaleStatus]:
+        """Async variant of ``status``."""
+        if self._fresh():
+            return self._status
+
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(loop)
+        if task is None or task.done():
+            task = self._inflight[loop] = loop.create_task(self._fetch_async())
+        return await asyncio.shield(task)
+
+    def invalidate(self) -> None:
+        self._fetched_at = None
+
+    async def _fetch_async(self) -> Optional[TailscaleStatus]:
+        try:
+            result = await runner.run_async(["tailscale", "status", "--json"])
+            status = _parse(result.stdout)
+        except _TAILSCALE_ERRORS:
+            status = None
+        self._store(status)
+        return status
+
+    def _fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def _store(self, status: Optional[TailscaleStatus]) -> None:
+        self._status = status
+        self._fetched_at = time.monotonic()
+
+
+def _parse(output: str) -> TailscaleStatus:
+    return TailscaleStatus.from_json(json.loads(output))
+
+
+def sort_peers(peers: List[TailscalePeer]) -> List[TailscalePeer]:
+    """Online peers first, then by hostname."""
+    return sorted(peers, key=lambda peer: (not peer.online, peer.hostname.lower()))
+
+
+# Shared by the network helpers, the collector and the API
+tailscale_collector = TailscaleCollector()
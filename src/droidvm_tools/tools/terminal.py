@@ -1,8 +1,13 @@
 """Terminal command execution utilities."""
 
+import asyncio
+import os
+import signal
 import subprocess
 import time
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional
+
+from droidvm_tools.tools.policy import DEFAULT_ARGUMENT_RULES, Policy, PolicyEngine
 
 
 # Whitelist of safe commands for Termux mode
@@ -33,8 +38,8 @@ SAFE_COMMANDS = [
     "getprop",
 ]
 
-# Blocked patterns for security
-BLOCKED_PATTERNS = [
+# Commands that are never allowed, wherever they appear in a pipeline
+BLOCKED_COMMANDS = [
     "rm",
     "dd",
     "mkfs",
@@ -47,9 +52,51 @@ BLOCKED_PATTERNS = [
     "chown",
 ]
 
+# Loaded once; DROIDVM_POLICY_FILE overrides these defaults and is
+# reloaded when it changes
+policy_engine = PolicyEngine(
+    Policy(allow=SAFE_COMMANDS, deny=BLOCKED_COMMANDS, rules=DEFAULT_ARGUMENT_RULES)
+)
+
 # Maximum output lines to prevent huge responses
 MAX_OUTPUT_LINES = 1000
 
+# Maximum output bytes read from a streamed command before it is killed
+MAX_OUTPUT_BYTES = 1024 * 1024
+
+# Longer lines are split so a single line can't grow without bound
+MAX_LINE_BYTES = 64 * 1024
+
+# Buffered lines per stream before the reader stops draining the pipe
+_QUEUE_SIZE = 64
+
+
+def validate_termux_command(command: str, extra_commands: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """Check a command against the command policy.
+
+    Args:
+        command: The shell command to check
+        extra_commands: Commands allowed on top of the policy's allow list
+
+    Returns:
+        An error result (output, exit_code, error, policy) if the command
+        is rejected, None if it may run.
+    """
+    decision = policy_engine.check(command, extra_commands)
+    if decision.allowed:
+        return None
+
+    if decision.rule == "allow":
+        message = f"Command '{decision.binary}' is not allowed for security reasons."
+    else:
+        message = decision.reason
+    return {
+        "output": [message],
+        "exit_code": 1,
+        "error": decision.reason,
+        "policy": decision.to_dict(),
+    }
+
 
 def execute_termux_command(command: str, timeout: int = 30) -> Dict[str, Any]:
     """Execute a real shell command on the Termux system.
@@ -64,33 +111,9 @@ def execute_termux_command(command: str, timeout: int = 30) -> Dict[str, Any]:
     # Validate timeout
     timeout = min(timeout, 60)
 
-    # Parse command to get the base command
-    cmd_parts = command.strip().split()
-    if not cmd_parts:
-        return {
-            "output": ["Error: Empty command"],
-            "exit_code": 1,
-            "error": "Empty command",
-        }
-
-    base_cmd = cmd_parts[0]
-
-    # Check if command is in whitelist
-    if base_cmd not in SAFE_COMMANDS:
-        return {
-            "output": [f"Command '{base_cmd}' is not allowed for security reasons."],
-            "exit_code": 1,
-            "error": f"Command not whitelisted: {base_cmd}",
-        }
-
-    # Check for blocked patterns
-    for pattern in BLOCKED_PATTERNS:
-        if pattern in command.lower():
-            return {
-                "output": [f"Command contains blocked pattern: {pattern}"],
-                "exit_code": 1,
-                "error": f"Blocked pattern detected: {pattern}",
-            }
+    rejected = validate_termux_command(command)
+    if rejected:
+        return rejected
 
     # Execute command
     start_time = time.time()
@@ -143,6 +166,179 @@ def execute_termux_command(command: str, timeout: int = 30) -> Dict[str, Any]:
         }
 
 
+async def stream_termux_command(
+    command: str,
+    timeout: int = 30,
+    max_lines: int = MAX_OUTPUT_LINES,
+    max_bytes: int = MAX_OUTPUT_BYTES,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run a whitelisted shell command, yielding output as it is produced.
+
+    Yields ``{"type": "stdout"|"stderr"|"message", "line": str}`` events,
+    where "message" lines come from this function (rejections, timeouts,
+    truncation), followed by one final ``{"type": "exit", "exit_code": int,
+    "execution_time_ms": int}`` event. The exit event also carries "error"
+    when the command was rejected or timed out, and ``"truncated": True``
+    when an output limit was hit.
+
+    Limits are checked while reading: the command's process group is killed
+    as soon as it exceeds ``max_lines``, ``max_bytes`` or ``timeout``, or
+    when the consumer stops iterating.
+    """
+    timeout = min(timeout, 60)
+    start_time = time.time()
+
+    rejected = validate_termux_command(command)
+    if rejected:
+        for line in rejected["output"]:
+            yield {"type": "message", "line": line}
+        yield {
+            "type": "exit",
+            "exit_code": rejected["exit_code"],
+            "error": rejected["error"],
+            "execution_time_ms": 0,
+        }
+        return
+
+    try:
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Own process group, so children of the shell are killed too
+            start_new_session=True,
+        )
+    except Exception as e:
+        yield {"type": "message", "line": f"Error executing command: {str(e)}"}
+        yield {"type": "exit", "exit_code": 1, "error": str(e), "execution_time_ms": 0}
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(_QUEUE_SIZE)
+    readers = [
+        asyncio.create_task(_pump(proc.stdout, "stdout", queue)),
+        asyncio.create_task(_pump(proc.stderr, "stderr", queue)),
+    ]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    lines = 0
+    bytes_read = 0
+    open_streams = len(readers)
+    notice = None
+    exit_event: Dict[str, Any] = {"type": "exit"}
+
+    try:
+        while open_streams:
+            try:
+                item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                notice = f"Command timed out after {timeout} seconds"
+                exit_event.update(exit_code=124, error="Timeout")
+                break
+
+            if item is None:
+                open_streams -= 1
+                continue
+
+            stream, data = item
+            lines += 1
+            bytes_read += len(data) + 1
+            if lines > max_lines or bytes_read > max_bytes:
+                limit = f"{max_lines} lines" if lines > max_lines else f"{max_bytes} bytes"
+                notice = f"... (output truncated at {limit}, command stopped)"
+                exit_event["truncated"] = True
+                break
+
+            yield {"type": stream, "line": data.decode(errors="replace").rstrip("\r")}
+
+        if notice is None:
+            try:
+                await asyncio.wait_for(proc.wait(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                notice = f"Command timed out after {timeout} seconds"
+                exit_event.update(exit_code=124, error="Timeout")
+    finally:
+        # Also reached when the consumer disconnects mid-stream
+        if proc.returncode is None:
+            _kill_process_group(proc)
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await proc.wait()
+
+    if notice:
+        yield {"type": "message", "line": notice}
+    exit_event.setdefault("exit_code", proc.returncode)
+    exit_event["execution_time_ms"] = int((time.time() - start_time) * 1000)
+    yield exit_event
+
+
+async def _pump(reader: asyncio.StreamReader, stream: str, queue: asyncio.Queue) -> None:
+    """Split a pipe into lines and queue them, then queue None at EOF."""
+    pending = b""
+    try:
+        while True:
+            chunk = await reader.read(MAX_LINE_BYTES)
+            if not chunk:
+                break
+            *complete, pending = (pending + chunk).split(b"\n")
+            for line in complete:
+                await queue.put((stream, line))
+            if len(pending) >= MAX_LINE_BYTES:
+                await queue.put((stream, pending))
+                pending = b""
+        if pending:
+            await queue.put((stream, pending))
+    except (OSError, ValueError):
+        pass
+    await queue.put(None)
+
+
+def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def execute_termux_command_async(command: str, timeout: int = 30) -> Dict[str, Any]:
+    """Async variant of ``execute_termux_command``.
+
+    Built on ``stream_termux_command``, so output limits are enforced while
+    reading instead of after the whole output has been buffered.
+    """
+    events = [event async for event in stream_termux_command(command, timeout)]
+    return build_result(events)
+
+
+def build_result(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn ``stream_termux_command`` events into an ``execute_termux_command`` result."""
+    output = []
+    stderr_lines = []
+    result: Dict[str, Any] = {}
+
+    for event in events:
+        kind = event["type"]
+        if kind == "stderr":
+            stderr_lines.append(event["line"])
+        elif kind == "exit":
+            result = {k: v for k, v in event.items() if k != "type"}
+        else:
+            output.append(event["line"])
+
+    # Strip trailing blank lines like the buffered variant does
+    while output and not output[-1]:
+        output.pop()
+
+    if stderr_lines and result.get("exit_code") != 0:
+        output.extend([f"Error: {line}" for line in stderr_lines if line])
+
+    return {"output": output if output else [""], **result}
+
+
 def execute_typescript_command(command: str) -> Dict[str, Any]:
     """Execute a command in TypeScript mode (hardcoded responses).
 
@@ -327,3 +523,4 @@ def execute_command(
     result["command"] = command
 
     return result
+
@@ -0,0 +1,246 @@
+"""On-device metric history in fixed-size ring buffers.
+
+Every metric is kept at three resolutions: 1 s for the last hour, 1 min for
+the last day and 1 h for the last week. Values live in ``array('d')``
+buffers that are allocated once (about 42 KB per metric), so memory use is
+fixed no matter how long the server runs. Coarser tiers are rolled up as
+samples arrive: each 1 min / 1 h slot holds the running average of the 1 s
+samples that fall into it.
+"""
+
+import math
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from droidvm_tools.tools.backends import get_backend
+from droidvm_tools.tools.system import CpuUsageTracker
+
+# (resolution seconds, number of slots) per tier, finest first
+TIERS: List[Tuple[int, int]] = [
+    (1, 3600),     # 1 s for 1 hour
+    (60, 1440),    # 1 min for 24 hours
+    (3600, 168),   # 1 h for 7 days
+]
+
+# Upper bound on points returned by one query
+MAX_POINTS = 2000
+
+_NAN = float("nan")
+
+
+class RingSeries:
+    """Fixed-width ring buffer of float samples at one resolution."""
+
+    __slots__ = ("resolution", "capacity", "values", "last_slot", "_sum", "_count")
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.values = array("d", [_NAN]) * capacity
+        self.last_slot: Optional[int] = None
+        # Running sum/count for the newest slot (used for rollups)
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Fold a sample into its slot, averaging samples that share a slot."""
+        slot = int(timestamp // self.resolution)
+        last = self.last_slot
+
+        if last is not None:
+            if slot < last:
+                # Out-of-order samples are dropped
+                return
+            if slot > last:
+                # Blank out slots skipped while no samples arrived
+                for skipped in range(last + 1, min(slot, last + self.capacity + 1)):
+                    self.values[skipped % self.capacity] = _NAN
+                self._sum = 0.0
+                self._count = 0
+
+        self._sum += value
+        self._count += 1
+        self.values[slot % self.capacity] = self._sum / self._count
+        self.last_slot = slot
+
+    def get(self, slot: int) -> float:
+        """Value at an absolute slot index, NaN if missing or expired."""
+        last = self.last_slot
+        if last is None or slot > last or slot <= last - self.capacity:
+            return _NAN
+        return self.values[slot % self.capacity]
+
+    def oldest_timestamp(self) -> Optional[float]:
+        """Start of the oldest slot still retained."""
+        if self.last_slot is None:
+            return None
+        return (self.last_slot - self.capacity + 1) * self.resolution
+
+
+class MetricHistory:
+    """Multi-resolution history for a set of named metrics."""
+
+    def __init__(self, tiers: List[Tuple[int, int]] = TIERS):
+        self.tiers = tiers
+        self._series: Dict[str, List[RingSeries]] = {}
+
+    def metrics(self) -> List[str]:
+        """Names of all recorded metrics."""
+        return sorted(self._series)
+
+    def record(self, name: str, value: Optional[float], timestamp: Optional[float] = None) -> None:
+        """Record one sample for ``name`` into every tier."""
+        if value is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = [RingSeries(res, cap) for res, cap in self.tiers]
+        for tier in series:
+            tier.add(timestamp, float(value))
+
+    def query(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        step: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Downsample ``name`` between ``start`` and ``end`` into ``step`` buckets.
+
+        Uses the finest tier that still covers ``start`` and whose resolution
+        is no coarser than ``step``. Buckets are averaged straight from the
+        ring buffers without copying them.
+
+        Raises:
+            KeyError: Unknown metric.
+            ValueError: Invalid range, or too many points requested.
+        """
+        series = self._series[name]
+        if end <= start:
+            raise ValueError("'to' must be after 'from'")
+        if step is None:
+            step = max(1, (end - start) / 360)
+
+        tier = self._pick_tier(series, start, step)
+        resolution = tier.resolution
+        # Buckets are whole multiples of the tier resolution
+        step = max(resolution, int(step // resolution) * resolution)
+
+        first = int(start // step) * step
+        count = math.ceil((end - first) / step)
+        if count > MAX_POINTS:
+            raise ValueError(
+                f"Query would return {count} points (max {MAX_POINTS}); use a larger step"
+            )
+
+        slots_per_step = step // resolution
+        points = []
+        for bucket in range(first, first + count * step, step):
+            total = 0.0
+            seen = 0
+            slot = bucket // resolution
+            for offset in range(slots_per_step):
+                value = tier.get(slot + offset)
+                if value == value:  # skip NaN
+                    total += value
+                    seen += 1
+            points.append([bucket, round(total / seen, 3) if seen else None])
+
+        return {
+            "metric": name,
+            "from": first,
+            "to": first + count * step,
+            "step": step,
+            "resolution": resolution,
+            "points": points,
+        }
+
+    def _pick_tier(self, series: List[RingSeries], start: float, step: float) -> RingSeries:
+        # A tier "retains" start if its oldest slot is at most one slot later:
+        # a full 1 s tier holds 3600 slots ending now, so its oldest slot is
+        # always just after now-3600 and "the last hour" would otherwise
+        # never fit in it
+        def retains(tier: RingSeries) -> bool:
+            oldest = tier.oldest_timestamp()
+            return oldest is not None and oldest <= start + tier.resolution
+
+        # Finest tier that fits the step and still retains ``start``...
+        for tier in series:
+            if tier.resolution <= step and retains(tier):
+                return tier
+        # ...else the finest tier retaining ``start`` (coarser than asked)
+        for tier in series:
+            if retains(tier):
+                return tier
+        return series[-1]
+
+
+class HistoryRecorder:
+    """Samples the history metrics; meant to run once per second.
+
+    CPU and network usage are measured against the previous call with
+    trackers of their own, so the shared CPU baseline is left alone.
+    Battery and temperature come from the collector's latest battery
+    sample to avoid forking Termux:API.
+    """
+
+    def __init__(self, history: MetricHistory, collector=None):
+        self.history = history
+        self.collector = collector
+        self._cpu = CpuUsageTracker(min_window=0)
+        self._last_net = None
+        self._last_time: Optional[float] = None
+
+    def record(self) -> Dict[str, Any]:
+        """Take one sample of every history metric."""
+        now = time.time()
+        record = self.history.record
+
+        try:
+            usage = self._cpu.sample()
+            # The first sample covers the time since boot; skip it
+            if self._last_time is not None:
+                record("cpu", usage["cpu_usage_percent"], now)
+                for i, percent in enumerate(usage["cpu_usage_per_core"]):
+                    record(f"cpu.core{i}", percent, now)
+        except (PermissionError, OSError):
+            pass
+
+        try:
+            record("memory", get_backend().memory()["percentage"], now)
+        except (PermissionError, OSError):
+            pass
+
+        try:
+            net = get_backend().net_io_counters()
+            if self._last_net is not None and self._last_time is not None:
+                elapsed = now - self._last_time
+                if elapsed > 0:
+                    sent = net.bytes_sent - self._last_net.bytes_sent
+                    recv = net.bytes_recv - self._last_net.bytes_recv
+                    # Negative deltas mean the counters were reset
+                    if sent >= 0:
+                        record("net.bytes_sent", sent / elapsed, now)
+                    if recv >= 0:
+                        record("net.bytes_recv", recv / elapsed, now)
+            self._last_net = net
+        except (PermissionError, OSError, AttributeError):
+            pass
+
+        battery = self._latest("battery")
+        if battery:
+            record("battery", battery.get("percentage"), now)
+            record("temperature", battery.get("temperature"), now)
+
+        self._last_time = now
+        return {"metrics": len(self.history.metrics())}
+
+    def _latest(self, family: str) -> Optional[Dict[str, Any]]:
+        if self.collector is None:
+            return None
+        sample = self.collector.snapshot().get(family)
+        return sample.data if sample else None
@@ -0,0 +1,109 @@
+"""Tests for the /proc and /sys metric backend."""
+
+import os
+
+import pytest
+
+from droidvm_tools.tools.backends import ProcfsBackend, create_backend
+
+PROC_STAT = """\
+cpu  100 0 50 800 50 0 0 0 0 0
+cpu0 60 0 30 400 10 0 0 0 0 0
+cpu1 40 0 20 400 40 0 0 0 0 0
+intr 12345
+btime 1700000000
+"""
+
+MEMINFO = """\
+MemTotal:        1000 kB
+MemFree:          200 kB
+MemAvailable:     600 kB
+Buffers:           50 kB
+Cached:           250 kB
+SwapTotal:        400 kB
+SwapFree:         300 kB
+"""
+
+NET_DEV = """\
+Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:     100       1    0    0    0     0          0         0      100       1    0    0    0     0       0          0
+ wlan0:    5000      50    1    2    0     0          0         0     3000      30    3    4    0     0       0          0
+"""
+
+
+def _write(root, path, content):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def fake_root(tmp_path):
+    root = str(tmp_path)
+    _write(root, "proc/stat", PROC_STAT)
+    _write(root, "proc/meminfo", MEMINFO)
+    _write(root, "proc/net/dev", NET_DEV)
+    _write(root, "proc/self/mounts", "/dev/block/dm-0 /data ext4 rw 0 0\nfuse /storage/my\\040files fuse rw 0 0\n")
+    _write(root, "sys/class/power_supply/battery/type", "Battery\n")
+    _write(root, "sys/class/power_supply/battery/capacity", "87\n")
+    _write(root, "sys/class/power_supply/battery/status", "Discharging\n")
+    _write(root, "sys/class/power_supply/battery/temp", "312\n")
+    _write(root, "sys/class/power_supply/usb/type", "USB\n")
+    _write(root, "sys/class/power_supply/usb/online", "1\n")
+    _write(root, "sys/class/thermal/thermal_zone0/type", "cpu-0\n")
+    _write(root, "sys/class/thermal/thermal_zone0/temp", "45500\n")
+    return root
+
+
+def test_probe_and_parse(fake_root):
+    """Readable sources are detected once and parsed like psutil would."""
+    backend = create_backend("procfs", root=fake_root)
+    assert all(backend.sources.values())
+
+    total, per_core = backend.cpu_times()
+    assert len(per_core) == 2
+    assert total.idle == 800 / os.sysconf("SC_CLK_TCK")
+    assert backend.boot_time() == 1700000000
+
+    memory = backend.memory()
+    assert memory["total"] == 1000 * 1024
+    assert memory["used"] == 400 * 1024
+    assert memory["percentage"] == 40.0
+    assert memory["swap_percentage"] == 25.0
+
+    wlan = backend.net_io_counters(pernic=True)["wlan0"]
+    assert (wlan.bytes_recv, wlan.bytes_sent, wlan.dropout) == (5000, 3000, 4)
+    assert backend.net_io_counters().bytes_recv == 5100
+
+    mounts = backend.disk_partitions()
+    assert mounts[1].mountpoint == "/storage/my files"
+
+    battery = backend.battery()
+    assert battery["percentage"] == 87
+    assert battery["power_plugged"] is True
+    assert battery["temperature"] == 31.2
+    assert backend.temperatures() == {"cpu-0": 45.5}
+
+
+def test_handles_are_reused_and_rewound(fake_root):
+    """One handle per source sees the file's current contents on each read."""
+    backend = create_backend("procfs", root=fake_root)
+    backend.memory()
+    handle = backend._files[os.path.join(fake_root, "proc/meminfo")]
+
+    # Rewritten in place, like the kernel regenerating it
+    _write(fake_root, "proc/meminfo", MEMINFO.replace("MemAvailable:     600", "MemAvailable:     900"))
+    assert backend.memory()["available"] == 900 * 1024
+    assert backend._files[os.path.join(fake_root, "proc/meminfo")] is handle
+
+
+def test_unreadable_sources_fall_back_to_psutil(tmp_path):
+    backend = create_backend("procfs", root=str(tmp_path))
+    assert not any(backend.sources.values())
+    # Served by psutil on this host
+    assert backend.memory()["total"] > 0
+
+    with pytest.raises(ValueError):
+        create_backend("sysctl")
@@ -0,0 +1,94 @@
+"""Tests for the TTL cache."""
+
+import time
+
+import pytest
+
+from droidvm_tools.tools.cache import TTLCache
+
+
+def test_fresh_entries_are_served_from_cache():
+    """Loader runs once while the entry is fresh."""
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_load("key", loader, ttl=60) == "value"
+    assert cache.get_or_load("key", loader, ttl=60) == "value"
+
+    assert len(calls) == 1
+    stats = cache.stats()["keys"]["key"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_stale_entries_are_revalidated_in_background():
+    """Expired entries within stale_ttl return the old value immediately."""
+    cache = TTLCache()
+    values = iter(["old", "new"])
+
+    cache.get_or_load("key", lambda: next(values), ttl=0, stale_ttl=60)
+    assert cache.get_or_load("key", lambda: next(values), ttl=0, stale_ttl=60) == "old"
+
+    deadline = time.monotonic() + 2
+    while cache.stats()["keys"]["key"]["loads"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats()["keys"]["key"]["stale_hits"] == 1
+    assert cache.stats()["keys"]["key"]["loads"] == 2
+
+
+def test_missing_binary_is_negatively_cached():
+    """FileNotFoundError is remembered instead of retried on every call."""
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        raise FileNotFoundError("termux-telephony-deviceinfo")
+
+    assert cache.get_or_load("device", loader, ttl=60) is None
+    assert cache.get_or_load("device", loader, ttl=60) is None
+
+    assert len(calls) == 1
+    assert cache.stats()["keys"]["device"]["negative_hits"] == 1
+
+
+def test_other_errors_are_not_cached():
+    """Transient failures propagate and are retried on the next call."""
+    cache = TTLCache()
+
+    def loader():
+        raise TimeoutError()
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            cache.get_or_load("key", loader, ttl=60)
+    assert cache.stats()["keys"]["key"]["errors"] == 2
+
+
+def test_invalidate_forces_reload():
+    """Invalidated keys are loaded again."""
+    cache = TTLCache()
+    values = iter([1, 2])
+
+    cache.get_or_load("key", lambda: next(values), ttl=60)
+    assert cache.invalidate("key") == 1
+    assert cache.get_or_load("key", lambda: next(values), ttl=60) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_loader_is_cached():
+    """The async variant shares the same entries and counters."""
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return "ip"
+
+    assert await cache.get_or_load_async("public_ip", loader, ttl=60) == "ip"
+    assert await cache.get_or_load_async("public_ip", loader, ttl=60) == "ip"
+    assert len(calls) == 1
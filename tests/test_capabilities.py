@@ -0,0 +1,67 @@
+"""Tests for the command capability registry."""
+
+import sys
+
+import pytest
+
+from droidvm_tools.tools import capabilities as capabilities_module
+from droidvm_tools.tools.capabilities import (
+    AVAILABLE,
+    HALF_OPEN,
+    MISSING,
+    OPEN,
+    CapabilityRegistry,
+    CapabilityUnavailable,
+)
+
+
+def test_missing_binary_is_rejected_without_lookup(monkeypatch):
+    """After the first probe a missing binary costs no PATH search."""
+    registry = CapabilityRegistry()
+    registry.probe(["droidvm-not-installed"])
+
+    monkeypatch.setattr(capabilities_module, "_which", lambda binary: pytest.fail("probed again"))
+    with pytest.raises(CapabilityUnavailable) as excinfo:
+        registry.acquire("droidvm-not-installed")
+    assert isinstance(excinfo.value, FileNotFoundError)
+    assert registry.states()["droidvm-not-installed"]["state"] == MISSING
+
+
+def test_breaker_opens_after_timeouts_and_backs_off(monkeypatch):
+    """Repeated timeouts disable a command with a doubling backoff."""
+    clock = [1000.0]
+    monkeypatch.setattr(capabilities_module.time, "monotonic", lambda: clock[0])
+    registry = CapabilityRegistry(failure_threshold=2, base_backoff=10, max_backoff=25)
+    registry.probe([sys.executable])
+
+    for _ in range(2):
+        registry.acquire(sys.executable)
+        registry.release(sys.executable, timed_out=True)
+
+    state = registry.states()[sys.executable]
+    assert state["state"] == OPEN
+    assert state["retry_after_seconds"] == 10
+    with pytest.raises(CapabilityUnavailable):
+        registry.acquire(sys.executable)
+
+    # One trial call once the backoff has passed; others wait for it
+    clock[0] += 10
+    registry.acquire(sys.executable)
+    assert registry.states()[sys.executable]["state"] == HALF_OPEN
+    with pytest.raises(CapabilityUnavailable):
+        registry.acquire(sys.executable)
+
+    # The trial timed out too: backoff doubles, capped at max_backoff
+    registry.release(sys.executable, timed_out=True)
+    assert registry.states()[sys.executable]["retry_after_seconds"] == 20
+    clock[0] += 20
+    registry.acquire(sys.executable)
+    registry.release(sys.executable, timed_out=True)
+    assert registry.states()[sys.executable]["retry_after_seconds"] == 25
+
+    # A successful trial closes the breaker
+    clock[0] += 25
+    registry.acquire(sys.executable)
+    registry.release(sys.executable)
+    assert registry.states()[sys.executable]["state"] == AVAILABLE
+    assert registry.states()[sys.executable]["consecutive_timeouts"] == 0
@@ -0,0 +1,58 @@
+"""Tests for the command-line interface."""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from droidvm_tools import cli
+from droidvm_tools import client as client_module
+from droidvm_tools.server import app
+
+runner = CliRunner()
+
+
+def test_memory_command():
+    """One-shot commands print once and exit."""
+    result = runner.invoke(cli.app, ["memory"])
+    assert result.exit_code == 0
+    assert "Memory Information" in result.output
+
+
+def test_watch_redraws_until_interrupted(monkeypatch):
+    """Watch mode re-renders each tick and stops cleanly on Ctrl-C."""
+    calls = []
+    ticks = iter([None, None, KeyboardInterrupt()])
+
+    def fake_sleep(interval):
+        tick = next(ticks)
+        if tick is not None:
+            raise tick
+
+    monkeypatch.setattr(cli.time, "sleep", fake_sleep)
+    cli._watch(lambda: calls.append(1) or f"tick {len(calls)}", 1.0)
+    assert len(calls) == 3
+
+
+def test_watch_rejects_short_interval():
+    result = runner.invoke(cli.app, ["cpu", "--watch", "0.1"])
+    assert result.exit_code != 0
+
+
+
+def test_remote_mode_reads_from_server(monkeypatch):
+    """--remote answers from the server instead of collecting locally."""
+    Client = client_module.Client
+    monkeypatch.setattr(client_module, "Client", lambda **kwargs: Client(http=TestClient(app)))
+    monkeypatch.setattr(cli, "_system", lambda: pytest.fail("collected locally"))
+
+    result = runner.invoke(cli.app, ["--remote", "status", "--json"])
+    assert result.exit_code == 0, result.output
+    assert "sampled_at" in json.loads(result.output)
+
+
+def test_remote_mode_reports_unreachable_server():
+    result = runner.invoke(cli.app, ["--url", "http://127.0.0.1:1", "memory"])
+    assert result.exit_code == 1
+    assert "Cannot reach server" in result.output
@@ -0,0 +1,106 @@
+"""Tests for the background metrics collector."""
+
+import json
+
+import pytest
+
+from droidvm_tools.tools.collector import (
+    MetricFamily,
+    MetricsCollector,
+    SnapshotPublisher,
+    merge_patch,
+)
+
+
+def _counting_family(name="counter", interval=60):
+    calls = {"count": 0}
+
+    def sampler():
+        calls["count"] += 1
+        return {"value": calls["count"]}
+
+    return MetricFamily(name, sampler, interval=interval), calls
+
+
+@pytest.mark.asyncio
+async def test_read_reuses_fresh_sample():
+    """Reads within max_age are served from the snapshot."""
+    family, calls = _counting_family()
+    collector = MetricsCollector([family])
+
+    first = await collector.read("counter")
+    second = await collector.read("counter")
+
+    assert first is second
+    assert calls["count"] == 1
+    assert "sampled_at" in first.meta()
+
+
+@pytest.mark.asyncio
+async def test_read_refreshes_stale_sample():
+    """Samples older than max_age are refreshed on read."""
+    family, calls = _counting_family(interval=0)
+    collector = MetricsCollector([family])
+
+    await collector.read("counter")
+    sample = await collector.read("counter")
+
+    assert calls["count"] == 2
+    assert sample.data == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_good_sample():
+    """A failing sampler serves the previous value flagged with the error."""
+    state = {"fail": False}
+
+    def sampler():
+        if state["fail"]:
+            raise RuntimeError("boom")
+        return 42
+
+    collector = MetricsCollector([MetricFamily("flaky", sampler, interval=0)])
+    await collector.read("flaky")
+
+    state["fail"] = True
+    sample = await collector.read("flaky")
+
+    assert sample.data == 42
+    assert sample.meta()["error"] == "boom"
+
+
+@pytest.mark.asyncio
+async def test_unknown_family_raises():
+    """Reading an unregistered family is an error."""
+    collector = MetricsCollector([])
+    with pytest.raises(KeyError):
+        await collector.read("missing")
+
+
+def test_merge_patch_contains_only_changes():
+    """Patches carry changed and removed fields only."""
+    old = {"cpu": {"usage": 10, "cores": 8}, "battery": {"percentage": 50}, "gone": 1}
+    new = {"cpu": {"usage": 20, "cores": 8}, "battery": {"percentage": 50}}
+
+    assert merge_patch(old, new) == {"cpu": {"usage": 20}, "gone": None}
+    assert merge_patch(new, new) == {}
+
+
+@pytest.mark.asyncio
+async def test_publisher_sends_snapshot_then_patches():
+    """Subscribers get one full snapshot, then only changed fields."""
+    family, calls = _counting_family(interval=0)
+    collector = MetricsCollector([family])
+    publisher = SnapshotPublisher(
+        collector, ["counter"], lambda samples: {"counter": samples["counter"].data}
+    )
+
+    stream = publisher.subscribe(lambda: 0)
+    kind, _, payload = await stream.__anext__()
+    assert kind == "snapshot"
+    assert json.loads(payload) == {"counter": {"value": 1}}
+
+    kind, _, payload = await stream.__anext__()
+    assert kind == "patch"
+    assert json.loads(payload) == {"counter": {"value": 2}}
+    await stream.aclose()
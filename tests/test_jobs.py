@@ -0,0 +1,69 @@
+"""Tests for the terminal job executor."""
+
+import asyncio
+
+import pytest
+
+from droidvm_tools.tools.jobs import CANCELLED, FINISHED, JobExecutor, JobRejected
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_keeps_output():
+    """Submitted jobs run and keep their output events."""
+    executor = JobExecutor(workers=1)
+    job = executor.submit("echo hi", client="a")
+    await asyncio.wait_for(executor.wait(job), 5)
+
+    assert job.status == FINISHED
+    assert job.events == [{"type": "stdout", "line": "hi"}]
+    assert job.result()["output"] == ["hi"]
+
+
+@pytest.mark.asyncio
+async def test_follow_streams_events_then_exit():
+    """Followers get every event as it arrives, then the exit event."""
+    executor = JobExecutor(workers=1)
+    job = executor.submit("echo a; echo b", client="a")
+    events = [event async for event in executor.follow(job)]
+    assert events[:2] == [{"type": "stdout", "line": "a"}, {"type": "stdout", "line": "b"}]
+    assert events[-1]["type"] == "exit"
+    assert events[-1]["exit_code"] == 0
+
+    blocked = executor.submit("tail -f /dev/null", timeout=10, client="a")
+    follower = executor.follow(blocked)
+    executor.cancel(blocked.id)
+    events = [event async for event in follower]
+    assert events[-1]["error"] == "Cancelled"
+
+
+@pytest.mark.asyncio
+async def test_queue_and_client_limits():
+    """A full queue and per-client limits reject with a retry hint."""
+    executor = JobExecutor(workers=1, max_queue=1, per_client=2)
+    running = executor.submit("tail -f /dev/null", timeout=10, client="a")
+    queued = executor.submit("tail -f /dev/null", timeout=10, client="b")
+    assert executor.position(queued) == 1
+
+    with pytest.raises(JobRejected) as full:
+        executor.submit("echo hi", client="c")
+    assert 1 <= full.value.retry_after <= 10
+
+    executor.max_queue = 5
+    executor.submit("echo hi", client="a")
+    with pytest.raises(JobRejected):
+        executor.submit("echo hi", client="a")
+
+    for job in executor.jobs():
+        executor.cancel(job.id)
+    await asyncio.wait_for(executor.wait(running), 5)
+    assert running.status == CANCELLED
+    assert queued.status == CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_rejected_command_is_not_queued():
+    """Commands outside the whitelist never reach the queue."""
+    executor = JobExecutor()
+    with pytest.raises(ValueError):
+        executor.submit("python -c 'print(1)'")
+    assert executor.jobs() == []
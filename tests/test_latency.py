@@ -0,0 +1,116 @@
+"""Tests for the latency probes and rolling histograms."""
+
+import asyncio
+import socket
+import subprocess
+
+import pytest
+
+from droidvm_tools.tools import latency
+from droidvm_tools.tools.latency import LatencyProber, LatencyTarget, RollingHistogram
+
+
+def test_percentiles_are_within_bucket_precision():
+    """p50/p95/p99 land within one bucket of the true value."""
+    histogram = RollingHistogram()
+    for ms in range(1, 101):
+        histogram.observe(float(ms), now=1000.0)
+
+    summary = histogram.summary(300, now=1000.0)
+    assert summary["count"] == 100
+    assert summary["min_ms"] == 1.0
+    assert summary["max_ms"] == 100.0
+    assert summary["mean_ms"] == 50.5
+    for p in (50, 95, 99):
+        assert p <= summary[f"p{p}_ms"] <= p * latency.GROWTH
+
+
+def test_window_drops_old_slots_and_counts_failures():
+    histogram = RollingHistogram()
+    histogram.observe(500.0, now=0.0)
+    histogram.observe(10.0, now=3600.0)
+    histogram.observe(None, now=3600.0)
+
+    recent = histogram.summary(300, now=3600.0)
+    assert recent["count"] == 1
+    assert recent["failures"] == 1
+    assert recent["loss_percent"] == 50.0
+    assert recent["max_ms"] == 10.0
+
+    # The first sample is more than an hour old and has been overwritten
+    assert histogram.summary(3600, now=3600.0)["count"] == 1
+    assert histogram.summary(300, now=10000.0)["p50_ms"] is None
+
+
+def test_parse_targets():
+    targets = latency.parse_targets("tcp:1.1.1.1:443, tailscale:laptop,tcp:[::1]:22")
+    assert [t.name for t in targets] == ["tcp:1.1.1.1:443", "tailscale:laptop", "tcp:[::1]:22"]
+    assert targets[2].host == "::1"
+
+    with pytest.raises(ValueError):
+        LatencyTarget.parse("udp:1.1.1.1:53")
+    with pytest.raises(ValueError):
+        LatencyTarget.parse("tcp:example.com")
+
+
+    errors = []
+    targets = latency.parse_targets("tcp:1.1.1.1:443,tcp:nohost", on_error=errors.append)
+    assert [t.name for t in targets] == ["tcp:1.1.1.1:443"]
+    assert len(errors) == 1
+    with pytest.raises(ValueError):
+        latency.parse_targets("tcp:nohost")
+
+
+def test_tcp_probe_records_connect_time():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+
+    prober = LatencyProber([LatencyTarget("tcp", "127.0.0.1", port)])
+    try:
+        report = asyncio.run(prober.probe_all())
+    finally:
+        server.close()
+
+    entry = report["targets"][0]
+    assert entry["last"]["ms"] is not None
+    assert entry["windows"]["5m"]["count"] == 1
+
+
+def test_tailscale_probe_parses_path(monkeypatch):
+    outputs = iter([
+        "pong from laptop (100.64.0.2) via DERP(fra) in 120ms\n",
+        "pong from laptop (100.64.0.2) via 192.168.1.20:41641 in 8ms\n",
+    ])
+
+    async def fake_run_async(cmd, timeout=None):
+        return subprocess.CompletedProcess(cmd, 0, stdout=next(outputs), stderr="")
+
+    monkeypatch.setattr(latency.runner, "run_async", fake_run_async)
+
+    relayed = asyncio.run(latency.probe_tailscale("laptop", 3))
+    assert relayed == {"ms": 120.0, "address": "100.64.0.2", "path": "DERP(fra)", "relayed": True}
+    direct = asyncio.run(latency.probe_tailscale("laptop", 3))
+    assert direct["relayed"] is False
+
+
+def test_failed_probe_counts_as_loss(monkeypatch):
+    async def fake_run_async(cmd, timeout=None):
+        raise subprocess.CalledProcessError(1, cmd, "", "ping timed out\n")
+
+    monkeypatch.setattr(latency.runner, "run_async", fake_run_async)
+
+    report = asyncio.run(LatencyProber([LatencyTarget("tailscale", "laptop")]).probe_all())
+    entry = report["targets"][0]
+    assert entry["last"]["ms"] is None
+    assert entry["last"]["error"] == "ping timed out"
+    assert entry["windows"]["1h"]["loss_percent"] == 100.0
+
+
+def test_set_targets_keeps_history_of_remaining_targets():
+    prober = LatencyProber([LatencyTarget("tcp", "a", 1), LatencyTarget("tcp", "b", 1)])
+    prober._histograms["tcp:a:1"].observe(5.0)
+    prober.set_targets([LatencyTarget("tcp", "a", 1)])
+    assert [entry["target"] for entry in prober.report()["targets"]] == ["tcp:a:1"]
+    assert prober.report()["targets"][0]["windows"]["5m"]["count"] == 1
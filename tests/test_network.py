@@ -0,0 +1,90 @@
+"""Tests for network monitoring utilities."""
+
+from collections import namedtuple
+
+from droidvm_tools.tools import network
+from droidvm_tools.tools.backends import PsutilBackend
+
+import pytest
+
+netio = namedtuple("netio", ["bytes_sent", "bytes_recv", "packets_sent", "packets_recv"])
+addr = namedtuple("addr", ["ip", "port"])
+sconn = namedtuple("sconn", ["fd", "family", "type", "laddr", "raddr", "status", "pid"])
+
+CONNECTIONS = [
+    sconn(3, 2, 1, addr("0.0.0.0", 8000), (), "LISTEN", 10),
+    sconn(4, 2, 1, addr("10.0.0.2", 8000), addr("10.0.0.9", 50000), "ESTABLISHED", 10),
+    sconn(5, 2, 1, addr("10.0.0.2", 40000), addr("1.1.1.1", 443), "ESTABLISHED", 11),
+    sconn(6, 2, 1, addr("10.0.0.2", 40001), addr("1.1.1.1", 443), "TIME_WAIT", None),
+]
+
+
+def test_counter_delta_treats_decrease_as_reset():
+    """A counter that goes down restarted from zero."""
+    assert network._counter_delta(100, 250) == 150
+    assert network._counter_delta(2**32 - 10, 5) == 5
+    assert network._counter_delta(2**40, 500) == 500
+
+
+def test_counter_reset_with_small_previous_value_is_not_a_wrap():
+    """An interface reset doesn't show up as a ~4 GiB burst."""
+    assert network._counter_delta(50_000, 1_200) == 1_200
+
+
+def test_rate_tracker_reports_per_interface_rates(monkeypatch):
+    """Rates are computed per NIC against the previous sample."""
+    samples = iter([
+        {"wlan0": netio(1000, 5000, 10, 50)},
+        {"wlan0": netio(3000, 9000, 30, 90)},
+    ])
+    clock = iter([100.0, 102.0])
+    monkeypatch.setattr(network.psutil, "net_io_counters", lambda pernic: next(samples))
+    monkeypatch.setattr(network.time, "monotonic", lambda: next(clock))
+
+    tracker = network.NetRateTracker(smoothing=0, min_window=0, backend=PsutilBackend())
+    first = tracker.sample()
+    second = tracker.sample()
+
+    assert first["interfaces"]["wlan0"]["bytes_sent_per_sec"] == 0.0
+    assert second["interfaces"]["wlan0"] == {
+        "bytes_sent_per_sec": 1000.0,
+        "bytes_recv_per_sec": 2000.0,
+        "packets_sent_per_sec": 10.0,
+        "packets_recv_per_sec": 20.0,
+    }
+    assert second["total"]["bytes_recv_per_sec"] == 2000.0
+    assert second["sample_window_seconds"] == 2.0
+
+
+def test_connection_filters_and_pagination(monkeypatch):
+    """Filters apply before formatting; pages chain through next_cursor."""
+    kinds = []
+
+    def fake_net_connections(kind):
+        kinds.append(kind)
+        return CONNECTIONS
+
+    monkeypatch.setattr(network.psutil, "net_connections", fake_net_connections)
+
+    listening = network.get_connections(status="listen", family="ipv4", proto="tcp")
+    assert [c["local_address"] for c in listening] == ["0.0.0.0:8000"]
+    assert kinds[-1] == "tcp4"
+    assert len(network.get_connections(port=443)) == 2
+
+    first = network.get_connections_page(limit=3)
+    assert len(first["connections"]) == 3
+    second = network.get_connections_page(cursor=first["next_cursor"], limit=3)
+    assert len(second["connections"]) == 1
+    assert second["next_cursor"] is None
+
+    with pytest.raises(ValueError):
+        network.get_connections(family="ipx")
+
+
+def test_aggregate_connections(monkeypatch):
+    """Aggregate mode counts by status and remote host."""
+    monkeypatch.setattr(network.psutil, "net_connections", lambda kind: CONNECTIONS)
+    summary = network.aggregate_connections()
+    assert summary["total"] == 4
+    assert summary["by_status"] == {"LISTEN": 1, "ESTABLISHED": 2, "TIME_WAIT": 1}
+    assert summary["by_remote_host"] == {"1.1.1.1": 2, "10.0.0.9": 1}
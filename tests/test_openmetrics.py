@@ -0,0 +1,97 @@
+"""Tests for the OpenMetrics exposition."""
+
+import time
+
+from droidvm_tools.openmetrics import LatencyHistogram, OpenMetricsRenderer
+from droidvm_tools.tools.collector import MetricsCollector, Sample
+
+
+def test_renderer_exports_numeric_snapshot_values():
+    """Numeric fields become samples; strings are skipped."""
+    collector = MetricsCollector([])
+    collector._samples["cpu"] = Sample(data={
+        "cpu_usage_percent": 12.5,
+        "cpu_usage_per_core": [10.0, 15.0],
+        "max_frequency": "N/A",
+    })
+    collector.generation += 1
+
+    text = OpenMetricsRenderer(collector, LatencyHistogram()).render().decode()
+
+    assert "droidvm_cpu_usage_percent 12.5\n" in text
+    assert 'droidvm_cpu_core_usage_percent{core="1"} 15.0\n' in text
+    assert "N/A" not in text
+    assert text.endswith("# EOF\n")
+
+
+def test_renderer_exports_raw_byte_counts():
+    """Byte counts from raw samples become gauges and counters."""
+    collector = MetricsCollector([])
+    collector._samples["memory"] = Sample(data={"total": 4096, "percentage": 50.0})
+    collector._samples["network_stats"] = Sample(data={"bytes_sent": 1024})
+    collector.generation += 1
+
+    text = OpenMetricsRenderer(collector, LatencyHistogram()).render().decode()
+
+    assert "droidvm_memory_total_bytes 4096\n" in text
+    assert "# TYPE droidvm_network_transmit_bytes counter\n" in text
+    assert "droidvm_network_transmit_bytes_total 1024\n" in text
+
+
+def test_non_finite_values_use_openmetrics_spelling():
+    """NaN and infinities are written as NaN, +Inf and -Inf."""
+    collector = MetricsCollector([])
+    collector._samples["cpu"] = Sample(data={
+        "cpu_usage_percent": float("nan"),
+        "cpu_usage_per_core": [float("inf"), float("-inf")],
+    })
+    collector.generation += 1
+
+    text = OpenMetricsRenderer(collector, LatencyHistogram()).render().decode()
+
+    assert "droidvm_cpu_usage_percent NaN\n" in text
+    assert 'droidvm_cpu_core_usage_percent{core="0"} +Inf\n' in text
+    assert 'droidvm_cpu_core_usage_percent{core="1"} -Inf\n' in text
+    assert "nan" not in text and " inf" not in text
+
+
+def test_snapshot_section_is_reused_while_exported_families_are_unchanged():
+    """Samples of unexported families (the 1 s history) don't force a re-render."""
+    collector = MetricsCollector([])
+    collector._samples["cpu"] = Sample(data={"cpu_usage_percent": 12.5})
+    renderer = OpenMetricsRenderer(collector, LatencyHistogram())
+    renderer.render()
+    section = renderer._snapshot_section
+
+    collector._samples["history"] = Sample(data={"metrics": 3})
+    collector.generation += 1
+    text = renderer.render().decode()
+    assert renderer._snapshot_section is section
+    assert 'family="history"' not in text
+
+    collector._samples["cpu"] = Sample(data={"cpu_usage_percent": 20.0}, sampled_at=time.time() + 1)
+    assert "droidvm_cpu_usage_percent 20.0\n" in renderer.render().decode()
+
+
+def test_metrics_have_distinct_help():
+    from droidvm_tools.openmetrics import METRICS
+
+    helps = [metric.header.split("\n")[0].split(" ", 3)[3] for metric in METRICS]
+    assert len(helps) == len(set(helps))
+
+
+def test_latency_histogram_is_cumulative():
+    """Bucket counts are rendered cumulatively with +Inf equal to count."""
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    histogram.observe("GET", "/status", 0.05)
+    histogram.observe("GET", "/status", 0.5)
+    histogram.observe("GET", "/status", 5.0)
+
+    out = []
+    histogram.render(out)
+    text = "".join(out)
+
+    assert 'route="/status",le="0.1"} 1\n' in text
+    assert 'route="/status",le="1.0"} 2\n' in text
+    assert 'route="/status",le="+Inf"} 3\n' in text
+    assert 'droidvm_http_request_duration_seconds_count{method="GET",route="/status"} 3\n' in text
@@ -0,0 +1,155 @@
+"""Tests for the terminal command policy."""
+
+import json
+import os
+
+from droidvm_tools.tools.policy import Policy, PolicyEngine, split_commands
+from droidvm_tools.tools.terminal import policy_engine
+
+policy = Policy(
+    allow=["ls", "grep", "uptime", "cat", "find"],
+    deny=["rm", "sudo"],
+    rules=[{"binary": "find", "deny_args": ["^-delete$", "^-exec(dir)?$"], "reason": "no"}],
+)
+
+
+def test_split_commands_follows_shell_syntax():
+    """Pipelines, lists, quotes and redirections are split like sh does."""
+    assert split_commands("ls -l | grep 'a;b' && cat x 2>&1 > out") == [
+        (["ls", "-l"], []),
+        (["grep", "a;b"], []),
+        (["cat", "x"], [(">&", "1"), (">", "out")]),
+    ]
+
+
+def test_words_are_not_matched_as_substrings():
+    """'rm' inside another word doesn't deny the command."""
+    assert policy.check("uptime --format").allowed
+    assert policy.check("ls | grep add").allowed
+
+
+def test_every_command_in_a_pipeline_is_checked():
+    """Denied binaries are caught anywhere in the command line."""
+    decision = policy.check("ls; /bin/rm -rf /")
+    assert not decision.allowed
+    assert decision.rule == "deny"
+    assert decision.binary == "/bin/rm"
+
+    assert policy.check("ls && python").rule == "allow"
+    assert policy.check("echo $(id)").rule == "syntax"
+    assert policy.check("ls ${HOME:=/tmp}").rule == "syntax"
+    assert policy.check("cat 'unclosed").rule == "parse"
+
+
+def test_argument_rules():
+    """Argument rules deny specific flags with the rule's reason."""
+    decision = policy.check("find . -execdir ls ;")
+    assert decision.rule == "argument"
+    assert decision.token == "-execdir"
+    assert decision.reason == "no"
+    assert policy.check("find . -name x").allowed
+
+
+def test_engine_reloads_changed_file(tmp_path):
+    """The engine picks up edits and keeps the last good policy on errors."""
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"allow": ["ls"]}))
+    engine = PolicyEngine(policy, str(path))
+
+    assert engine.check("ls").allowed
+    assert not engine.check("cat x").allowed
+    # Keys left out of the file keep their defaults
+    assert not engine.check("ls; sudo x").allowed
+
+    path.write_text("{not json")
+    os.utime(path, (1, 1))
+    assert engine.check("ls").allowed
+    assert engine.load_error
+
+    path.write_text(json.dumps({"allow": ["cat"]}))
+    os.utime(path, (2, 2))
+    assert engine.check("cat x").allowed
+    assert engine.load_error is None
+
+
+def test_tmux_only_runs_read_only_subcommands():
+    """tmux can't be used to run denied binaries."""
+    default = policy_engine.default
+    for command in [
+        "tmux new-session -d 'rm -rf ~/x'",
+        "tmux run-shell 'python3 -c 1'",
+        "tmux send-keys -t main 'rm -rf ~' Enter",
+        "tmux split-window 'python3'",
+        "tmux -c 'rm -rf ~/x'",
+        "tmux -f /sdcard/evil.conf ls",
+        "tmux new",
+        "tmux",
+        "tmux ls -F '#(rm -rf ~/x)'",
+    ]:
+        decision = default.check(command)
+        assert not decision.allowed, command
+    assert not default.check("tmux ls ';' run-shell x").allowed
+
+    assert default.check("tmux ls").allowed
+    assert default.check("tmux -L work list-windows -a").allowed
+    assert default.check("tmux has-session -t main").allowed
+
+
+def test_process_substitution_is_rejected():
+    decision = policy_engine.default.check("cat <(python3 -c 1)")
+    assert decision.rule == "syntax"
+    assert not policy_engine.default.check("cat >(python3 -c 1)").allowed
+    # A command is never read as a redirect target
+    assert policy.check("cat < (python3)").rule == "parse"
+
+
+def test_output_redirection_and_wget_writes_are_denied():
+    default = policy_engine.default
+    decision = default.check("echo x > ~/.profile")
+    assert decision.rule == "redirect"
+    assert not default.check("echo x >> ~/.profile").allowed
+    assert not default.check("echo x &> ~/.profile").allowed
+    assert default.check("cat < /proc/loadavg").allowed
+    assert default.check("ls 2>&1 | grep x").allowed
+
+    for command in [
+        "wget http://example.com/x",
+        "wget -N http://host/.bashrc",
+        "wget -i urls.txt -O-",
+        "wget -O- -e output_document=x http://example.com/x",
+        "wget -O ~/.profile http://example.com/x",
+        "wget -qO ~/.profile http://example.com/x",
+        "wget --output-document=/sdcard/x http://example.com/x",
+        "wget -o log http://example.com/x",
+        "wget -P ~ http://example.com/x",
+    ]:
+        assert default.check(command).rule == "argument", command
+    assert default.check("wget -qO- http://example.com/x").allowed
+    assert default.check("wget --output-document=- http://example.com/x").allowed
+
+    assert Policy(allow=["echo"], allow_redirects=True).check("echo x > out").allowed
+
+
+def test_curl_file_writing_options_are_denied():
+    default = policy_engine.default
+    for command in [
+        "curl -o out http://example.com/x",
+        "curl -sSo out http://example.com/x",
+        "curl -D headers http://example.com/x",
+        "curl --dump-header headers http://example.com/x",
+        "curl -c jar http://example.com/x",
+        "curl --cookie-jar jar http://example.com/x",
+        "curl --trace log http://example.com/x",
+        "curl --trace-ascii log http://example.com/x",
+        "curl --stderr log http://example.com/x",
+        "curl -K cfg http://example.com/x",
+        "curl --config cfg http://example.com/x",
+        "curl --libcurl out.c http://example.com/x",
+        "curl --etag-save etag http://example.com/x",
+        "curl --hsts hsts.txt http://example.com/x",
+        "curl --alt-svc altsvc.txt http://example.com/x",
+        "curl -w '%output{out}' http://example.com/x",
+    ]:
+        decision = default.check(command)
+        assert decision.rule == "argument", command
+    assert default.check("curl -sS -H 'Accept: text/plain' http://example.com/x").allowed
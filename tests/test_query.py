@@ -0,0 +1,43 @@
+"""Tests for /query section parsing and field projection."""
+
+import pytest
+
+from droidvm_tools.query import parse_fields, parse_include, project
+
+FAMILIES = ["cpu", "memory", "network_stats", "network_rates", "tmux", "history"]
+
+
+def test_parse_include_maps_short_names():
+    sections = parse_include("cpu, net.rates,network_stats", FAMILIES)
+    assert sections == {"cpu": "cpu", "net.rates": "network_rates", "network_stats": "network_stats"}
+
+    with pytest.raises(ValueError):
+        parse_include("cpu,bogus", FAMILIES)
+    with pytest.raises(ValueError):
+        parse_include("history", FAMILIES)
+    with pytest.raises(ValueError):
+        parse_include(" , ", FAMILIES)
+
+
+def test_parse_fields_prefers_longest_section():
+    paths = parse_fields("net.rates.wlan0,net.bytes_sent,cpu", ["net", "net.rates", "cpu"])
+    assert paths == {"net.rates": [["wlan0"]], "net": [["bytes_sent"]], "cpu": [[]]}
+
+    with pytest.raises(ValueError):
+        parse_fields("memory.percentage", ["cpu"])
+
+
+def test_project_keeps_requested_paths():
+    data = {
+        "cpu_usage_percent": 12.5,
+        "load": {"1m": 0.5, "5m": 0.4},
+        "sessions": [{"name": "a", "windows": 1}, {"name": "b", "windows": 2}],
+    }
+    paths = [["cpu_usage_percent"], ["load", "1m"], ["sessions", "name"], ["missing"]]
+    assert project(data, paths) == {
+        "cpu_usage_percent": 12.5,
+        "load": {"1m": 0.5},
+        "sessions": [{"name": "a"}, {"name": "b"}],
+        "missing": None,
+    }
+    assert project(data, [[]]) is data
@@ -0,0 +1,53 @@
+"""Tests for cached conditional responses."""
+
+from droidvm_tools import responses
+from droidvm_tools.responses import (
+    ResponseCache,
+    ResponseSettings,
+    choose_encoding,
+    etag_matches,
+    json_dumps,
+)
+
+
+def test_cache_reencodes_only_new_versions():
+    """The body is encoded once per version."""
+    cache = ResponseCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    first = cache.get("key", 1, build)
+    assert cache.get("key", 1, build) == first
+    assert cache.get("key", 2, build) != first
+    assert len(calls) == 2
+
+
+def test_etag_matching_is_weak():
+    """If-None-Match lists and weak validators match."""
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_choose_encoding_respects_quality():
+    """q=0 refuses a coding; unknown codings are ignored."""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_json_dumps_backends_agree():
+    """Both JSON backends produce the same compact output."""
+    content = {"a": [1, 2.5, None], "b": "ü"}
+    fast = json_dumps(content)
+    responses.configure(ResponseSettings(fast_json=False))
+    try:
+        assert json_dumps(content) == fast
+    finally:
+        responses.configure(ResponseSettings())
@@ -0,0 +1,58 @@
+"""Tests for the subprocess runner."""
+
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from droidvm_tools.tools import runner
+from droidvm_tools.tools.capabilities import OPEN, CapabilityRegistry
+
+
+@pytest.mark.asyncio
+async def test_run_async_returns_completed_process():
+    """Successful commands return their decoded output."""
+    result = await runner.run_async([sys.executable, "-c", "print('hi')"])
+    assert result.returncode == 0
+    assert result.stdout.strip() == "hi"
+
+
+@pytest.mark.asyncio
+async def test_run_async_raises_like_subprocess_run():
+    """Failures raise the same exceptions as subprocess.run(check=True)."""
+    with pytest.raises(FileNotFoundError):
+        await runner.run_async(["droidvm-definitely-not-installed"])
+
+    with pytest.raises(subprocess.CalledProcessError):
+        await runner.run_async([sys.executable, "-c", "raise SystemExit(3)"])
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        await runner.run_async(
+            [sys.executable, "-c", "import time; time.sleep(5)"], timeout=0.2
+        )
+
+
+@pytest.mark.asyncio
+async def test_cancellation_does_not_reset_the_breaker(monkeypatch):
+    """Cancelled calls count as timeouts past the deadline, else as nothing."""
+    registry = CapabilityRegistry(failure_threshold=2)
+    monkeypatch.setattr(runner, "capabilities", registry)
+
+    async def hang(args, timeout):
+        # e.g. stuck waiting for a subprocess slot
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(runner, "_run_async", hang)
+    registry.acquire(sys.executable)
+    registry.release(sys.executable, timed_out=True)
+
+    # Cancelled before its own timeout: the earlier timeout still counts
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(runner.run_async([sys.executable], timeout=2), 0.1)
+    assert registry.states()[sys.executable]["consecutive_timeouts"] == 1
+
+    # Cancelled after it: a hang like any other timeout, so the breaker opens
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(runner.run_async([sys.executable], timeout=0.1), 0.2)
+    assert registry.states()[sys.executable]["state"] == OPEN
@@ -1,9 +1,17 @@
 """Tests for the FastAPI server."""
 
+import asyncio
+import json
+import os
+import stat
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
+from droidvm_tools import server
 from droidvm_tools.server import app
+from droidvm_tools.tools.jobs import JobExecutor
 
 
 @pytest.fixture
@@ -94,3 +102,338 @@ def test_full_status_endpoint(client):
     assert "cpu" in data["data"]
     assert "memory" in data["data"]
     assert "network" in data["data"]
+    assert "sampled_at" in data["data"]
+    assert "cpu" in data["data"]["sampled_at"]
+
+
+def test_snapshot_endpoint_reports_sample_age(client):
+    """Test that snapshot-backed endpoints report when they were sampled."""
+    response = client.get("/system/memory")
+    assert response.status_code == 200
+    data = response.json()
+    assert "sampled_at" in data
+    assert data["age_seconds"] >= 0
+
+
+def test_cache_stats_endpoint(client):
+    """Test that cache counters are reported."""
+    client.get("/network/ip")
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert "totals" in data["data"]
+    assert "misses" in data["data"]["totals"]
+
+
+def test_status_websocket_sends_snapshot(client):
+    """Test that the status stream starts with a full snapshot."""
+    with client.websocket_connect("/stream/status/ws?interval=1") as websocket:
+        message = websocket.receive_json()
+    assert message["type"] == "snapshot"
+    assert "cpu" in message["data"]
+    assert "sampled_at" in message["data"]
+
+
+def test_metrics_history_endpoint(client):
+    """Test history queries and the unknown-metric error."""
+    from droidvm_tools.server import history
+
+    history.record("memory", 42.0)
+    response = client.get("/metrics/history?metric=memory&from=-60&step=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["data"]["metric"] == "memory"
+    assert any(value == 42.0 for _, value in data["data"]["points"])
+
+    response = client.get("/metrics/history?metric=nope")
+    assert response.status_code == 400
+    assert "memory" in response.json()["available"]
+
+
+def test_network_stats_with_rates(client):
+    """Test that ?rates=1 adds per-interface throughput."""
+    response = client.get("/network/stats?rates=1")
+    assert response.status_code == 200
+    data = response.json()
+    assert "interfaces" in data["data"]["rates"]
+
+
+def test_metrics_endpoint(client):
+    """Test the OpenMetrics exposition endpoint."""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    assert "droidvm_cpu_usage_percent" in response.text
+    assert 'route="/health"' in response.text
+    assert response.text.endswith("# EOF\n")
+
+
+def test_raw_format_returns_numeric_bytes(client):
+    """Test that ?format=raw returns byte counts as numbers."""
+    human = client.get("/system/memory").json()["data"]
+    raw = client.get("/system/memory?format=raw").json()["data"]
+    assert isinstance(human["total"], str)
+    assert isinstance(raw["total"], int)
+
+    response = client.get("/status?format=raw")
+    assert response.status_code == 200
+    assert isinstance(response.json()["data"]["memory"]["total"], int)
+
+    response = client.get("/system/memory?format=xml")
+    assert response.status_code == 422
+
+
+def test_thermal_endpoint(client):
+    """Test the thermal endpoint reports the backend and its sources."""
+    response = client.get("/system/thermal")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert "temperatures" in data
+    assert data["backend"] in ("procfs", "psutil")
+
+
+def test_tailscale_peers_endpoint(client):
+    """Test the peers endpoint answers whether or not tailscale is installed."""
+    response = client.get("/network/tailscale/peers", params={"online": True})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["data"] is None or isinstance(body["data"], list)
+
+
+def test_network_latency_endpoint(client):
+    """Test the latency endpoint lists targets and rejects unknown ones."""
+    response = client.get("/network/latency")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["windows"] == ["5m", "15m", "1h"]
+    assert isinstance(data["targets"], list)
+
+    response = client.get("/network/latency", params={"target": "tcp:example.invalid:1"})
+    assert response.status_code == 404
+
+
+def test_bad_latency_targets_are_skipped_at_startup(monkeypatch, caplog):
+    """A malformed DROIDVM_LATENCY_TARGETS entry doesn't stop the API."""
+    monkeypatch.setenv("DROIDVM_LATENCY_TARGETS", "tcp:127.0.0.1:9,tcp:nohost,udp:1.1.1.1:53")
+    monkeypatch.setenv("DROIDVM_COLLECTOR", "false")
+    try:
+        with caplog.at_level("WARNING"), TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+            assert [t.name for t in server.latency_prober.targets] == ["tcp:127.0.0.1:9"]
+    finally:
+        server.latency_prober.set_targets([])
+    assert "tcp:nohost" in caplog.text
+    assert "udp:1.1.1.1:53" in caplog.text
+
+
+def test_query_endpoint_projects_fields(client):
+    """Test /query returns only the requested sections and fields."""
+    response = client.get(
+        "/query",
+        params={"include": "cpu,memory,net.rates", "fields": "cpu.cpu_usage_percent,memory.percentage"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    data = body["data"]
+    assert set(data) == {"cpu", "memory", "net.rates"}
+    assert set(data["cpu"]) == {"cpu_usage_percent"}
+    assert set(data["memory"]) == {"percentage"}
+    assert set(body["sampled_at"]) == {"cpu", "memory", "net.rates"}
+
+    response = client.get("/query", params={"include": "cpu,nope"})
+    assert response.status_code == 400
+    assert response.json()["success"] is False
+
+
+def _request(peer, headers):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": peer,
+    })
+
+
+def test_client_id_only_trusts_forwarding_headers_from_proxies():
+    """Direct clients can't pick their own identity with forwarded headers."""
+    spoofed = {"CF-Connecting-IP": "1.2.3.4", "X-Forwarded-For": "5.6.7.8"}
+    assert server._client_id(_request(("203.0.113.9", 5000), spoofed)) == "203.0.113.9"
+
+    assert server._client_id(_request(("127.0.0.1", 5000), spoofed)) == "1.2.3.4"
+    forwarded = {"X-Forwarded-For": "9.9.9.9, 198.51.100.7"}
+    assert server._client_id(_request(("127.0.0.1", 5000), forwarded)) == "198.51.100.7"
+    assert server._client_id(_request(None, {"CF-Connecting-IP": "1.2.3.4"})) == "1.2.3.4"
+
+
+def test_capabilities_endpoint(client):
+    """Test that probed commands are reported with their state."""
+    response = client.post("/system/capabilities/probe")
+    assert response.status_code == 200
+    assert "tailscale" in response.json()["data"]["found"]
+
+    commands = client.get("/system/capabilities").json()["data"]["commands"]
+    assert commands["tailscale"]["state"] in ("available", "missing")
+
+
+def test_top_processes_endpoint(client):
+    """Test the top processes endpoint and its sort validation."""
+    response = client.get("/system/processes/top?count=5&sort=rss")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["sort"] == "rss"
+    assert len(data["processes"]) <= 5
+
+    response = client.get("/system/processes/top?sort=name")
+    assert response.status_code == 422
+
+
+def test_terminal_stream_endpoint(client):
+    """Test that /terminal/stream returns NDJSON events."""
+    response = client.post("/terminal/stream", json={"command": "echo hello", "mode": "termux"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0] == {"type": "stdout", "line": "hello"}
+    assert events[-1]["type"] == "exit"
+
+
+def test_terminal_stream_uses_job_limits(client, monkeypatch):
+    """/terminal/stream is subject to the same job limits as /terminal."""
+    monkeypatch.setattr(server, "job_executor", JobExecutor(per_client=0))
+    response = client.post("/terminal/stream", json={"command": "echo hello", "mode": "termux"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_jobs_endpoints():
+    """Test submitting a job, polling it and reading its output."""
+    with TestClient(app) as client:
+        response = client.post("/jobs", json={"command": "echo hello"})
+        assert response.status_code == 202
+        job_id = response.json()["data"]["id"]
+
+        for _ in range(50):
+            status = client.get(f"/jobs/{job_id}").json()["data"]["status"]
+            if status not in ("queued", "running"):
+                break
+            time.sleep(0.1)
+        assert status == "finished"
+
+        output = client.get(f"/jobs/{job_id}/output").json()["data"]
+        assert output["events"] == [{"type": "stdout", "line": "hello"}]
+        assert client.get(f"/jobs/{job_id}/output?since={output['next']}").json()["data"]["events"] == []
+
+        assert client.get("/jobs/nope").status_code == 404
+        assert client.post("/jobs", json={"command": "python"}).status_code == 400
+
+
+def test_terminal_termux_mode_runs_on_job_pool(client):
+    """Test that termux mode still returns the command output inline."""
+    response = client.post("/terminal", json={"command": "echo hi", "mode": "termux"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["data"]["output"] == ["hi"]
+
+
+def test_unknown_session_returns_404(client):
+    """Test that session endpoints report unknown session IDs."""
+    assert client.get("/sessions/nope/output").status_code == 404
+    assert client.post("/sessions/nope/input", json={"command": "ls"}).status_code == 404
+    assert client.delete("/sessions/nope").status_code == 404
+
+
+def test_conditional_get_returns_304(client):
+    """Test ETag and If-None-Match handling on slow-changing endpoints."""
+    response = client.get("/system/info")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "max-age=60"
+    assert "sampled_at" in response.json()
+
+    response = client.get("/system/info", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_device_info_without_termux_api_sends_weak_etag(client, monkeypatch):
+    """The "not available" response uses the same weak ETags as the rest."""
+    async def no_device_info():
+        return None
+
+    monkeypatch.setattr(server.collector.families["device"], "sampler", no_device_info)
+    asyncio.run(server.collector.refresh("device"))
+    response = client.get("/device/info")
+    assert response.json()["data"] is None
+    assert response.headers["etag"].startswith("W/")
+
+
+def test_etag_survives_resample_with_same_data(client):
+    """A refresh that samples identical data keeps the ETag."""
+    etag = client.get("/system/info").headers["etag"]
+    assert etag.startswith("W/")
+    assert "uptime_seconds" in client.get("/system/info").json()["data"]
+
+    time.sleep(0.01)
+    asyncio.run(server.collector.refresh("system"))
+    response = client.get("/system/info", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "last-modified" in response.headers
+
+
+def test_large_responses_are_compressed(client):
+    """Test gzip negotiation above the minimum size."""
+    response = client.get("/status", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.json()["success"] is True
+
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/status", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_network_connections_query_params(client):
+    """Test connection filters, pagination and aggregation."""
+    response = client.get("/network/connections?limit=1")
+    assert response.status_code == 200
+    assert "next_cursor" in response.json()
+
+    response = client.get("/network/connections?aggregate=1")
+    assert response.status_code == 200
+    assert "by_status" in response.json()["data"]
+
+    response = client.get("/network/connections?family=ipx")
+    assert response.status_code == 400
+
+
+def test_bind_unix_socket(tmp_path):
+    """The Unix socket gets the requested mode and replaces stale sockets."""
+    path = str(tmp_path / "api.sock")
+    sock = server._bind_unix_socket(path, 0o600)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    sock.close()
+
+    # Left behind without a listener: removed and bound again
+    sock = server._bind_unix_socket(path, 0o660)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+
+    # Still in use by a listening server: left alone
+    sock.listen()
+    with pytest.raises(OSError, match="already listening"):
+        server._bind_unix_socket(path, 0o600)
+    sock.close()
+
+    regular = tmp_path / "not-a-socket"
+    regular.write_text("")
+    with pytest.raises(FileExistsError):
+        server._bind_unix_socket(str(regular), 0o600)
@@ -0,0 +1,70 @@
+"""Tests for tmux-backed shell sessions."""
+
+import asyncio
+import shutil
+
+import pytest
+
+from droidvm_tools.tools.sessions import (
+    SessionLimitReached,
+    SessionManager,
+    validate_session_command,
+)
+
+needs_tmux = pytest.mark.skipif(shutil.which("tmux") is None, reason="tmux not installed")
+
+
+async def _wait_for(manager, session_id, text, since=0):
+    output = ""
+    for _ in range(50):
+        chunk = manager.read(session_id, since)
+        output += chunk["output"]
+        since = chunk["next"]
+        if text in output:
+            return output
+        await asyncio.sleep(0.1)
+    return output
+
+
+@needs_tmux
+@pytest.mark.asyncio
+async def test_session_keeps_state_between_commands(tmp_path):
+    """The shell's working directory carries over to later commands."""
+    manager = SessionManager(log_dir=str(tmp_path / "logs"), max_sessions=1)
+    session = await manager.open()
+    try:
+        await manager.send(session.id, f"cd {tmp_path}")
+        offset = await manager.send(session.id, "pwd")
+        assert str(tmp_path) in await _wait_for(manager, session.id, str(tmp_path), offset)
+
+        with pytest.raises(SessionLimitReached):
+            await manager.open()
+        with pytest.raises(ValueError):
+            await manager.send(session.id, "python")
+    finally:
+        await manager.close_all()
+    assert manager.sessions() == []
+
+
+def test_export_cannot_set_code_running_variables():
+    """Variables the shell or linker execute can't be exported or unset."""
+    for command in [
+        "export PROMPT_COMMAND='rm -rf ~/x'",
+        "export LD_PRELOAD=/sdcard/x.so",
+        "export BASH_ENV=/sdcard/x.sh",
+        "export PATH=/sdcard/bin",
+        "export PS1='x' && ls",
+        "export PROMPT_COMMAND+=';id'",
+        "unset PATH",
+        "export -f ls",
+        "echo ${PROMPT_COMMAND:='rm -rf ~/x'}",
+        "echo ${PROMPT_COMMAND='rm -rf ~/x'}",
+        "ls ${BASH_ENV:=/sdcard/x.sh}",
+    ]:
+        error = validate_session_command(command)
+        assert error is not None, command
+        assert error["exit_code"] == 1
+
+    assert validate_session_command("export FOO=bar") is None
+    assert validate_session_command("unset FOO") is None
+    assert validate_session_command("cd /tmp && export LANG=C") is None
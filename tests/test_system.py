@@ -0,0 +1,79 @@
+"""Tests for system monitoring utilities."""
+
+from collections import namedtuple
+
+import pytest
+
+from droidvm_tools.tools import system
+from droidvm_tools.tools.backends import PsutilBackend
+
+cputimes = namedtuple("cputimes", ["user", "system", "idle", "iowait"])
+
+
+def test_cpu_tracker_uses_delta_between_samples(monkeypatch):
+    """Usage is computed from the change since the previous sample."""
+    samples = iter([
+        (cputimes(10, 10, 80, 0), [cputimes(10, 10, 80, 0)]),
+        (cputimes(40, 10, 100, 0), [cputimes(40, 10, 100, 0)]),
+    ])
+    current = {}
+
+    def fake_cpu_times(percpu=False):
+        if not percpu:
+            current["total"], current["per_core"] = next(samples)
+            return current["total"]
+        return current["per_core"]
+
+    monkeypatch.setattr(system.psutil, "cpu_times", fake_cpu_times)
+    tracker = system.CpuUsageTracker(min_window=0, backend=PsutilBackend())
+
+    first = tracker.sample()
+    second = tracker.sample()
+
+    assert first["cpu_usage_percent"] == 20.0
+    # 30s busy out of 50s elapsed since the first sample
+    assert second["cpu_usage_percent"] == 60.0
+    assert second["cpu_usage_per_core"] == [60.0]
+    assert second["sample_window_seconds"] >= 0
+
+
+def test_cpu_tracker_reuses_result_within_min_window(monkeypatch):
+    """Back-to-back calls don't collapse the sampling window."""
+    tracker = system.CpuUsageTracker(min_window=60)
+    first = tracker.sample()
+    assert tracker.sample() is first
+
+
+def test_get_cpu_info_does_not_block():
+    """get_cpu_info returns immediately and reports its sampling window."""
+    info = system.get_cpu_info()
+    assert "cpu_usage_percent" in info
+    assert "sample_window_seconds" in info
+
+
+def test_memory_info_raw_and_formatted():
+    """Raw output keeps integers; the default formats them."""
+    raw = system.get_memory_info(raw=True)
+    assert isinstance(raw["total"], int)
+    assert system.format_memory_info(raw)["total"].endswith("B")
+    assert system.get_memory_info()["total"].endswith("B")
+
+
+def test_top_processes_sorted_and_limited():
+    """Top processes come back in descending order of the sort key."""
+    top = system.get_top_processes(count=3, sort="rss")
+    rss = [proc["memory_rss"] or 0 for proc in top["processes"]]
+    assert len(rss) <= 3
+    assert rss == sorted(rss, reverse=True)
+    assert top["total"] >= len(rss)
+
+    with pytest.raises(ValueError):
+        system.get_top_processes(sort="name")
+
+
+def test_process_tracker_reuses_result_within_min_window():
+    """Back-to-back calls share one sample instead of a tiny window."""
+    tracker = system.ProcessTracker(min_window=60)
+    tracker.sample()
+    second = tracker.sample()
+    assert tracker.sample() is second
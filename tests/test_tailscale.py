@@ -0,0 +1,137 @@
+"""Tests for the Tailscale status collector."""
+
+import asyncio
+import json
+import subprocess
+
+from droidvm_tools.tools import tailscale
+from droidvm_tools.tools.tailscale import TailscaleCollector, TailscaleStatus
+
+STATUS_JSON = {
+    "Version": "1.70.0",
+    "BackendState": "Running",
+    "CurrentTailnet": {"Name": "example.ts.net"},
+    "Health": [],
+    "Self": {
+        "ID": "n1",
+        "HostName": "phone",
+        "DNSName": "phone.example.ts.net.",
+        "OS": "android",
+        "TailscaleIPs": ["100.94.102.37", "fd7a:115c:a1e0::1"],
+        "Online": True,
+    },
+    "Peer": {
+        "key1": {
+            "ID": "n2",
+            "HostName": "laptop",
+            "OS": "linux",
+            "TailscaleIPs": ["100.64.0.2"],
+            "Online": True,
+            "Active": True,
+            "CurAddr": "192.168.1.20:41641",
+            "Relay": "fra",
+            "RxBytes": 2048,
+            "TxBytes": 1024,
+            "LastSeen": "0001-01-01T00:00:00Z",
+        },
+        "key2": {
+            "ID": "n3",
+            "HostName": "Cloud",
+            "OS": "linux",
+            "TailscaleIPs": ["100.64.0.3"],
+            "Online": True,
+            "Active": True,
+            "CurAddr": "",
+            "Relay": "fra",
+        },
+        "key3": {
+            "ID": "n4",
+            "HostName": "desktop",
+            "OS": "windows",
+            "TailscaleIPs": ["100.64.0.4"],
+            "Online": False,
+            "Relay": "ams",
+            "LastSeen": "2024-05-01T10:00:00Z",
+        },
+    },
+}
+
+
+def _completed(stdout: str) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["tailscale"], 0, stdout=stdout, stderr="")
+
+
+def test_status_parses_self_and_peers():
+    """Addresses, connection type and zero timestamps are normalised."""
+    status = TailscaleStatus.from_json(STATUS_JSON)
+
+    assert status.connected
+    assert status.tailscale_ip == "100.94.102.37"
+    assert status.self.dns_name == "phone.example.ts.net"
+
+    peers = {peer.hostname: peer for peer in status.peers}
+    assert peers["laptop"].connection == "direct"
+    assert peers["laptop"].address == "192.168.1.20:41641"
+    assert peers["laptop"].last_seen is None
+    assert peers["Cloud"].connection == "relay"
+    assert peers["desktop"].connection == "idle"
+    assert peers["desktop"].last_seen == "2024-05-01T10:00:00Z"
+
+    summary = status.summary()
+    assert summary["peers"] == 3
+    assert summary["peers_online"] == 2
+    assert summary["tailscale_ip"] == "100.94.102.37"
+
+
+def test_sort_peers_lists_online_first():
+    status = TailscaleStatus.from_json(STATUS_JSON)
+    names = [peer.hostname for peer in tailscale.sort_peers(status.peers)]
+    assert names == ["Cloud", "laptop", "desktop"]
+
+
+def test_collector_runs_status_once_within_ttl(monkeypatch):
+    """Status, IP and peers within the TTL share one command."""
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return _completed(json.dumps(STATUS_JSON))
+
+    monkeypatch.setattr(tailscale.runner, "run", fake_run)
+    collector = TailscaleCollector(ttl=60)
+
+    assert collector.status().tailscale_ip == "100.94.102.37"
+    assert len(collector.status().peers) == 3
+    assert calls == [["tailscale", "status", "--json"]]
+
+    collector.invalidate()
+    collector.status()
+    assert len(calls) == 2
+
+
+def test_collector_async_shares_inflight_call(monkeypatch):
+    """Concurrent async callers wait on the same command."""
+    calls = []
+
+    async def fake_run_async(cmd, **kwargs):
+        calls.append(cmd)
+        await asyncio.sleep(0.01)
+        return _completed(json.dumps(STATUS_JSON))
+
+    monkeypatch.setattr(tailscale.runner, "run_async", fake_run_async)
+    collector = TailscaleCollector(ttl=60)
+
+    async def read_all():
+        return await asyncio.gather(*(collector.status_async() for _ in range(3)))
+
+    results = asyncio.run(read_all())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_collector_returns_none_when_tailscale_fails(monkeypatch):
+    def fake_run(cmd, **kwargs):
+        raise FileNotFoundError("tailscale")
+
+    monkeypatch.setattr(tailscale.runner, "run", fake_run)
+    assert TailscaleCollector().status() is None
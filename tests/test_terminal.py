@@ -0,0 +1,63 @@
+"""Tests for terminal command execution."""
+
+import time
+
+import pytest
+
+from droidvm_tools.tools import terminal
+
+
+async def _collect(command, **kwargs):
+    return [event async for event in terminal.stream_termux_command(command, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_lines_then_exit():
+    """Output lines arrive as events, followed by the exit status."""
+    events = await _collect("echo one; echo two")
+    assert events[:2] == [
+        {"type": "stdout", "line": "one"},
+        {"type": "stdout", "line": "two"},
+    ]
+    assert events[-1]["type"] == "exit"
+    assert events[-1]["exit_code"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_rejects_commands_outside_whitelist():
+    """Rejected commands never start and report why."""
+    events = await _collect("python -c 'print(1)'")
+    assert events[0]["type"] == "message"
+    assert events[-1]["exit_code"] == 1
+    assert "not whitelisted" in events[-1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_at_line_limit(tmp_path):
+    """The command is stopped once the line limit is reached."""
+    big = tmp_path / "big.log"
+    big.write_text("line\n" * 10000)
+
+    events = await _collect(f"cat {big}", max_lines=5)
+    lines = [e for e in events if e["type"] == "stdout"]
+    assert len(lines) == 5
+    assert events[-1]["truncated"] is True
+
+
+@pytest.mark.asyncio
+async def test_stream_kills_command_on_timeout():
+    """Commands running past the timeout are killed with exit code 124."""
+    start = time.monotonic()
+    events = await _collect("tail -f /dev/null", timeout=1)
+    assert time.monotonic() - start < 5
+    assert events[-1]["exit_code"] == 124
+    assert events[-1]["error"] == "Timeout"
+
+
+@pytest.mark.asyncio
+async def test_execute_termux_command_async_matches_buffered_shape():
+    """The async variant returns the same shape as the buffered one."""
+    result = await terminal.execute_termux_command_async("echo hi")
+    assert result["output"] == ["hi"]
+    assert result["exit_code"] == 0
+    assert "execution_time_ms" in result
@@ -0,0 +1,63 @@
+"""Tests for the metric history store."""
+
+import pytest
+
+from droidvm_tools.tools.timeseries import MetricHistory
+
+START = 1_000_000
+
+
+def _history(seconds):
+    history = MetricHistory()
+    for i in range(seconds):
+        history.record("cpu", i % 10, START + i)
+    return history
+
+
+def test_query_downsamples_recent_data_from_fine_tier():
+    """Short ranges are served from the 1 s tier."""
+    history = _history(120)
+
+    result = history.query("cpu", START + 100, START + 120, step=10)
+
+    assert result["resolution"] == 1
+    assert result["points"] == [[START + 100, 4.5], [START + 110, 4.5]]
+
+
+def test_rollups_feed_coarser_tiers():
+    """Old ranges fall back to the 1 min rollups."""
+    history = _history(7200)
+
+    result = history.query("cpu", START, START + 7200, step=600)
+
+    assert result["resolution"] == 60
+    assert result["points"][1] == [START - START % 600 + 600, 4.5]
+
+
+def test_gaps_are_reported_as_none():
+    """Slots skipped while no samples arrived come back empty."""
+    history = MetricHistory()
+    history.record("cpu", 50, START)
+    history.record("cpu", 70, START + 5)
+
+    result = history.query("cpu", START, START + 6, step=1)
+
+    assert [value for _, value in result["points"]] == [50, None, None, None, None, 70]
+
+
+def test_query_rejects_too_many_points():
+    """Callers must pick a step that keeps the response bounded."""
+    history = _history(10)
+    with pytest.raises(ValueError):
+        history.query("cpu", START, START + 3600 * 24, step=1)
+
+
+def test_last_hour_uses_one_second_tier():
+    """The default /metrics/history window (from=-3600) reads the 1 s tier."""
+    history = MetricHistory()
+    now = 100_000.0
+    for t in range(4000):
+        history.record("cpu", 1.0, now - 4000 + t + 1)
+
+    result = history.query("cpu", now - 3600, now)
+    assert result["resolution"] == 1